@@ -16,16 +16,17 @@ export default function PronunciationApp() {
   }, []);
 
   const pronounceSongWords = (song) => {
-    fetch(`http://127.0.0.1:8000/song/${song}`)
+    // One request for the whole song: a single audio track plus word offsets
+    fetch(`http://127.0.0.1:8000/song/${song}/bundle`)
       .then((res) => res.json())
       .then((data) => {
-        data.words.forEach((word, index) => {
-          setTimeout(() => {
-            fetch(`http://127.0.0.1:8000/pronounce/${word}`)
-              .then((res) => res.json())
-              .then((data) => setMessage(data.message));
-          }, index * 2000); // Delay each word by 2 seconds
-        });
+        const audio = new Audio(`data:${data.media_type};base64,${data.audio}`);
+        audio.ontimeupdate = () => {
+          const ms = audio.currentTime * 1000;
+          const current = data.words.find((w) => ms >= w.start_ms && ms < w.end_ms);
+          if (current) setMessage(`System said '${current.word}'`);
+        };
+        audio.play();
       });
   };
 
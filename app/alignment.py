@@ -0,0 +1,103 @@
+from collections import namedtuple
+
+from app.phonetics import sounds_like
+from app.scoring import normalize_text, similarity_ratio
+from app.timing import StageTimer
+
+# One expected word after alignment: what it was heard as (None if skipped)
+# and whether that counts as saying it
+AlignedWord = namedtuple("AlignedWord", ["word", "recognized", "correct"])
+PhraseAlignment = namedtuple("PhraseAlignment", ["words", "correct_prefix", "extra"])
+
+
+def words_match(expected, recognized):
+    """The per-word test verify uses: similar spelling, or the same word said aloud."""
+    if expected == recognized:
+        return True
+    if similarity_ratio(expected, recognized) >= 0.8:
+        return True
+    return sounds_like(expected, recognized)
+
+
+def align_phrase(expected_words, recognized_text):
+    """
+    Align a sung phrase against the lyrics that come next.
+
+    Word-level edit distance where a matching word costs 0 and a substitution,
+    skipped lyric or extra word costs 1. The learner may stop anywhere, so
+    lyrics after the last aligned word are free (semi-global alignment).
+    words covers the lyrics up to that point, each marked correct or not
+    (recognized is None for a skipped lyric); correct_prefix is how many in a
+    row, from the first, were sung correctly; extra lists recognised words
+    that matched no lyric.
+    """
+    expected = [word.lower() for word in expected_words]
+    recognized = normalize_text(recognized_text).split()
+    n, m = len(expected), len(recognized)
+
+    # cost[i][j]: aligning the first i lyrics with the first j recognised words
+    cost = [[0] * (m + 1) for _ in range(n + 1)]
+    for i in range(1, n + 1):
+        cost[i][0] = i
+    for j in range(1, m + 1):
+        cost[0][j] = j
+    match = [[False] * (m + 1) for _ in range(n + 1)]
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            match[i][j] = words_match(expected[i - 1], recognized[j - 1])
+            cost[i][j] = min(
+                cost[i - 1][j - 1] + (0 if match[i][j] else 1),
+                cost[i - 1][j] + 1,  # lyric skipped
+                cost[i][j - 1] + 1,  # extra word
+            )
+
+    # All recognised words must be used; trailing lyrics are free
+    end = min(range(n + 1), key=lambda i: (cost[i][m], -i))
+
+    heard = [None] * n
+    correct = [False] * n
+    extra = []
+    i, j = end, m
+    while i > 0 or j > 0:
+        # On ties skip the later lyric, so repeated words ("twinkle twinkle")
+        # sung once are credited to the first and count towards the prefix
+        if i > 0 and cost[i][j] == cost[i - 1][j] + 1:
+            i -= 1
+        elif i > 0 and j > 0 and cost[i][j] == cost[i - 1][j - 1] + (0 if match[i][j] else 1):
+            heard[i - 1] = recognized[j - 1]
+            correct[i - 1] = match[i][j]
+            i, j = i - 1, j - 1
+        else:
+            extra.append(recognized[j - 1])
+            j -= 1
+    extra.reverse()
+
+    prefix = 0
+    while prefix < n and correct[prefix]:
+        prefix += 1
+    words = [AlignedWord(expected[k], heard[k], correct[k]) for k in range(end)]
+    return PhraseAlignment(words, prefix, extra)
+
+
+def verify_phrase(transcriber, audio, expected_words, timer=None):
+    """
+    Verify a whole sung line in one transcription.
+
+    expected_words are the lyrics from the learner's position onwards; the
+    verdict marks each one and says how many, from the first, were correct.
+    """
+    if len(audio) == 0:
+        return {"recognized": "", "correct": False, "mode": "no_speech", "correct_prefix": 0, "words": []}
+    timer = timer or StageTimer()
+    with timer.stage("transcribe"):
+        text = transcriber.transcribe(audio)["text"]
+    with timer.stage("align"):
+        alignment = align_phrase(expected_words, text)
+    return {
+        "recognized": normalize_text(text),
+        "correct": alignment.correct_prefix > 0,
+        "mode": "phrase",
+        "correct_prefix": alignment.correct_prefix,
+        "words": [word._asdict() for word in alignment.words],
+        "extra": alignment.extra,
+    }
@@ -0,0 +1,265 @@
+import abc
+import asyncio
+import json
+import math
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import namedtuple
+
+import numpy as np
+
+from app import config
+from app.audio import SAMPLE_RATE, encode_wav
+from app.registry import registry
+
+# One recognised word; start/end are seconds from the start of the buffer (None if unknown)
+Word = namedtuple("Word", ["word", "confidence", "start", "end"])
+Transcript = namedtuple("Transcript", ["text", "words"])
+
+
+class ASRBackend(abc.ABC):
+    """
+    Common interface for speech recognisers.
+
+    transcribe() takes a float32 mono buffer at SAMPLE_RATE and returns a
+    Transcript; transcribe_async() is the same for async handlers. Backends
+    that only have a blocking API get transcribe_async() for free.
+    """
+
+    name = None
+
+    @abc.abstractmethod
+    def transcribe(self, audio):
+        """Transcript of a float32 mono buffer at SAMPLE_RATE."""
+
+    async def transcribe_async(self, audio):
+        return await asyncio.to_thread(self.transcribe, audio)
+
+
+class WhisperBackend(ASRBackend):
+    """Whisper through the shared batching worker, so it never races the verify endpoints."""
+
+    name = "whisper"
+
+    def __init__(self, transcriber=None):
+        self.transcriber = transcriber or registry.proxy("transcriber")
+
+    @staticmethod
+    def _to_transcript(result):
+        # Batched decoding gives one log-probability per utterance, so every word shares it
+        confidence = math.exp(result["avg_logprob"]) if result.get("avg_logprob") is not None else None
+        words = [Word(w, confidence, None, None) for w in result["text"].split()]
+        return Transcript(result["text"], words)
+
+    def transcribe(self, audio):
+        return self._to_transcript(self.transcriber.transcribe(audio))
+
+    async def transcribe_async(self, audio):
+        return self._to_transcript(await self.transcriber.transcribe_async(audio))
+
+
+def chunk_spans(n_samples, chunk, stride):
+    """
+    (start, end, keep_start, keep_end) sample spans covering n_samples.
+
+    Chunks are `chunk` long and overlap by 2 * stride; only the middle of
+    each (keep_start:keep_end) is used, so every kept sample had at least
+    `stride` of context on both sides except at the ends of the buffer.
+    """
+    step = max(chunk - 2 * stride, 1)
+    spans = []
+    start = 0
+    while True:
+        end = min(start + chunk, n_samples)
+        keep_start = 0 if start == 0 else start + stride
+        last = end >= n_samples
+        keep_end = n_samples if last else start + stride + step
+        spans.append((start, end, keep_start, keep_end))
+        if last:
+            return spans
+        start += step
+
+
+class Wav2Vec2Backend(ASRBackend):
+    """
+    Greedy CTC decoding; word confidence is the mean frame probability of its characters.
+
+    Buffers longer than WAV2VEC2_CHUNK_S are cut into overlapping chunks that
+    go through the model WAV2VEC2_BATCH_SIZE at a time, so cost grows
+    linearly with length instead of quadratically; the kept middles of the
+    chunks' frame probabilities are stitched back together before decoding,
+    so word timestamps are relative to the whole buffer.
+    """
+
+    name = "wav2vec2"
+
+    def __init__(self, chunk_s=None, stride_s=None, batch_size=None):
+        self.chunk = int((chunk_s or config.WAV2VEC2_CHUNK_S) * SAMPLE_RATE)
+        self.stride = int((config.WAV2VEC2_STRIDE_S if stride_s is None else stride_s) * SAMPLE_RATE)
+        self.batch_size = batch_size or config.WAV2VEC2_BATCH_SIZE
+
+    def transcribe(self, audio):
+        import torch
+
+        if len(audio) == 0:
+            return Transcript("", [])
+        processor, model = registry.get("wav2vec2")
+        audio = (audio - np.mean(audio)) / (np.std(audio) + 1e-7)
+        # Each output frame covers the product of the feature encoder's conv strides (320 samples)
+        samples_per_frame = int(np.prod(model.config.conv_stride))
+
+        spans = chunk_spans(len(audio), self.chunk, self.stride)
+        ids, probs = [], []
+        for i in range(0, len(spans), self.batch_size):
+            batch = spans[i:i + self.batch_size]
+            inputs = processor(
+                [audio[start:end] for start, end, _, _ in batch],
+                sampling_rate=SAMPLE_RATE, return_tensors="pt", padding=True,
+            )
+            with torch.inference_mode():
+                logits = model(inputs.input_values).logits
+            batch_probs, batch_ids = torch.softmax(logits, dim=-1).max(dim=-1)
+            for row, (start, _, keep_start, keep_end) in enumerate(batch):
+                first = (keep_start - start) // samples_per_frame
+                last = (keep_end - start + samples_per_frame - 1) // samples_per_frame
+                # Keep frames on a global grid so neighbouring chunks neither overlap nor leave gaps
+                first = max(first, len(ids) - start // samples_per_frame)
+                ids.extend(batch_ids[row, first:last].tolist())
+                probs.extend(batch_probs[row, first:last].tolist())
+
+        tokenizer = processor.tokenizer
+        return ctc_words(
+            ids, probs, tokenizer.convert_ids_to_tokens,
+            tokenizer.pad_token_id, tokenizer.word_delimiter_token, samples_per_frame / SAMPLE_RATE,
+        )
+
+
+def ctc_words(ids, probs, id_to_token, blank_id, delimiter, seconds_per_frame):
+    """Collapse greedy CTC output into words with confidences and timestamps."""
+    words = []
+    chars, char_probs, start, end = [], [], None, None
+
+    def flush():
+        if chars:
+            words.append(Word("".join(chars).lower(), float(np.mean(char_probs)),
+                              round(start * seconds_per_frame, 3), round((end + 1) * seconds_per_frame, 3)))
+
+    previous = None
+    for frame, (token_id, prob) in enumerate(zip(ids, probs)):
+        if token_id == previous or token_id == blank_id:
+            previous = token_id
+            continue
+        previous = token_id
+        token = id_to_token(token_id)
+        if token == delimiter:
+            flush()
+            chars, char_probs, start = [], [], None
+            continue
+        if start is None:
+            start = frame
+        chars.append(token)
+        char_probs.append(prob)
+        end = frame
+    flush()
+    return Transcript(" ".join(w.word for w in words), words)
+
+
+def _request_json(url, data=None, headers=None, method=None, timeout=None):
+    request = urllib.request.Request(url, data=data, headers=headers or {}, method=method)
+    with urllib.request.urlopen(request, timeout=timeout or config.REMOTE_ASR_TIMEOUT_S) as response:
+        return json.loads(response.read())
+
+
+def deepgram_transcript(response):
+    """Transcript from a /v1/listen response."""
+    alternative = response["results"]["channels"][0]["alternatives"][0]
+    words = [Word(w["word"], w.get("confidence"), w.get("start"), w.get("end")) for w in alternative.get("words", [])]
+    return Transcript(alternative["transcript"], words)
+
+
+def assemblyai_transcript(job):
+    """Transcript from a finished /v2/transcript job."""
+    if job["status"] == "error":
+        raise RuntimeError(f"AssemblyAI transcription failed: {job.get('error')}")
+    # AssemblyAI reports word times in milliseconds
+    words = [
+        Word(w["text"], w.get("confidence"), w["start"] / 1000, w["end"] / 1000)
+        for w in job.get("words") or []
+    ]
+    return Transcript(job.get("text") or "", words)
+
+
+class DeepgramBackend(ASRBackend):
+    """Deepgram's pre-recorded /v1/listen endpoint over plain HTTP."""
+
+    name = "deepgram"
+
+    def __init__(self, api_key=None, base_url=None, model="nova"):
+        self.api_key = api_key or config.DEEPGRAM_API_KEY
+        self.base_url = (base_url or config.DEEPGRAM_URL).rstrip("/")
+        self.model = model
+
+    def transcribe(self, audio):
+        query = urllib.parse.urlencode({"model": self.model, "language": config.WHISPER_LANGUAGE})
+        response = _request_json(
+            f"{self.base_url}/v1/listen?{query}",
+            data=encode_wav(audio, SAMPLE_RATE),
+            headers={"Authorization": f"Token {self.api_key}", "Content-Type": "audio/wav"},
+            method="POST",
+        )
+        return deepgram_transcript(response)
+
+
+class AssemblyAIBackend(ASRBackend):
+    """AssemblyAI's upload -> transcript -> poll flow."""
+
+    name = "assemblyai"
+
+    def __init__(self, api_key=None, base_url=None, poll_interval=None):
+        self.api_key = api_key or config.ASSEMBLYAI_API_KEY
+        self.base_url = (base_url or config.ASSEMBLYAI_URL).rstrip("/")
+        self.poll_interval = poll_interval if poll_interval is not None else config.ASSEMBLYAI_POLL_INTERVAL_S
+
+    def transcribe(self, audio):
+        headers = {"authorization": self.api_key}
+        upload = _request_json(
+            f"{self.base_url}/v2/upload",
+            data=encode_wav(audio, SAMPLE_RATE),
+            headers=dict(headers, **{"Content-Type": "application/octet-stream"}),
+            method="POST",
+        )
+        job = _request_json(
+            f"{self.base_url}/v2/transcript",
+            data=json.dumps({"audio_url": upload["upload_url"]}).encode(),
+            headers=dict(headers, **{"Content-Type": "application/json"}),
+            method="POST",
+        )
+        deadline = time.monotonic() + config.REMOTE_ASR_TIMEOUT_S
+        while job["status"] not in ("completed", "error"):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"AssemblyAI transcript {job['id']} not ready")
+            time.sleep(self.poll_interval)
+            job = _request_json(f"{self.base_url}/v2/transcript/{job['id']}", headers=headers)
+        return assemblyai_transcript(job)
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (WhisperBackend, Wav2Vec2Backend, DeepgramBackend, AssemblyAIBackend)
+}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_asr_backend(name=None):
+    """Shared backend instance selected by ASR_BACKEND ("whisper" by default)."""
+    name = name or config.ASR_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown ASR_BACKEND: {name}")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = BACKENDS[name]()
+        return _instances[name]
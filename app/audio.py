@@ -0,0 +1,248 @@
+import io
+import os
+import subprocess
+import wave
+from math import gcd
+
+import numpy as np
+
+# Whisper expects 16 kHz mono float32 in [-1, 1]
+SAMPLE_RATE = 16000
+
+
+class AudioDecodeError(ValueError):
+    pass
+
+
+def pcm16_to_float32(data):
+    """Convert little-endian 16-bit PCM bytes to a float32 array (one allocation)."""
+    audio = np.frombuffer(data, dtype="<i2").astype(np.float32)
+    audio *= 1.0 / 32768.0
+    return audio
+
+
+def resample(audio, orig_sr, target_sr=SAMPLE_RATE):
+    """Linear-interpolation resample, plenty for short spoken words."""
+    if orig_sr == target_sr or len(audio) == 0:
+        return audio
+    n_out = int(round(len(audio) * target_sr / orig_sr))
+    x_out = np.arange(n_out, dtype=np.float64) * (orig_sr / target_sr)
+    return np.interp(x_out, np.arange(len(audio)), audio).astype(np.float32)
+
+
+def resample_hq(audio, orig_sr, target_sr=SAMPLE_RATE):
+    """
+    Polyphase (anti-aliased) resample for whole recordings, e.g. 44.1 kHz music
+    down to 16 kHz. Uses scipy when it is installed, linear interpolation otherwise.
+    """
+    if orig_sr == target_sr or len(audio) == 0:
+        return audio
+    try:
+        from scipy.signal import resample_poly
+    except ImportError:
+        return resample(audio, orig_sr, target_sr)
+    g = gcd(int(orig_sr), int(target_sr))
+    return resample_poly(audio, int(target_sr) // g, int(orig_sr) // g).astype(np.float32, copy=False)
+
+
+def as_mono_float32(audio):
+    """Contiguous float32 mono view of an array; only copies when it has to."""
+    audio = np.asarray(audio, dtype=np.float32)
+    if audio.ndim > 1:
+        # (channels, frames) from torch/Demucs or (frames, channels) from file readers
+        axis = 0 if audio.shape[0] < audio.shape[-1] else -1
+        audio = audio.mean(axis=axis, dtype=np.float32)
+    return np.ascontiguousarray(audio)
+
+
+def decode_wav(data, target_sr=SAMPLE_RATE):
+    """Decode PCM WAV bytes with the stdlib wave module (no ffmpeg, no disk)."""
+    try:
+        with wave.open(io.BytesIO(data), "rb") as wf:
+            channels = wf.getnchannels()
+            width = wf.getsampwidth()
+            rate = wf.getframerate()
+            frames = wf.readframes(wf.getnframes())
+    except (wave.Error, EOFError) as e:
+        raise AudioDecodeError(f"Invalid WAV data: {e}")
+
+    if width == 1:
+        audio = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        audio = pcm16_to_float32(frames)
+    elif width == 4:
+        audio = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise AudioDecodeError(f"Unsupported WAV sample width: {width * 8} bits")
+
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+    return resample_hq(audio, rate, target_sr)
+
+
+def decode_with_ffmpeg(data, target_sr=SAMPLE_RATE):
+    """Decode any container ffmpeg understands (WebM/Opus, OGG, MP3, ...) through pipes."""
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0",
+        "-i", "pipe:0",
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(target_sr),
+        "-",
+    ]
+    try:
+        out = subprocess.run(cmd, input=data, capture_output=True, check=True).stdout
+    except FileNotFoundError:
+        raise AudioDecodeError("ffmpeg is required to decode compressed audio")
+    except subprocess.CalledProcessError as e:
+        raise AudioDecodeError(f"Failed to decode audio: {e.stderr.decode(errors='ignore').strip()}")
+    return pcm16_to_float32(out)
+
+
+def stream_file_with_ffmpeg(path, sample_rate, channels=1, block_frames=65536):
+    """
+    Decode a file through ffmpeg a block at a time, yielding float32 arrays of
+    shape (frames, channels), so a full-length track is never held in memory.
+    """
+    cmd = [
+        "ffmpeg", "-nostdin", "-v", "error",
+        "-i", path,
+        "-f", "s16le", "-acodec", "pcm_s16le", "-ac", str(channels), "-ar", str(sample_rate),
+        "-",
+    ]
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise AudioDecodeError("ffmpeg is required to decode audio files")
+    block_bytes = block_frames * channels * 2
+    try:
+        while True:
+            data = proc.stdout.read(block_bytes)
+            if not data:
+                break
+            # A short read can end mid-frame; drop the partial frame only at EOF
+            usable = len(data) - len(data) % (channels * 2)
+            yield pcm16_to_float32(data[:usable]).reshape(-1, channels)
+        if proc.wait() != 0:
+            raise AudioDecodeError(f"Failed to decode {path}: {proc.stderr.read().decode(errors='ignore').strip()}")
+    finally:
+        proc.stdout.close()
+        proc.stderr.close()
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+
+def _content_type_params(content_type):
+    mime, *params = [p.strip() for p in content_type.split(";")]
+    values = {}
+    for param in params:
+        key, _, value = param.partition("=")
+        values[key.strip().lower()] = value.strip()
+    return mime.lower(), values
+
+
+def decode_audio(data, content_type=None, target_sr=SAMPLE_RATE):
+    """
+    Decode uploaded audio bytes into a float32 mono buffer at target_sr.
+
+    Raw PCM is sent as `audio/L16; rate=<hz>; channels=<n>` (16-bit little-endian),
+    WAV is parsed in-process, everything else goes through ffmpeg over pipes.
+    """
+    if not data:
+        raise AudioDecodeError("Empty audio upload")
+
+    mime, params = _content_type_params(content_type or "")
+    if mime in ("audio/l16", "audio/pcm"):
+        try:
+            rate = int(params.get("rate", target_sr))
+            channels = int(params.get("channels", 1))
+        except ValueError:
+            raise AudioDecodeError("Raw PCM rate and channels must be integers") from None
+        if rate <= 0 or channels <= 0:
+            raise AudioDecodeError("Raw PCM rate and channels must be positive")
+        if len(data) % (2 * channels):
+            raise AudioDecodeError("Raw PCM length is not a whole number of frames")
+        audio = pcm16_to_float32(data)
+        if channels > 1:
+            audio = audio.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+        return resample_hq(audio, rate, target_sr)
+
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        try:
+            return decode_wav(data, target_sr)
+        except AudioDecodeError:
+            # e.g. IEEE float or extensible WAV, which the wave module can't read
+            return decode_with_ffmpeg(data, target_sr)
+
+    return decode_with_ffmpeg(data, target_sr)
+
+
+def decode_file(path, target_sr=SAMPLE_RATE):
+    """
+    Decode a file on disk. WAV is parsed in-process; anything else is decoded
+    and resampled by ffmpeg in one pass, reading the file itself rather than
+    piping it through Python.
+    """
+    with open(path, "rb") as f:
+        header = f.read(12)
+        if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+            try:
+                return decode_wav(header + f.read(), target_sr)
+            except AudioDecodeError:
+                pass
+    cmd = [
+        "ffmpeg", "-nostdin", "-v", "error", "-threads", "0",
+        "-i", os.fspath(path),
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(target_sr),
+        "-",
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    except FileNotFoundError:
+        raise AudioDecodeError("ffmpeg is required to decode compressed audio")
+    except subprocess.CalledProcessError as e:
+        raise AudioDecodeError(f"Failed to decode {path}: {e.stderr.decode(errors='ignore').strip()}")
+    return pcm16_to_float32(out)
+
+
+def load_audio(source, target_sr=SAMPLE_RATE, content_type=None, source_sr=None):
+    """
+    The one way audio gets into the models: a contiguous float32 mono buffer at target_sr.
+
+    source may be
+      - a numpy array (at source_sr, default target_sr), returned as is when it
+        already is float32 mono at the right rate,
+      - a speech_recognition AudioData capture,
+      - encoded bytes (content_type as for decode_audio),
+      - a path to a file,
+      - a binary file-like object (e.g. an UploadFile) or an iterable of byte chunks.
+    """
+    if isinstance(source, np.ndarray):
+        return resample_hq(as_mono_float32(source), source_sr or target_sr, target_sr)
+    if hasattr(source, "get_raw_data"):
+        return audio_data_to_array(source, target_sr)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return decode_audio(bytes(source), content_type, target_sr)
+    if isinstance(source, (str, os.PathLike)):
+        return decode_file(source, target_sr)
+    if hasattr(source, "read"):
+        content_type = content_type or getattr(source, "content_type", None)
+        # UploadFile.read() is async; its underlying file is not
+        return decode_audio(getattr(source, "file", source).read(), content_type, target_sr)
+    return decode_audio(b"".join(source), content_type, target_sr)
+
+
+def encode_wav(audio, sample_rate=SAMPLE_RATE):
+    """Encode a float32 mono buffer as 16-bit PCM WAV bytes."""
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+def audio_data_to_array(audio_data, target_sr=SAMPLE_RATE):
+    """Convert a speech_recognition AudioData capture straight to a float32 buffer."""
+    return pcm16_to_float32(audio_data.get_raw_data(convert_rate=target_sr, convert_width=2))
@@ -0,0 +1,189 @@
+import asyncio
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import torch
+import torch.nn.functional as F
+import whisper
+
+from app import config
+
+
+class ExpectedWordScorer:
+    """
+    Scores how well an utterance matches a known word with one teacher-forced
+    decoder pass: the expected tokens, then end-of-transcript, are fed to the
+    Whisper decoder and their log-probabilities averaged, instead of decoding
+    freely token by token. Each spelling is also tried with a closing ".",
+    "!" or "?", and the best-scoring variant counts.
+    """
+
+    def __init__(self, model, language=None):
+        self.model = model
+        self.tokenizer = whisper.tokenizer.get_tokenizer(
+            model.is_multilingual,
+            num_languages=model.num_languages,
+            language=language or config.WHISPER_LANGUAGE,
+            task="transcribe",
+        )
+        self.prefix = list(self.tokenizer.sot_sequence_including_notimestamps)
+
+    def _variants(self, word):
+        # Whisper capitalises the start of a transcript and usually closes it
+        # with punctuation (" Hello."), so try each spelling bare and punctuated
+        word = word.strip()
+        spellings = dict.fromkeys([" " + word.lower(), " " + word.capitalize()])
+        return [spelling + end for spelling in spellings for end in ("", ".", "!", "?")]
+
+    def score_batch(self, mel, words):
+        """
+        mel: [batch, n_mels, n_frames] on the model's device, one row per word.
+        Returns a confidence in [0, 1] per word (exp of the mean token log-prob).
+        """
+        audio_features = self.model.embed_audio(mel)
+
+        rows, owners = [], []
+        for i, word in enumerate(words):
+            for variant in self._variants(word):
+                # End with EOT, so a longer word the expected one is a prefix of
+                # ("starlight" for "star") doesn't score as the word itself
+                rows.append(self.prefix + self.tokenizer.encode(variant) + [self.tokenizer.eot])
+                owners.append(i)
+
+        width = max(len(row) for row in rows)
+        tokens = torch.full((len(rows), width), self.tokenizer.eot, dtype=torch.long)
+        for r, row in enumerate(rows):
+            tokens[r, :len(row)] = torch.tensor(row)
+
+        logits = self.model.logits(tokens.to(mel.device), audio_features[owners])
+        logprobs = F.log_softmax(logits.float(), dim=-1)
+
+        n_prefix = len(self.prefix)
+        best = [-math.inf] * len(words)
+        for r, row in enumerate(rows):
+            target = torch.tensor(row[n_prefix:], device=logprobs.device)
+            # The logits at position t predict the token at t + 1
+            positions = torch.arange(n_prefix - 1, len(row) - 1, device=logprobs.device)
+            mean_logprob = logprobs[r, positions, target].mean().item()
+            best[owners[r]] = max(best[owners[r]], mean_logprob)
+        return [math.exp(lp) for lp in best]
+
+
+class BatchTranscriber:
+    """
+    Single worker thread that owns the Whisper model and decodes queued
+    utterances together.
+
+    Requests call transcribe() / transcribe_async(); the worker collects up to
+    max_batch_size utterances (waiting at most max_wait_ms after the first one
+    arrives), pads them into one mel-spectrogram batch and runs a single
+    whisper.decode over it, then resolves each request's future.
+
+    Expected-word scoring (score()/score_async()) runs on the same thread:
+    whisper.decode installs kv-cache hooks on the shared model, so no other
+    forward pass may run concurrently with it.
+    """
+
+    def __init__(self, model, max_batch_size=None, max_wait_ms=None, language=None):
+        self.model = model
+        self.max_batch_size = max_batch_size or config.WHISPER_MAX_BATCH_SIZE
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else config.WHISPER_MAX_WAIT_MS) / 1000
+        self.options = whisper.DecodingOptions(
+            language=language or config.WHISPER_LANGUAGE,
+            without_timestamps=True,
+            fp16=model.device.type == "cuda",
+        )
+        self.scorer = ExpectedWordScorer(model, language)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="whisper-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, audio):
+        """Queue a float32 16 kHz buffer; returns a Future resolving to {"text": ...}."""
+        return self._submit("transcribe", audio, None)
+
+    def submit_score(self, audio, expected_word):
+        """Queue a teacher-forced score of expected_word; the Future resolves to a confidence."""
+        return self._submit("score", audio, expected_word)
+
+    def transcribe(self, audio, timeout=None):
+        return self.submit(audio).result(timeout)
+
+    async def transcribe_async(self, audio):
+        return await asyncio.wrap_future(self.submit(audio))
+
+    def score(self, audio, expected_word, timeout=None):
+        return self.submit_score(audio, expected_word).result(timeout)
+
+    async def score_async(self, audio, expected_word):
+        return await asyncio.wrap_future(self.submit_score(audio, expected_word))
+
+    def _submit(self, kind, audio, word):
+        future = Future()
+        self._queue.put((kind, audio, word, future))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the shutdown marker back so _run exits after this batch
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [item for item in self._collect(first) if item[3].set_running_or_notify_cancel()]
+            for kind, run in (("transcribe", self._decode), ("score", self._score)):
+                jobs = [item for item in batch if item[0] == kind]
+                if not jobs:
+                    continue
+                try:
+                    results = run([audio for _, audio, _, _ in jobs], [word for _, _, word, _ in jobs])
+                except Exception as e:
+                    for *_, fut in jobs:
+                        fut.set_exception(e)
+                    continue
+                for (*_, fut), result in zip(jobs, results):
+                    fut.set_result(result)
+
+    def _mel(self, audios):
+        n_mels = self.model.dims.n_mels
+        return torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(audio)), n_mels=n_mels)
+            for audio in audios
+        ]).to(self.model.device)
+
+    def _decode(self, audios, _words):
+        mel = self._mel(audios)
+        with torch.inference_mode():
+            decoded = whisper.decode(self.model, mel, self.options)
+        return [
+            {"text": r.text.strip(), "avg_logprob": r.avg_logprob, "no_speech_prob": r.no_speech_prob}
+            for r in decoded
+        ]
+
+    def _score(self, audios, words):
+        mel = self._mel(audios)
+        with torch.inference_mode():
+            return self.scorer.score_batch(mel, words)
@@ -0,0 +1,162 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+import numpy as np
+
+from app import config
+from app.audio import SAMPLE_RATE, decode_audio, encode_wav
+
+
+def song_hash(words, voice=None, rate=None):
+    """Changes whenever a song's word list (or how it is rendered) changes."""
+    raw = json.dumps({"words": words, "voice": voice, "rate": rate, "gap_ms": config.BUNDLE_GAP_MS})
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def trim_silence(audio, threshold=0.02):
+    """Drop the leading/trailing silence TTS engines pad each render with."""
+    if len(audio) == 0:
+        return audio
+    loud = np.flatnonzero(np.abs(audio) > threshold * max(float(np.abs(audio).max()), 1e-6))
+    if len(loud) == 0:
+        return audio[:0]
+    return audio[loud[0]:loud[-1] + 1]
+
+
+class SongBundler:
+    """
+    Pre-renders each song into one audio track plus a word -> (start_ms, end_ms)
+    table, so a client plays the whole song from a single response instead of
+    one /pronounce request per word.
+
+    Bundles are written to bundle_dir as <song>.json + <song>-<hash>.wav and
+    only rebuilt when the song's word list changes.
+    """
+
+    def __init__(self, pronunciations, bundle_dir=None, voice=None, rate=None):
+        self.pronunciations = pronunciations
+        self.bundle_dir = bundle_dir or config.BUNDLE_DIR
+        self.voice = voice
+        self.rate = rate
+        os.makedirs(self.bundle_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._bundles = {}  # song -> {"hash", "words", "body"}
+        self._build_locks = {}  # song -> Lock, so a song is built once at a time
+
+    def precompute(self, songs):
+        """Build (or load) a bundle for every song; meant to run in the background at startup."""
+        for song_name, words in songs.items():
+            try:
+                self.get(song_name, words)
+            except Exception as e:
+                print(f"Failed to build bundle for {song_name}: {e}")
+
+    def start_background(self, songs):
+        thread = threading.Thread(target=self.precompute, args=(dict(songs),), name="bundle-precompute", daemon=True)
+        thread.start()
+        return thread
+
+    def get(self, song_name, words):
+        """Return the bundle for a song, building it now if the word list changed."""
+        digest = song_hash(words, self.voice, self.rate)
+        with self._lock:
+            bundle = self._bundles.get(song_name)
+        if bundle is not None and bundle["hash"] == digest:
+            return bundle
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(song_name, threading.Lock())
+        with build_lock:
+            # Another request may have built it while this one waited
+            with self._lock:
+                bundle = self._bundles.get(song_name)
+            if bundle is not None and bundle["hash"] == digest:
+                return bundle
+            bundle = self._load(song_name, digest) or self._build(song_name, words, digest)
+            with self._lock:
+                self._bundles[song_name] = bundle
+        return bundle
+
+    def _manifest_path(self, song_name):
+        return os.path.join(self.bundle_dir, f"{song_name}.json")
+
+    def _audio_path(self, song_name, digest):
+        return os.path.join(self.bundle_dir, f"{song_name}-{digest}.wav")
+
+    def _load(self, song_name, digest):
+        try:
+            with open(self._manifest_path(song_name)) as f:
+                manifest = json.load(f)
+            if manifest["hash"] != digest:
+                return None
+            with open(self._audio_path(song_name, digest), "rb") as f:
+                audio = f.read()
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+        return self._make_bundle(song_name, digest, manifest["words"], audio)
+
+    def _build(self, song_name, words, digest):
+        gap = np.zeros(int(SAMPLE_RATE * config.BUNDLE_GAP_MS / 1000), dtype=np.float32)
+        pieces = []
+        offsets = []
+        position = 0
+        for word in words:
+            data, _ = self.pronunciations.get(word, self.voice, self.rate)
+            clip = trim_silence(decode_audio(data))
+            start = position
+            position += len(clip)
+            offsets.append({
+                "word": word,
+                "start_ms": round(start * 1000 / SAMPLE_RATE),
+                "end_ms": round(position * 1000 / SAMPLE_RATE),
+            })
+            pieces.extend([clip, gap])
+            position += len(gap)
+
+        audio = encode_wav(np.concatenate(pieces) if pieces else gap, SAMPLE_RATE)
+
+        # Write audio first so a manifest never points at a missing track. Both
+        # go to unique temp names and are renamed into place, so other workers
+        # sharing bundle_dir never read a partial file
+        previous = self._previous_hash(song_name)
+        self._write_atomic(self._audio_path(song_name, digest), audio)
+        manifest = json.dumps({"song": song_name, "hash": digest, "words": offsets})
+        self._write_atomic(self._manifest_path(song_name), manifest.encode("utf-8"))
+        if previous and previous != digest:
+            try:
+                os.remove(self._audio_path(song_name, previous))
+            except FileNotFoundError:
+                pass
+
+        return self._make_bundle(song_name, digest, offsets, audio)
+
+    def _write_atomic(self, path, data):
+        tmp = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _previous_hash(self, song_name):
+        try:
+            with open(self._manifest_path(song_name)) as f:
+                return json.load(f).get("hash")
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _make_bundle(self, song_name, digest, offsets, audio):
+        # Serialize once; every request for the song reuses the same body
+        body = json.dumps({
+            "song": song_name,
+            "words": offsets,
+            "media_type": "audio/wav",
+            "audio": base64.b64encode(audio).decode("ascii"),
+        }).encode("utf-8")
+        return {"hash": digest, "words": offsets, "body": body}
@@ -0,0 +1,55 @@
+import json
+import os
+import threading
+
+from app import config
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def read_catalog(path=None):
+    """
+    Ingested songs from the catalog file: {song: {"words": [...], "timings": [...], ...}}.
+
+    The file is written by `python -m app.ingest`; a missing file is an empty
+    catalog. Parsed contents are cached until the file's mtime changes.
+    """
+    path = path or config.CATALOG_PATH
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    with open(path, encoding="utf-8") as f:
+        songs = json.load(f).get("songs", {})
+    with _cache_lock:
+        _cache[path] = (mtime, songs)
+    return songs
+
+
+def write_catalog(songs, path=None):
+    """Replace the catalog atomically, so the API never reads a half-written file."""
+    path = path or config.CATALOG_PATH
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "songs": songs}, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def load_songs(builtin, path=None):
+    """The built-in song dict plus every ingested song (built-in names win)."""
+    songs = {name: entry["words"] for name, entry in read_catalog(path).items() if entry.get("words")}
+    songs.update(builtin)
+    return songs
+
+
+def song_timings(song_name, path=None):
+    """Per-word {word, start, end, confidence} for an ingested song, or None."""
+    entry = read_catalog(path).get(song_name)
+    return entry.get("timings") if entry else None
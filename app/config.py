@@ -0,0 +1,138 @@
+import os
+
+# Models, loaded lazily by app.registry; WARMUP_MODELS are loaded in the
+# background at startup so the first verify doesn't pay for them
+WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "base")
+WAV2VEC2_MODEL = os.environ.get("WAV2VEC2_MODEL", "facebook/wav2vec2-large-960h")
+DEMUCS_MODEL = os.environ.get("DEMUCS_MODEL", "htdemucs")
+WARMUP_MODELS = [name for name in os.environ.get("WARMUP_MODELS", "whisper,transcriber,tts").split(",") if name]
+
+# CPU inference profile. MODEL_QUANTIZATION=int8 quantizes the Linear layers of
+# Whisper and Wav2Vec2 to int8 when they load on CPU; TORCH_THREADS and
+# TORCH_INTEROP_THREADS pin torch's thread pools (0 = torch's default).
+# INFERENCE_PROFILE=cpu-int8 sets all three: int8, one thread per core, one inter-op thread.
+INFERENCE_PROFILE = os.environ.get("INFERENCE_PROFILE", "default")
+_CPU_INT8 = INFERENCE_PROFILE == "cpu-int8"
+MODEL_QUANTIZATION = os.environ.get("MODEL_QUANTIZATION", "int8" if _CPU_INT8 else "none")
+TORCH_THREADS = int(os.environ.get("TORCH_THREADS", str(os.cpu_count() or 1) if _CPU_INT8 else "0"))
+TORCH_INTEROP_THREADS = int(os.environ.get("TORCH_INTEROP_THREADS", "1" if _CPU_INT8 else "0"))
+
+# `python -m app.prefork`: models loaded once in the parent and shared by the
+# forked workers; PREFORK_SHARED_MEMORY moves their weights into torch shared memory
+PREFORK_MODELS = [name for name in os.environ.get("PREFORK_MODELS", "whisper").split(",") if name]
+PREFORK_SHARED_MEMORY = os.environ.get("PREFORK_SHARED_MEMORY", "0") == "1"
+
+# Speech recogniser behind app.asr.get_asr_backend(): whisper, wav2vec2,
+# deepgram or assemblyai. The remote URLs can point at a local mock server.
+ASR_BACKEND = os.environ.get("ASR_BACKEND", "whisper")
+DEEPGRAM_API_KEY = os.environ.get("DEEPGRAM_API_KEY", "")
+DEEPGRAM_URL = os.environ.get("DEEPGRAM_URL", "https://api.deepgram.com")
+ASSEMBLYAI_API_KEY = os.environ.get("ASSEMBLYAI_API_KEY", "")
+ASSEMBLYAI_URL = os.environ.get("ASSEMBLYAI_URL", "https://api.assemblyai.com")
+ASSEMBLYAI_POLL_INTERVAL_S = float(os.environ.get("ASSEMBLYAI_POLL_INTERVAL_S", "0.5"))
+REMOTE_ASR_TIMEOUT_S = float(os.environ.get("REMOTE_ASR_TIMEOUT_S", "60"))
+# app.remote_asr (batch transcription): files in flight at once, and retries
+# of 429/5xx/connection errors with jittered backoff from BACKOFF_S up to BACKOFF_MAX_S
+REMOTE_ASR_MAX_CONCURRENCY = int(os.environ.get("REMOTE_ASR_MAX_CONCURRENCY", "8"))
+REMOTE_ASR_MAX_RETRIES = int(os.environ.get("REMOTE_ASR_MAX_RETRIES", "5"))
+REMOTE_ASR_BACKOFF_S = float(os.environ.get("REMOTE_ASR_BACKOFF_S", "0.5"))
+REMOTE_ASR_BACKOFF_MAX_S = float(os.environ.get("REMOTE_ASR_BACKOFF_MAX_S", "20"))
+
+# Vocal separation in VocalTranscriber: "chunked" runs Demucs over overlapping
+# segments with overlap-add crossfades (flat memory), "full" is one forward
+# pass over the whole track. 0 threads leaves torch's default.
+SEPARATION_MODE = os.environ.get("SEPARATION_MODE", "chunked")
+SEPARATION_SEGMENT_S = float(os.environ.get("SEPARATION_SEGMENT_S", "7.8"))
+SEPARATION_OVERLAP = float(os.environ.get("SEPARATION_OVERLAP", "0.25"))
+SEPARATION_THREADS = int(os.environ.get("SEPARATION_THREADS", "0"))
+
+# Wav2Vec2 transcribes long audio in WAV2VEC2_CHUNK_S windows overlapping by
+# 2 * WAV2VEC2_STRIDE_S, WAV2VEC2_BATCH_SIZE windows per forward pass
+WAV2VEC2_CHUNK_S = float(os.environ.get("WAV2VEC2_CHUNK_S", "10"))
+WAV2VEC2_STRIDE_S = float(os.environ.get("WAV2VEC2_STRIDE_S", "2"))
+WAV2VEC2_BATCH_SIZE = int(os.environ.get("WAV2VEC2_BATCH_SIZE", "4"))
+
+# Separated vocals and transcripts, keyed by a hash of the audio and model settings
+STEM_CACHE_ENABLED = os.environ.get("STEM_CACHE_ENABLED", "1") != "0"
+STEM_CACHE_DIR = os.environ.get("STEM_CACHE_DIR", "stem_cache")
+STEM_CACHE_MAX_BYTES = int(os.environ.get("STEM_CACHE_MAX_BYTES", str(4 * 1024 * 1024 * 1024)))
+
+# Songs ingested from audio by `python -m app.ingest`, served alongside the built-in lists
+CATALOG_PATH = os.environ.get("CATALOG_PATH", "song_catalog.json")
+INGEST_CHECKPOINT_DIR = os.environ.get("INGEST_CHECKPOINT_DIR", "ingest_checkpoints")
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", "0"))  # 0: sized to cores and RAM
+
+# Micro-batching window for the shared Whisper worker: a batch is decoded as
+# soon as it is full or the oldest queued utterance has waited this long.
+WHISPER_MAX_BATCH_SIZE = int(os.environ.get("WHISPER_MAX_BATCH_SIZE", "8"))
+WHISPER_MAX_WAIT_MS = float(os.environ.get("WHISPER_MAX_WAIT_MS", "25"))
+
+# Verify requests run on a dedicated pool of INFERENCE_WORKERS threads with at
+# most INFERENCE_QUEUE_SIZE waiting; beyond that they get 429 + Retry-After.
+# One worker per batch slot, so the Whisper worker can still fill its batches.
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", str(WHISPER_MAX_BATCH_SIZE)))
+INFERENCE_QUEUE_SIZE = int(os.environ.get("INFERENCE_QUEUE_SIZE", "16"))
+INFERENCE_RETRY_AFTER_S = int(os.environ.get("INFERENCE_RETRY_AFTER_S", "1"))
+
+# Songs are English, so skip Whisper's per-utterance language detection
+WHISPER_LANGUAGE = os.environ.get("WHISPER_LANGUAGE", "en")
+
+# Rendered pronunciation cache: on-disk LRU plus a small in-memory hot tier
+TTS_CACHE_DIR = os.environ.get("TTS_CACHE_DIR", "tts_cache")
+TTS_CACHE_MAX_BYTES = int(os.environ.get("TTS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+TTS_HOT_CACHE_MAX_BYTES = int(os.environ.get("TTS_HOT_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# Whole-song pronunciation bundles built at startup
+BUNDLE_DIR = os.environ.get("BUNDLE_DIR", "song_bundles")
+BUNDLE_GAP_MS = int(os.environ.get("BUNDLE_GAP_MS", "350"))
+
+# Verification: "forced" scores the expected word with one teacher-forced
+# decoder pass and only transcribes when the confidence falls between the
+# thresholds; "transcribe" always runs free decoding + similarity_ratio.
+VERIFY_MODE = os.environ.get("VERIFY_MODE", "forced")
+SCORE_ACCEPT_THRESHOLD = float(os.environ.get("SCORE_ACCEPT_THRESHOLD", "0.5"))
+SCORE_REJECT_THRESHOLD = float(os.environ.get("SCORE_REJECT_THRESHOLD", "0.1"))
+
+# Phrase verification (?phrase=true): a sung line is aligned against at most
+# this many lyrics from the learner's position
+PHRASE_MAX_WORDS = int(os.environ.get("PHRASE_MAX_WORDS", "16"))
+
+# Noise calibration and voice-activity trimming before transcription
+CALIBRATION_SECONDS = float(os.environ.get("CALIBRATION_SECONDS", "1.0"))
+NOISE_PROFILE_TTL_S = float(os.environ.get("NOISE_PROFILE_TTL_S", "600"))
+NOISE_PROFILE_MAX_ENTRIES = int(os.environ.get("NOISE_PROFILE_MAX_ENTRIES", "10000"))
+VAD_ENABLED = os.environ.get("VAD_ENABLED", "1") == "1"
+VAD_FRAME_MS = int(os.environ.get("VAD_FRAME_MS", "30"))
+VAD_PAD_MS = int(os.environ.get("VAD_PAD_MS", "150"))
+VAD_THRESHOLD_RATIO = float(os.environ.get("VAD_THRESHOLD_RATIO", "3.0"))
+VAD_MIN_RMS = float(os.environ.get("VAD_MIN_RMS", "0.003"))
+
+# WebSocket streaming verification: endpoint after this much trailing silence
+STREAM_END_SILENCE_MS = int(os.environ.get("STREAM_END_SILENCE_MS", "400"))
+STREAM_MIN_SPEECH_MS = int(os.environ.get("STREAM_MIN_SPEECH_MS", "90"))
+STREAM_PARTIAL_INTERVAL_MS = int(os.environ.get("STREAM_PARTIAL_INTERVAL_MS", "400"))
+STREAM_MAX_UTTERANCE_S = float(os.environ.get("STREAM_MAX_UTTERANCE_S", "10"))
+
+# Opt-in profiling: verify/pronounce work slower than this is dumped as a
+# cProfile trace into PROFILE_DIR (0 = off)
+PROFILE_THRESHOLD_MS = float(os.environ.get("PROFILE_THRESHOLD_MS", "0"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+
+# Practices run by app.practice.PracticeScheduler: at most PRACTICE_MAX_COUNT at
+# once per process, expired after PRACTICE_AUDIO_TIMEOUT_S without an attempt,
+# and kept PRACTICE_RETAIN_S after finishing so event streams can catch up
+PRACTICE_MAX_COUNT = int(os.environ.get("PRACTICE_MAX_COUNT", "10000"))
+PRACTICE_AUDIO_TIMEOUT_S = float(os.environ.get("PRACTICE_AUDIO_TIMEOUT_S", "300"))
+PRACTICE_RETAIN_S = float(os.environ.get("PRACTICE_RETAIN_S", "60"))
+PRACTICE_KEEPALIVE_S = float(os.environ.get("PRACTICE_KEEPALIVE_S", "15"))
+PRACTICE_EVENT_HISTORY = int(os.environ.get("PRACTICE_EVENT_HISTORY", "256"))
+
+# Practice sessions: evicted after this long without a request
+SESSION_TTL_S = float(os.environ.get("SESSION_TTL_S", "1800"))
+SESSION_SWEEP_INTERVAL_S = float(os.environ.get("SESSION_SWEEP_INTERVAL_S", "30"))
+SESSION_MAX_COUNT = int(os.environ.get("SESSION_MAX_COUNT", "500000"))
+
+# Where session progress lives: "memory" (one process) or "sqlite", a WAL-mode
+# database file shared by all uvicorn workers on the box
+STATE_BACKEND = os.environ.get("STATE_BACKEND", "memory")
+STATE_DB_PATH = os.environ.get("STATE_DB_PATH", "shlok_state.db")
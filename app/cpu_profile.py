@@ -0,0 +1,69 @@
+import io
+import threading
+
+from app import config
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def configure_torch(threads=None, interop_threads=None):
+    """
+    Pin torch's intra-op and inter-op thread pools (TORCH_THREADS,
+    TORCH_INTEROP_THREADS; 0 keeps torch's default). Runs once per process,
+    before the first model loads: the inter-op pool can't be resized once
+    any parallel work has started.
+    """
+    global _configured
+    import torch
+
+    with _configure_lock:
+        if _configured:
+            return
+        _configured = True
+        threads = config.TORCH_THREADS if threads is None else threads
+        interop_threads = config.TORCH_INTEROP_THREADS if interop_threads is None else interop_threads
+        if threads:
+            torch.set_num_threads(threads)
+        if interop_threads:
+            try:
+                torch.set_num_interop_threads(interop_threads)
+            except RuntimeError as e:
+                print(f"Could not set inter-op threads: {e}")
+
+
+def quantize_int8(model):
+    """Dynamic int8 quantization of every Linear layer (weights int8, activations quantized on the fly)."""
+    import torch
+
+    # Whisper's layers subclass nn.Linear, which quantize_dynamic only matches
+    # by exact type; on CPU in fp32 the plain nn.Linear forward is equivalent
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear) and type(module) is not torch.nn.Linear:
+            module.__class__ = torch.nn.Linear
+    if torch.backends.quantized.engine == "none" and "qnnpack" in torch.backends.quantized.supported_engines:
+        torch.backends.quantized.engine = "qnnpack"  # ARM builds
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def prepare_model(model, quantization=None):
+    """Put a freshly loaded model in eval mode and apply MODEL_QUANTIZATION if it runs on CPU."""
+    quantization = quantization or config.MODEL_QUANTIZATION
+    model.eval()
+    if quantization == "none":
+        return model
+    if quantization != "int8":
+        raise ValueError(f"Unknown MODEL_QUANTIZATION: {quantization}")
+    if next(model.parameters()).is_cuda:
+        # Dynamic quantization only has CPU kernels
+        return model
+    return quantize_int8(model)
+
+
+def model_bytes(model):
+    """Serialized size of the weights, which counts int8 packed weights correctly."""
+    import torch
+
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell()
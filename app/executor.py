@@ -0,0 +1,94 @@
+import asyncio
+import functools
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app import config
+
+
+class Saturated(Exception):
+    """The inference executor's queue is full; retry after `retry_after` seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Inference queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """
+    A dedicated, size-limited pool for verify work (mic capture, decoding,
+    model calls), with a bounded queue in front of it.
+
+    Work beyond INFERENCE_WORKERS running + INFERENCE_QUEUE_SIZE waiting is
+    refused with Saturated instead of piling up, and none of it runs on
+    FastAPI's threadpool, so /songs and friends stay fast while verify is
+    saturated.
+    """
+
+    def __init__(self, max_workers=None, max_queue=None):
+        self.max_workers = max_workers or config.INFERENCE_WORKERS
+        self.max_queue = config.INFERENCE_QUEUE_SIZE if max_queue is None else max_queue
+        self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self._rejected = 0
+        self._completed = 0
+        self._service_time = None  # moving average of seconds per job
+
+    def stats(self):
+        with self._lock:
+            return {
+                "running": self._running,
+                "queued": self._in_flight - self._running,
+                "workers": self.max_workers,
+                "queue_size": self.max_queue,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_service_ms": round(self._service_time * 1000, 1) if self._service_time else None,
+            }
+
+    def retry_after(self):
+        """Seconds until a queue slot is likely to free up (at least INFERENCE_RETRY_AFTER_S)."""
+        with self._lock:
+            waiting = self._in_flight - self.max_workers + 1
+            per_job = self._service_time or 0.0
+        estimate = max(waiting, 1) * per_job / self.max_workers
+        return max(math.ceil(estimate), config.INFERENCE_RETRY_AFTER_S)
+
+    def _admit(self):
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                return False
+            self._in_flight += 1
+            return True
+
+    def _call(self, fn):
+        with self._lock:
+            self._running += 1
+        start = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._service_time = elapsed if self._service_time is None else 0.9 * self._service_time + 0.1 * elapsed
+
+    async def run(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on the pool, or raise Saturated right away if it's full."""
+        if not self._admit():
+            raise Saturated(self.retry_after())
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, self._call, functools.partial(fn, *args, **kwargs))
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
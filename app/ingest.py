@@ -0,0 +1,184 @@
+"""
+Build the song catalog from a directory of audio files.
+
+    python -m app.ingest SONG_DIR [--workers N] [--catalog song_catalog.json]
+
+Every file is separated (Demucs) and transcribed (Wav2Vec2, with word
+timestamps) in a process pool. Each finished file is checkpointed on its
+own, so an interrupted run picks up where it stopped; the catalog the API
+serves is rebuilt from all checkpoints at the end.
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from app import config
+from app.catalog import read_catalog, write_catalog
+
+AUDIO_EXTENSIONS = {".mp3", ".wav", ".flac", ".m4a", ".ogg", ".opus", ".webm", ".aac"}
+
+# Rough resident size of one worker (Demucs + Wav2Vec2-large + activations)
+WORKER_MEMORY_BYTES = 3 * 1024 ** 3
+
+
+def song_name(path):
+    """Catalog key from a file name: "Imagine Dragons - Thunder.mp3" -> "imagine_dragons_thunder"."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    # \w keeps non-Latin letters, so "हनुमान चालीसा" doesn't collapse to "song"
+    return re.sub(r"\W+", "_", stem.lower(), flags=re.UNICODE).strip("_") or "song"
+
+
+def file_key(path):
+    """Identifies one version of a file without reading it."""
+    stat = os.stat(path)
+    raw = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def find_audio(directory):
+    paths = []
+    for root, _dirs, files in os.walk(directory):
+        for name in files:
+            if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def default_workers():
+    """As many workers as both the cores and the RAM allow."""
+    cpus = os.cpu_count() or 1
+    by_cpu = max(cpus // 2, 1)
+    try:
+        memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+        return max(min(by_cpu, memory // WORKER_MEMORY_BYTES), 1)
+    except (ValueError, OSError, AttributeError):
+        return by_cpu
+
+
+def checkpoint_path(checkpoint_dir, key):
+    return os.path.join(checkpoint_dir, f"{key}.json")
+
+
+def _init_worker(threads):
+    # Split the cores between workers instead of every process using all of them
+    os.environ["SEPARATION_THREADS"] = str(threads)
+    config.SEPARATION_THREADS = threads
+    import torch
+    torch.set_num_threads(threads)
+
+
+def process_file(path, key, checkpoint_dir):
+    """Separate and transcribe one file, then checkpoint the result (runs in a worker)."""
+    from vocal_transcriber import VocalTranscriber
+
+    transcriber = VocalTranscriber()
+    # Tracks already in the stem cache skip separation (and transcription)
+    result, stages = transcriber.transcribe_file(path)
+
+    entry = {
+        "song": song_name(path),
+        "source": os.path.abspath(path),
+        "duration_s": result["duration_s"],
+        "words": [w["word"] for w in result["words"]],
+        "timings": result["words"],
+        "stages": {name: round(seconds, 3) for name, seconds in stages.items()},
+    }
+    target = checkpoint_path(checkpoint_dir, key)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+    os.replace(tmp, target)
+    return entry
+
+
+def build_catalog(checkpoint_dir, keys, catalog_path):
+    """Merge the checkpoints of the current files into the catalog, keeping other songs."""
+    songs = dict(read_catalog(catalog_path))
+    for key in keys:
+        try:
+            with open(checkpoint_path(checkpoint_dir, key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            continue
+        name = entry["song"]
+        held = songs.get(name)
+        if held is not None and held.get("source") != entry["source"]:
+            # Another file has the same name ("Thunder.mp3" and "thunder.wav"); keep both
+            name = f"{name}_{key[:8]}"
+            print(f"{entry['song']} is already {held.get('source')}; adding {entry['source']} as {name}")
+        songs[name] = {k: entry[k] for k in ("words", "timings", "source", "duration_s")}
+    write_catalog(songs, catalog_path)
+    return songs
+
+
+def ingest(directory, workers=None, catalog_path=None, checkpoint_dir=None):
+    catalog_path = catalog_path or config.CATALOG_PATH
+    checkpoint_dir = checkpoint_dir or config.INGEST_CHECKPOINT_DIR
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    workers = workers or config.INGEST_WORKERS or default_workers()
+    threads = config.SEPARATION_THREADS or max((os.cpu_count() or 1) // workers, 1)
+
+    files = {path: file_key(path) for path in find_audio(directory)}
+    todo = [path for path, key in files.items() if not os.path.exists(checkpoint_path(checkpoint_dir, key))]
+    print(f"{len(files)} files, {len(files) - len(todo)} already done, {len(todo)} to process on {workers} workers")
+
+    stage_totals = {}
+    audio_seconds = 0.0
+    failures = {}
+    start = time.perf_counter()
+    # spawn: torch and forked OpenMP thread pools don't mix
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker, initargs=(threads,)) as pool:
+        futures = {pool.submit(process_file, path, files[path], checkpoint_dir): path for path in todo}
+        for done, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                failures[path] = str(e)
+                print(f"[{done}/{len(todo)}] FAILED {path}: {e}")
+                continue
+            audio_seconds += entry["duration_s"]
+            for stage, seconds in entry["stages"].items():
+                stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+            print(f"[{done}/{len(todo)}] {entry['song']}: {len(entry['words'])} words")
+    wall = time.perf_counter() - start
+
+    songs = build_catalog(checkpoint_dir, files.values(), catalog_path)
+    processed = len(todo) - len(failures)
+    return {
+        "catalog": catalog_path,
+        "songs_in_catalog": len(songs),
+        "processed": processed,
+        "skipped": len(files) - len(todo),
+        "failed": failures,
+        "workers": workers,
+        "threads_per_worker": threads,
+        "wall_s": round(wall, 1),
+        "files_per_hour": round(processed / wall * 3600, 1) if processed else 0.0,
+        "audio_hours_per_hour": round(audio_seconds / wall, 2) if processed else 0.0,
+        # Summed across workers, so these add up to more than wall_s with several workers
+        "stage_seconds": {stage: round(total, 1) for stage, total in stage_totals.items()},
+        "stage_mean_s": {stage: round(total / processed, 2) for stage, total in stage_totals.items()} if processed else {},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directory")
+    parser.add_argument("--workers", type=int, default=None, help="default: sized to cores and RAM")
+    parser.add_argument("--catalog", default=None, help=f"default: {config.CATALOG_PATH}")
+    parser.add_argument("--checkpoints", default=None, help=f"default: {config.INGEST_CHECKPOINT_DIR}")
+    args = parser.parse_args()
+
+    report = ingest(args.directory, args.workers, args.catalog, args.checkpoints)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from app.scoring import normalize_text
+
+VOWELS = set("AEIOU")
+# Consonant letters by voicing; metaphone codes D and T (and Z and S) alike
+VOICED = set("bdgjvz")
+UNVOICED = set("cfkpqstx")
+
+# Learners (and Whisper) say single letters by name: "I" -> "eye", "u" -> "you"
+LETTER_NAMES = {
+    "a": "ay", "b": "bee", "c": "see", "d": "dee", "e": "ee", "f": "ef", "g": "gee",
+    "h": "aitch", "i": "eye", "j": "jay", "k": "kay", "l": "el", "m": "em", "n": "en",
+    "o": "oh", "p": "pee", "q": "cue", "r": "are", "s": "ess", "t": "tee", "u": "you",
+    "v": "vee", "w": "doubleyou", "x": "ex", "y": "why", "z": "zee",
+}
+
+PhoneticMatch = namedtuple("PhoneticMatch", ["best_match", "best_score", "expected_score", "sounds_like"])
+
+
+def spoken_form(word):
+    """Lowercase letters only, with single letters spelled out as they are said."""
+    word = "".join(ch for ch in word.lower() if "a" <= ch <= "z")
+    return LETTER_NAMES.get(word, word)
+
+
+def metaphone(word):
+    """Metaphone code (after Lawrence Philips' rules, slightly simplified)."""
+    word = spoken_form(word).upper()
+    if not word:
+        return ""
+    if word[:2] in ("AE", "GN", "KN", "PN", "WR"):
+        word = word[1:]
+    elif word[0] == "X":
+        word = "S" + word[1:]
+    elif word[:2] == "WH":
+        word = "W" + word[2:]
+
+    code = []
+    n = len(word)
+    for i, ch in enumerate(word):
+        prev = word[i - 1] if i > 0 else ""
+        nxt = word[i + 1] if i + 1 < n else ""
+        nxt2 = word[i + 2] if i + 2 < n else ""
+        if ch == prev and ch != "C":
+            continue
+        if ch in VOWELS:
+            # Every leading vowel sounds alike enough: "eye" and "I" both start "A"
+            if i == 0:
+                code.append("A")
+        elif ch == "B":
+            if not (i == n - 1 and prev == "M"):
+                code.append("B")
+        elif ch == "C":
+            if nxt == "H":
+                code.append("K" if prev == "S" else "X")
+            elif nxt == "I" and nxt2 == "A":
+                code.append("X")
+            elif nxt in ("I", "E", "Y"):
+                if prev != "S":
+                    code.append("S")
+            else:
+                code.append("K")
+        elif ch == "D":
+            code.append("J" if nxt == "G" and nxt2 in ("E", "I", "Y") else "T")
+        elif ch == "G":
+            if nxt == "H" and nxt2 not in VOWELS:
+                continue
+            if nxt == "N" and (i + 2 == n or word[i + 1:] == "NED"):
+                continue
+            code.append("J" if nxt in ("I", "E", "Y") and prev != "G" else "K")
+        elif ch == "H":
+            if prev in ("C", "S", "P", "T", "G") or (prev in VOWELS and nxt not in VOWELS):
+                continue
+            code.append("H")
+        elif ch == "K":
+            if prev != "C":
+                code.append("K")
+        elif ch == "P":
+            code.append("F" if nxt == "H" else "P")
+        elif ch == "Q":
+            code.append("K")
+        elif ch == "S":
+            code.append("X" if nxt == "H" or (nxt == "I" and nxt2 in ("O", "A")) else "S")
+        elif ch == "T":
+            if nxt == "I" and nxt2 in ("O", "A"):
+                code.append("X")
+            elif nxt == "H":
+                code.append("0")
+            elif not (nxt == "C" and nxt2 == "H"):
+                code.append("T")
+        elif ch == "V":
+            code.append("F")
+        elif ch in ("W", "Y"):
+            if nxt in VOWELS:
+                code.append(ch)
+        elif ch == "X":
+            code.append("KS")
+        elif ch == "Z":
+            code.append("S")
+        else:
+            code.append(ch)
+    return "".join(code)
+
+
+@lru_cache(maxsize=4096)
+def sound_key(word):
+    """
+    What must agree for two spellings to be the same word said aloud: the
+    metaphone code, plus what metaphone throws away - the vowels (first
+    letter of each run) and whether each consonant is voiced. "eye"/"I" and
+    "roe"/"row" share a key; "town"/"down", "tee"/"dee" and "zee"/"see" don't.
+    """
+    spoken = spoken_form(word)
+    vowels = "".join(run[0] for run in re.findall("[aeiou]+", spoken))
+    voicing = "".join("+" if ch in VOICED else "-" for ch in spoken if ch in VOICED or ch in UNVOICED)
+    return metaphone(word), vowels, voicing
+
+
+def sounds_like(expected_word, recognized_text):
+    """
+    Whether the whole transcription is expected_word in another spelling
+    ("eye" for "I", "see" for "C"). Split words count joined ("sun shine"),
+    but a phrase that merely contains the word ("little star") does not.
+    """
+    if not spoken_form(expected_word):
+        return False
+    joined = normalize_text(recognized_text).replace(" ", "")
+    return bool(joined) and sound_key(joined) == sound_key(expected_word)
+
+
+class _Features:
+    """Unigram + bigram counts over a fixed alphabet, with ^/$ word boundaries."""
+
+    def __init__(self, alphabet):
+        self.alphabet = "^$" + alphabet
+        self.index = {ch: i for i, ch in enumerate(self.alphabet)}
+        size = len(self.alphabet)
+        self.dim = size + size * size
+
+    def vector(self, text):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        if not text:
+            return vec
+        symbols = [self.index[ch] for ch in text if ch in self.index]
+        size = len(self.alphabet)
+        for s in symbols:
+            vec[s] += 1
+        padded = [0] + symbols + [1]
+        for a, b in zip(padded, padded[1:]):
+            vec[size + a * size + b] += 1
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+
+_PHONETIC = _Features("0ABFHJKLMNPRSTWXY")
+_SPELLING = _Features("abcdefghijklmnopqrstuvwxyz")
+# Weight of sound vs. spelling in the combined score; spelling breaks ties
+# between words metaphone collapses together ("a"/"e"/"oh" all code to "A")
+PHONETIC_WEIGHT = 0.7
+
+
+@lru_cache(maxsize=4096)
+def word_vector(word):
+    """
+    Unit-scaled features of one word. The dot product of two word vectors is
+    PHONETIC_WEIGHT * cosine(metaphone codes) + (1 - PHONETIC_WEIGHT) * cosine(spellings).
+    Cached, since learners keep saying the same few words; don't modify the result.
+    """
+    vec = np.concatenate([
+        _PHONETIC.vector(metaphone(word)) * np.float32(np.sqrt(PHONETIC_WEIGHT)),
+        _SPELLING.vector(spoken_form(word)) * np.float32(np.sqrt(1 - PHONETIC_WEIGHT)),
+    ])
+    vec.flags.writeable = False
+    return vec
+
+
+class PhoneticIndex:
+    """
+    Every word of a song, encoded once into a (words x features) matrix.
+
+    match() scores a recognised utterance against all of them with one
+    matrix product, giving the expected word's score and the best match.
+    """
+
+    def __init__(self, words):
+        self.words = list(dict.fromkeys(word.lower() for word in words))
+        self.positions = {word: i for i, word in enumerate(self.words)}
+        self.matrix = np.stack([word_vector(word) for word in self.words]) if self.words else np.zeros((0, 1), np.float32)
+
+    def match(self, recognized_text, expected_word=None):
+        tokens = normalize_text(recognized_text).split()
+        if not tokens or not self.words:
+            return PhoneticMatch(None, 0.0, 0.0, False)
+        if len(tokens) > 1:
+            # Whisper sometimes splits one word ("eye" -> "i e"); also try them joined
+            tokens.append("".join(tokens))
+        queries = np.stack([word_vector(token) for token in tokens])
+        scores = (queries @ self.matrix.T).max(axis=0)
+
+        best = int(np.argmax(scores))
+        expected_score, alike = 0.0, False
+        if expected_word is not None:
+            alike = sounds_like(expected_word, recognized_text)
+            position = self.positions.get(expected_word.lower())
+            if position is not None:
+                expected_score = float(scores[position])
+            else:
+                expected_score = float((queries @ word_vector(expected_word)).max())
+        return PhoneticMatch(self.words[best], round(float(scores[best]), 4), round(expected_score, 4), alike)
+
+
+def build_song_indexes(songs):
+    """{song: PhoneticIndex} for a catalog, built once at load time."""
+    return {song: PhoneticIndex(words) for song, words in songs.items()}
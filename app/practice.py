@@ -0,0 +1,268 @@
+import asyncio
+import functools
+import json
+import time
+import uuid
+from collections import Counter, deque
+
+from app import config
+from app.executor import Saturated
+
+TERMINAL_STATES = ("completed", "cancelled", "expired", "failed")
+# Headers for a Server-Sent Events response that proxies must not buffer
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+# Verify errors in a row (undecodable audio, model failures) before a practice gives up
+MAX_CONSECUTIVE_ERRORS = 3
+
+
+class PracticeLimit(Exception):
+    """PRACTICE_MAX_COUNT practices are already running in this process."""
+
+
+class Practice:
+    """
+    One learner working through a song, as a small state machine:
+
+        prompting -> listening -> verifying -> prompting ... -> completed
+
+    Each transition and verdict is appended to an event log that any number
+    of Server-Sent Events streams read from, and can resume with Last-Event-ID.
+    """
+
+    def __init__(self, practice_id, session_id, song_name, words, phrase=False, position=0):
+        self.practice_id = practice_id
+        self.session_id = session_id
+        self.song_name = song_name
+        self.words = words
+        self.phrase = phrase
+        self.position = position
+        self.state = "created"
+        self.attempts = 0
+        self.last_active = time.monotonic()
+        self.task = None
+        self._events = deque(maxlen=config.PRACTICE_EVENT_HISTORY)  # (id, event, data)
+        self._last_id = 0
+        self._changed = asyncio.Event()
+        self._utterances = asyncio.Queue(maxsize=1)
+
+    @property
+    def done(self):
+        return self.state in TERMINAL_STATES
+
+    def expected(self):
+        """The lyrics this attempt is for: the next word, or the next line in phrase mode."""
+        if self.phrase:
+            return self.words[self.position:self.position + config.PHRASE_MAX_WORDS]
+        return self.words[self.position:self.position + 1]
+
+    def snapshot(self):
+        return {
+            "practice_id": self.practice_id,
+            "session_id": self.session_id,
+            "song": self.song_name,
+            "state": self.state,
+            "position": self.position,
+            "total_words": len(self.words),
+            "attempts": self.attempts,
+            "phrase": self.phrase,
+            "last_event_id": self._last_id,
+        }
+
+    def publish(self, event, **data):
+        self._last_id += 1
+        self._events.append((self._last_id, event, dict(data, practice_id=self.practice_id)))
+        # Wake every stream waiting on this practice, then start a fresh wait
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def transition(self, state, **data):
+        self.state = state
+        self.publish("state", state=state, position=self.position, total_words=len(self.words), **data)
+
+    def submit(self, utterance):
+        """Hand over a client-recorded attempt; False unless the practice is waiting for one."""
+        if self.state not in ("prompting", "listening") or self._utterances.full():
+            return False
+        self._utterances.put_nowait(utterance)
+        self.last_active = time.monotonic()
+        return True
+
+    async def next_utterance(self, timeout):
+        return await asyncio.wait_for(self._utterances.get(), timeout)
+
+    async def events(self, last_event_id=0, keepalive=None):
+        """
+        Yield (id, event, data) for every event after last_event_id as it is
+        published, and None after `keepalive` quiet seconds. Ends after the
+        final event of a finished practice.
+        """
+        keepalive = keepalive or config.PRACTICE_KEEPALIVE_S
+        while True:
+            changed = self._changed
+            for event in list(self._events):
+                if event[0] > last_event_id:
+                    last_event_id = event[0]
+                    yield event
+            if self.done:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), keepalive)
+            except asyncio.TimeoutError:
+                yield None
+
+
+async def event_stream(practice, last_event_id=0):
+    """A practice's events in the text/event-stream wire format."""
+    async for item in practice.events(last_event_id):
+        if item is None:
+            yield ": keepalive\n\n"
+            continue
+        event_id, event, data = item
+        yield f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class PracticeScheduler:
+    """
+    Runs every practice in the process as an asyncio task on the event loop.
+
+    A practice holds a thread only while there is real work to do. TTS and
+    server microphone capture run on the default executor. Verification runs
+    on the shared InferenceExecutor, at most one practice per pool worker at
+    a time. While it waits for the learner, a practice is a suspended
+    coroutine, so one process can host thousands. Progress is kept in the
+    state backend, in the same sessions /verify uses; its calls run on the
+    default executor too, since the SQLite backend blocks.
+
+    The practices themselves live in this process only. With several
+    workers, a practice's requests must reach the worker that started it.
+
+    verify(practice, utterance, expected_words) returns a verdict and runs on
+    the executor. speak(text) is optional and reads the prompt aloud on the
+    server. listen() is optional too: it captures an utterance from the
+    server microphone. Without it, clients submit() their recordings.
+    """
+
+    def __init__(self, state, executor, verify, speak=None, listen=None,
+                 max_practices=None, audio_timeout=None, retain=None):
+        self.state = state
+        self.executor = executor
+        self.verify = verify
+        self.speak = speak
+        self.listen = listen
+        self.max_practices = max_practices or config.PRACTICE_MAX_COUNT
+        self.audio_timeout = audio_timeout or config.PRACTICE_AUDIO_TIMEOUT_S
+        self.retain = config.PRACTICE_RETAIN_S if retain is None else retain
+        self._practices = {}
+        self._active = 0
+        # Practices wait their turn here, in order, rather than polling a full
+        # pool; sized to its workers so the queue stays free for /verify requests
+        self._verify_slots = asyncio.Semaphore(executor.max_workers)
+
+    def __len__(self):
+        return len(self._practices)
+
+    def get(self, practice_id):
+        return self._practices.get(practice_id)
+
+    def stats(self):
+        states = Counter(practice.state for practice in self._practices.values())
+        return {"active": self._active, "max_practices": self.max_practices, "states": dict(states)}
+
+    async def start(self, song_name, words, phrase=False, session_id=None):
+        """Start practising song_name (from session_id's position, or a new session)."""
+        if self._active >= self.max_practices:
+            raise PracticeLimit(f"{self._active} practices already running")
+        # Count it before the state calls, so concurrent starts can't overshoot the limit
+        self._active += 1
+        loop = asyncio.get_running_loop()
+        try:
+            # The state backend blocks (SQLite), so it runs off the event loop
+            session_id = session_id or await loop.run_in_executor(None, self.state.create, song_name)
+            session = await loop.run_in_executor(None, self.state.get, session_id)
+        except BaseException:
+            self._active -= 1
+            raise
+        position = session.current_position if session is not None else 0
+        practice = Practice(f"practice_{uuid.uuid4().hex}", session_id, song_name, words, phrase, position)
+        self._practices[practice.practice_id] = practice
+        practice.task = loop.create_task(self._run(practice))
+        return practice
+
+    def cancel(self, practice_id):
+        practice = self._practices.get(practice_id)
+        if practice is None or practice.done:
+            return False
+        practice.task.cancel()
+        return True
+
+    async def shutdown(self):
+        tasks = [practice.task for practice in self._practices.values() if not practice.done]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, practice):
+        try:
+            await self._drive(practice)
+        except asyncio.CancelledError:
+            practice.transition("cancelled")
+        except asyncio.TimeoutError:
+            practice.transition("expired", detail=f"No attempt for {self.audio_timeout:g}s")
+        except Exception as e:
+            practice.transition("failed", detail=str(e))
+        finally:
+            self._active -= 1
+            # Keep the finished practice around briefly so late streams still get its last events
+            asyncio.get_running_loop().call_later(self.retain, self._practices.pop, practice.practice_id, None)
+
+    async def _drive(self, practice):
+        loop = asyncio.get_running_loop()
+        total = len(practice.words)
+        errors = 0
+        while practice.position < total:
+            expected = practice.expected()
+            practice.transition("prompting", words=expected)
+            if self.speak is not None:
+                await loop.run_in_executor(None, self.speak, " ".join(expected))
+
+            practice.transition("listening", words=expected)
+            if self.listen is not None:
+                utterance = await loop.run_in_executor(None, self.listen)
+            else:
+                utterance = await practice.next_utterance(self.audio_timeout)
+
+            practice.transition("verifying", words=expected)
+            try:
+                verdict = await self._verify(practice, utterance, expected)
+            except Exception as e:
+                errors += 1
+                if errors >= MAX_CONSECUTIVE_ERRORS:
+                    raise
+                practice.publish("error", detail=str(e))
+                continue
+            errors = 0
+            practice.attempts += 1
+
+            if verdict["correct"]:
+                # A sung phrase moves past its whole correct prefix; another
+                # client on the same session may have moved it meanwhile
+                steps = verdict.get("correct_prefix", 1)
+                updated = await loop.run_in_executor(None, functools.partial(
+                    self.state.advance, practice.session_id, total, expected_position=practice.position, steps=steps,
+                ))
+                current = updated or await loop.run_in_executor(None, self.state.get, practice.session_id)
+                if current is None:
+                    raise RuntimeError("Session expired")
+                practice.position = total if current.completed else current.current_position
+            practice.publish("verdict", expected=expected, position=practice.position, total_words=total, **verdict)
+        practice.transition("completed", attempts=practice.attempts)
+
+    async def _verify(self, practice, utterance, expected):
+        while True:
+            try:
+                async with self._verify_slots:
+                    return await self.executor.run(self.verify, practice, utterance, expected)
+            except Saturated as e:
+                # Wait for the pool instead of failing the learner's attempt
+                practice.publish("busy", retry_after=e.retry_after)
+                await asyncio.sleep(e.retry_after)
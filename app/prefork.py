@@ -0,0 +1,192 @@
+"""
+Preload-and-fork serving: load the model weights once, then fork the workers.
+
+    python -m app.prefork main:app --workers 4 --port 8000 [--models whisper,demucs,wav2vec2] [--shared-memory]
+
+`uvicorn --workers N` starts N fresh interpreters that each load their own
+Whisper (and Demucs and Wav2Vec2), so a box holds N copies of the weights.
+Here the parent loads PREFORK_MODELS into the registry and imports the app.
+It then forks the workers, which inherit the loaded models. The weight pages
+stay shared copy-on-write. With --shared-memory they move into torch shared
+memory first, so they stay shared even if something writes to them. Anything
+that holds threads or mutable inference state is built per worker, after the
+fork: the batching transcriber, TTS engine, inference pool and caches.
+STATE_BACKEND=sqlite is needed for sessions, as with --workers. Practices
+(/practice) stay in the worker that started them, so they need sticky routing.
+"""
+import argparse
+import gc
+import importlib
+import itertools
+import os
+import signal
+import sys
+import time
+import traceback
+
+from app import config
+from app.registry import registry
+
+# Models that are only weights. "transcriber" and "tts" start threads, so
+# every worker builds its own after the fork.
+WEIGHT_MODELS = ("whisper", "demucs", "wav2vec2")
+
+
+def share_weights(model):
+    """Move the parameters and buffers of a model (or (processor, model) pair) into shared memory."""
+    import torch
+
+    # Tensor by tensor rather than Module.share_memory(), which fails on sparse
+    # buffers (Whisper's alignment_heads); those and int8 packed weights
+    # (MODEL_QUANTIZATION) stay shared copy-on-write
+    for part in model if isinstance(model, tuple) else (model,):
+        if isinstance(part, torch.nn.Module):
+            for tensor in itertools.chain(part.parameters(), part.buffers()):
+                if not tensor.is_sparse:
+                    tensor.share_memory_()
+
+
+def preload(names=None, shared_memory=None):
+    """Load the weight models in this process, ready to be inherited by forked workers."""
+    names = list(names if names is not None else config.PREFORK_MODELS)
+    shared_memory = config.PREFORK_SHARED_MEMORY if shared_memory is None else shared_memory
+    if names:
+        import torch
+
+        from app.cpu_profile import configure_torch
+
+        # Load on one intra-op thread, so no OpenMP pool exists to be broken
+        # by the fork (the reason app.ingest uses spawn); init_worker sizes
+        # each worker's pool afterwards
+        configure_torch()
+        torch.set_num_threads(1)
+    for name in names:
+        if name not in WEIGHT_MODELS:
+            raise ValueError(f"Can't preload {name}: only {', '.join(WEIGHT_MODELS)} can be shared between workers")
+        model = registry.get(name)
+        if shared_memory:
+            share_weights(model)
+
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_initialized():
+        raise RuntimeError("Models were loaded onto the GPU; CUDA can't cross a fork, run one worker per GPU instead")
+
+
+def freeze():
+    """
+    Move everything allocated so far out of the garbage collector's reach, so
+    workers don't copy the parent's pages by rewriting GC headers during
+    collections. Call last thing before forking.
+    """
+    gc.collect()
+    gc.freeze()
+
+
+def init_worker(workers):
+    """Per-worker setup after the fork: TORCH_THREADS intra-op threads, or an equal share of the cores."""
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(config.TORCH_THREADS or max((os.cpu_count() or 1) // workers, 1))
+
+
+def fork_worker(target, *args):
+    """Run target(*args) in a forked child; returns its pid."""
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            target(*args)
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def process_memory(pid="self"):
+    """
+    Resident (RSS) and proportional (PSS) set size of a process in MiB. PSS
+    splits each shared page between the processes mapping it, so summing it
+    over the workers gives the box's real memory use. Linux only.
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+    except OSError:
+        return {}
+    shared = fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)
+    return {
+        "rss_mb": round(fields.get("Rss", 0) / 1024, 1),
+        "pss_mb": round(fields.get("Pss", 0) / 1024, 1),
+        "shared_mb": round(shared / 1024, 1),
+    }
+
+
+def serve(app_path, host="127.0.0.1", port=8000, workers=1, models=None, shared_memory=None):
+    import uvicorn
+
+    preload(models, shared_memory)
+    # Import the app in the parent as well, so songs, phonetic indexes and the
+    # rest of its module-level state are shared too
+    module_name, _, attr = app_path.partition(":")
+    app = getattr(importlib.import_module(module_name), attr or "app")
+    uvicorn_config = uvicorn.Config(app, host=host, port=port)
+    sock = uvicorn_config.bind_socket()
+    freeze()
+
+    def run_worker():
+        # Restarted workers are forked after the supervisor's handlers went in
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        init_worker(workers)
+        uvicorn.Server(uvicorn_config).run(sockets=[sock])
+
+    children = {fork_worker(run_worker) for _ in range(workers)}
+    print(f"Serving {app_path} on {host}:{port} with {workers} forked workers: {sorted(children)}")
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            # Replace the worker from the parent, which still holds the loaded weights
+            print(f"Worker {pid} exited with status {status}, restarting")
+            time.sleep(1)
+            children.add(fork_worker(run_worker))
+    sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the models once and fork uvicorn workers that share them.")
+    parser.add_argument("app", help="module:attribute, e.g. main:app")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--models", help=f"comma-separated, default PREFORK_MODELS ({','.join(config.PREFORK_MODELS)})")
+    parser.add_argument("--shared-memory", action="store_true", help="move the weights into torch shared memory")
+    args = parser.parse_args()
+    models = [name for name in args.models.split(",") if name] if args.models is not None else None
+    serve(args.app, args.host, args.port, args.workers, models, args.shared_memory or None)
+
+
+if __name__ == "__main__":
+    main()
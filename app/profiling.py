@@ -0,0 +1,44 @@
+import cProfile
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from app import config
+
+# Only one cProfile profiler can be active per process on newer Pythons;
+# requests that arrive while one is running just aren't profiled
+_active = threading.Lock()
+
+
+@contextmanager
+def profile_if_slow(label, threshold_ms=None, profile_dir=None):
+    """
+    Profile the enclosed block with cProfile and keep the trace only if it
+    took longer than threshold_ms (PROFILE_THRESHOLD_MS; 0 turns this off).
+
+    Traces land in PROFILE_DIR as <time>_<label>_<ms>ms.prof; open them with
+    `python -m pstats` or snakeviz. Only the calling thread is profiled, so
+    time spent waiting on the Whisper worker shows up as the wait itself.
+    """
+    threshold_ms = config.PROFILE_THRESHOLD_MS if threshold_ms is None else threshold_ms
+    if threshold_ms <= 0 or not _active.acquire(blocking=False):
+        yield
+        return
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    try:
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+    finally:
+        _active.release()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms > threshold_ms:
+            profile_dir = profile_dir or config.PROFILE_DIR
+            os.makedirs(profile_dir, exist_ok=True)
+            name = re.sub(r"[^A-Za-z0-9_.-]+", "_", label)
+            profiler.dump_stats(os.path.join(profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_{name}_{elapsed_ms:.0f}ms.prof"))
@@ -0,0 +1,130 @@
+import threading
+import time
+
+from app import config
+
+
+class ModelRegistry:
+    """
+    One shared instance per model for every module in the process.
+
+    Models are registered with a loader and built on first use (or by
+    warmup() in the background), so importing an app module no longer pays
+    for loading Whisper, Demucs or Wav2Vec2.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._status = {}  # name -> {"state": ..., "load_seconds": ..., "error": ...}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader):
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks[name] = threading.Lock()
+            self._status[name] = {"state": "not_loaded"}
+
+    def get(self, name):
+        """Return the model, loading it now if nobody has yet."""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        if name not in self._loaders:
+            raise KeyError(f"Unknown model: {name}")
+
+        with self._locks[name]:
+            # Another thread may have finished loading while we waited
+            model = self._models.get(name)
+            if model is not None:
+                return model
+            self._status[name] = {"state": "loading"}
+            start = time.perf_counter()
+            try:
+                model = self._loaders[name]()
+            except Exception as e:
+                self._status[name] = {"state": "failed", "error": str(e)}
+                raise
+            self._status[name] = {"state": "ready", "load_seconds": round(time.perf_counter() - start, 3)}
+            self._models[name] = model
+            return model
+
+    def proxy(self, name):
+        """A stand-in that loads the model on first attribute access."""
+        return LazyModel(self, name)
+
+    def is_ready(self, name):
+        return name in self._models
+
+    def status(self):
+        return {name: dict(status) for name, status in self._status.items()}
+
+    def warmup(self, names=None):
+        """Load models in a background thread; failures are recorded in status()."""
+        names = list(names if names is not None else config.WARMUP_MODELS)
+
+        def load_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"Warmup of {name} failed: {e}")
+
+        thread = threading.Thread(target=load_all, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+
+class LazyModel:
+    def __init__(self, registry, name):
+        self._registry = registry
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._registry.get(self._name), attr)
+
+
+def _load_whisper():
+    import whisper
+    from app.cpu_profile import configure_torch, prepare_model
+    configure_torch()
+    return prepare_model(whisper.load_model(config.WHISPER_MODEL))
+
+
+def _load_transcriber():
+    from app.batching import BatchTranscriber
+    return BatchTranscriber(registry.get("whisper"))
+
+
+def _load_tts():
+    from app.tts import SpeechSynthesizer
+    return SpeechSynthesizer()
+
+
+def _load_demucs():
+    import torch
+    from torch import hub
+    from app.cpu_profile import configure_torch
+    configure_torch()
+    separator = hub.load("facebookresearch/demucs", config.DEMUCS_MODEL)
+    if torch.cuda.is_available():
+        separator.cuda()
+    return separator
+
+
+def _load_wav2vec2():
+    from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
+    from app.cpu_profile import configure_torch, prepare_model
+    configure_torch()
+    processor = Wav2Vec2Processor.from_pretrained(config.WAV2VEC2_MODEL)
+    model = prepare_model(Wav2Vec2ForCTC.from_pretrained(config.WAV2VEC2_MODEL))
+    return processor, model
+
+
+registry = ModelRegistry()
+registry.register("whisper", _load_whisper)
+registry.register("transcriber", _load_transcriber)
+registry.register("tts", _load_tts)
+registry.register("demucs", _load_demucs)
+registry.register("wav2vec2", _load_wav2vec2)
@@ -0,0 +1,209 @@
+"""
+Async client for the remote ASR services (Deepgram, AssemblyAI) for
+transcribing many files.
+
+    python -m app.remote_asr AUDIO_DIR [--provider deepgram] [--concurrency 8] [--output transcripts.json]
+
+One pooled httpx session is shared by every request, at most
+REMOTE_ASR_MAX_CONCURRENCY files are in flight at once, uploads are streamed
+from disk, and rate limits (429), 5xx responses and dropped connections are
+retried with jittered exponential backoff.
+"""
+import argparse
+import asyncio
+import json
+import mimetypes
+import os
+import random
+import time
+
+import httpx
+
+from app import config
+from app.asr import assemblyai_transcript, deepgram_transcript
+from app.audio import SAMPLE_RATE, encode_wav
+from app.ingest import find_audio
+
+UPLOAD_CHUNK_BYTES = 1 << 20
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Timeouts, dropped connections and the like; not malformed requests
+RETRY_ERRORS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+
+
+class RemoteASRError(Exception):
+    """A remote ASR request failed for good (a 4xx, or retries used up)."""
+
+
+def backoff_delay(attempt, base=None, cap=None):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    base = config.REMOTE_ASR_BACKOFF_S if base is None else base
+    cap = config.REMOTE_ASR_BACKOFF_MAX_S if cap is None else cap
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+async def _file_chunks(path, chunk_bytes=UPLOAD_CHUNK_BYTES):
+    """The file's bytes, a chunk at a time, read off the event loop."""
+    with open(path, "rb") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, chunk_bytes)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _content_type(path):
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+class RemoteASRClient:
+    """
+    Transcribe files or buffers with Deepgram or AssemblyAI.
+
+    Use it as an async context manager (or call aclose()) so the pooled
+    connections are released. stats counts requests, retries and 429s.
+    """
+
+    def __init__(self, provider="deepgram", api_key=None, base_url=None, max_concurrency=None,
+                 max_retries=None, timeout=None, poll_interval=None):
+        if provider not in ("deepgram", "assemblyai"):
+            raise ValueError(f"Unknown remote ASR provider: {provider}")
+        self.provider = provider
+        if provider == "deepgram":
+            self.api_key = api_key or config.DEEPGRAM_API_KEY
+            self.base_url = (base_url or config.DEEPGRAM_URL).rstrip("/")
+            self.auth = {"Authorization": f"Token {self.api_key}"}
+        else:
+            self.api_key = api_key or config.ASSEMBLYAI_API_KEY
+            self.base_url = (base_url or config.ASSEMBLYAI_URL).rstrip("/")
+            self.auth = {"authorization": self.api_key}
+        self.max_concurrency = max_concurrency or config.REMOTE_ASR_MAX_CONCURRENCY
+        self.max_retries = config.REMOTE_ASR_MAX_RETRIES if max_retries is None else max_retries
+        self.poll_interval = poll_interval if poll_interval is not None else config.ASSEMBLYAI_POLL_INTERVAL_S
+        self.timeout = timeout or config.REMOTE_ASR_TIMEOUT_S
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        # AssemblyAI polls alongside uploads, so leave the pool some headroom
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.auth,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_concurrency * 2, max_keepalive_connections=self.max_concurrency),
+        )
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    async def _request(self, method, path, body=None, **kwargs):
+        """
+        Send one request, retrying 429s, 5xx and connection errors.
+
+        body is a zero-argument callable returning the content, so a
+        streamed upload starts again from the top on every attempt.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.stats["requests"] += 1
+            try:
+                response = await self._http.request(method, path, content=body() if body else None, **kwargs)
+            except RETRY_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise RemoteASRError(f"{method} {path} failed: {e}") from e
+                self.stats["retries"] += 1
+                await asyncio.sleep(backoff_delay(attempt))
+                continue
+
+            if response.status_code < 400:
+                return response.json()
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                raise RemoteASRError(f"{method} {path} returned {response.status_code}: {response.text[:200]}")
+            if response.status_code == 429:
+                self.stats["rate_limited"] += 1
+            self.stats["retries"] += 1
+            # Honour the server's Retry-After, jittered so clients don't come back in lockstep
+            delay = backoff_delay(attempt)
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    delay = float(retry_after) + random.uniform(0, config.REMOTE_ASR_BACKOFF_S)
+                except ValueError:
+                    pass
+            await asyncio.sleep(delay)
+
+    async def _transcribe(self, body, content_type, size):
+        headers = {"Content-Type": content_type, "Content-Length": str(size)}
+        if self.provider == "deepgram":
+            response = await self._request(
+                "POST", "/v1/listen", body, headers=headers,
+                params={"model": "nova", "language": config.WHISPER_LANGUAGE},
+            )
+            return deepgram_transcript(response)
+
+        upload = await self._request("POST", "/v2/upload", body, headers=dict(headers, **{"Content-Type": "application/octet-stream"}))
+        job = await self._request("POST", "/v2/transcript", json={"audio_url": upload["upload_url"]})
+        deadline = time.monotonic() + self.timeout
+        while job["status"] not in ("completed", "error"):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"AssemblyAI transcript {job['id']} not ready")
+            await asyncio.sleep(self.poll_interval)
+            job = await self._request("GET", f"/v2/transcript/{job['id']}")
+        return assemblyai_transcript(job)
+
+    async def transcribe_file(self, path):
+        """Transcript of an audio file, streamed from disk."""
+        size = os.path.getsize(path)
+        async with self._semaphore:
+            return await self._transcribe(lambda: _file_chunks(path), _content_type(path), size)
+
+    async def transcribe_audio(self, audio):
+        """Transcript of a float32 mono buffer at SAMPLE_RATE."""
+        wav_bytes = encode_wav(audio, SAMPLE_RATE)
+        async with self._semaphore:
+            return await self._transcribe(lambda: wav_bytes, "audio/wav", len(wav_bytes))
+
+    async def transcribe_directory(self, directory):
+        """{path: Transcript or the exception it failed with} for every audio file under directory."""
+        paths = find_audio(directory)
+        results = await asyncio.gather(*(self.transcribe_file(path) for path in paths), return_exceptions=True)
+        return dict(zip(paths, results))
+
+
+async def transcribe_directory(directory, provider="deepgram", **kwargs):
+    async with RemoteASRClient(provider, **kwargs) as client:
+        start = time.perf_counter()
+        results = await client.transcribe_directory(directory)
+        wall = time.perf_counter() - start
+        stats = dict(client.stats)
+    return results, dict(stats, wall_s=round(wall, 2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directory")
+    parser.add_argument("--provider", choices=["deepgram", "assemblyai"], default="deepgram")
+    parser.add_argument("--url", default=None, help="API base URL (e.g. a local stand-in)")
+    parser.add_argument("--concurrency", type=int, default=None, help=f"default: {config.REMOTE_ASR_MAX_CONCURRENCY}")
+    parser.add_argument("--output", default=None, help="write {path: transcript} JSON here")
+    args = parser.parse_args()
+
+    results, stats = asyncio.run(
+        transcribe_directory(args.directory, args.provider, base_url=args.url, max_concurrency=args.concurrency)
+    )
+    transcripts = {}
+    for path, result in results.items():
+        if isinstance(result, Exception):
+            print(f"FAILED {path}: {result}")
+            continue
+        transcripts[path] = {"text": result.text, "words": [w._asdict() for w in result.words]}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(transcripts, f, indent=2)
+    print(json.dumps(dict(stats, files=len(results), failed=len(results) - len(transcripts)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
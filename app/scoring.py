@@ -0,0 +1,103 @@
+from difflib import SequenceMatcher
+
+from app import config
+from app.timing import StageTimer
+
+
+def similarity_ratio(str1, str2):
+    return SequenceMatcher(None, str1, str2).ratio()
+
+
+def normalize_text(text):
+    """Lowercase and strip the punctuation Whisper adds ("Hello." -> "hello")."""
+    return "".join(ch for ch in text.lower() if ch.isalnum() or ch.isspace() or ch == "'").strip()
+
+
+def decide(confidence):
+    if confidence >= config.SCORE_ACCEPT_THRESHOLD:
+        return "accept"
+    if confidence <= config.SCORE_REJECT_THRESHOLD:
+        return "reject"
+    return "ambiguous"
+
+
+def _forced_verdict(expected_word, confidence):
+    correct = decide(confidence) == "accept"
+    return {
+        "recognized": expected_word if correct else None,
+        "correct": correct,
+        "confidence": round(confidence, 4),
+        "best_match": expected_word if correct else None,
+        "mode": "forced",
+    }
+
+
+def _transcribed_verdict(expected_word, recognized_text, confidence=None, index=None):
+    recognized_text = normalize_text(recognized_text)
+    similarity = similarity_ratio(expected_word.lower(), recognized_text)
+    verdict = {
+        "recognized": recognized_text,
+        "correct": similarity >= 0.8,
+        "similarity": similarity,
+        "mode": "transcribed",
+    }
+    if index is not None:
+        # Sound-alike spellings ("eye" for "I") pass. phonetic_score is only
+        # reported: near misses such as "town" for "down" score high too
+        match = index.match(recognized_text, expected_word)
+        verdict["best_match"] = match.best_match
+        verdict["phonetic_score"] = match.expected_score
+        verdict["correct"] = verdict["correct"] or match.sounds_like
+    if confidence is not None:
+        verdict["confidence"] = round(confidence, 4)
+    return verdict
+
+
+def _no_speech_verdict():
+    # VAD found nothing to verify, so the model is never called
+    return {"recognized": "", "correct": False, "mode": "no_speech"}
+
+
+def verify_expected_word(transcriber, audio, expected_word, mode=None, index=None, timer=None):
+    """
+    Verify an attempt at expected_word.
+
+    In "forced" mode the expected word is scored directly and free
+    transcription only runs when the score is ambiguous; "transcribe" mode is
+    the original full transcription + similarity_ratio >= 0.8 check. With a
+    song's PhoneticIndex, transcriptions are also matched phonetically and the
+    verdict names the song word they sound most like.
+
+    A StageTimer gets the "score", "transcribe" and "compare" stages.
+    """
+    if len(audio) == 0:
+        return _no_speech_verdict()
+    timer = timer or StageTimer()
+    mode = mode or config.VERIFY_MODE
+    confidence = None
+    if mode == "forced":
+        with timer.stage("score"):
+            confidence = transcriber.score(audio, expected_word)
+        if decide(confidence) != "ambiguous":
+            return _forced_verdict(expected_word, confidence)
+    with timer.stage("transcribe"):
+        result = transcriber.transcribe(audio)
+    with timer.stage("compare"):
+        return _transcribed_verdict(expected_word, result["text"], confidence, index)
+
+
+async def verify_expected_word_async(transcriber, audio, expected_word, mode=None, index=None, timer=None):
+    if len(audio) == 0:
+        return _no_speech_verdict()
+    timer = timer or StageTimer()
+    mode = mode or config.VERIFY_MODE
+    confidence = None
+    if mode == "forced":
+        with timer.stage("score"):
+            confidence = await transcriber.score_async(audio, expected_word)
+        if decide(confidence) != "ambiguous":
+            return _forced_verdict(expected_word, confidence)
+    with timer.stage("transcribe"):
+        result = await transcriber.transcribe_async(audio)
+    with timer.stage("compare"):
+        return _transcribed_verdict(expected_word, result["text"], confidence, index)
@@ -0,0 +1,134 @@
+import numpy as np
+
+from app import config
+from app.audio import stream_file_with_ffmpeg
+
+
+def crossfade_window(segment, overlap):
+    """Weights for one segment: linear ramps over the overlapping ends, flat in between."""
+    window = np.ones(segment, dtype=np.float32)
+    if overlap:
+        ramp = np.arange(1, overlap + 1, dtype=np.float32) / (overlap + 1)
+        window[:overlap] = ramp
+        window[-overlap:] = ramp[::-1]
+    return window
+
+
+class ChunkedSeparator:
+    """
+    Vocal separation over fixed-length overlapping segments.
+
+    The track is streamed from ffmpeg, each segment goes through the model on
+    its own, and neighbouring segments are blended with overlap-add
+    crossfades. Peak memory is set by the segment length rather than the
+    song length; only the separated mono vocals (4 bytes per sample) grow
+    with the track.
+    """
+
+    def __init__(self, model, segment_s=None, overlap=None, threads=None):
+        self.model = model
+        self.sample_rate = getattr(model, "samplerate", 44100)
+        self.channels = getattr(model, "audio_channels", 2)
+        sources = list(getattr(model, "sources", ["drums", "bass", "other", "vocals"]))
+        self.vocals_index = sources.index("vocals")
+        self.segment = int((segment_s or config.SEPARATION_SEGMENT_S) * self.sample_rate)
+        overlap = config.SEPARATION_OVERLAP if overlap is None else overlap
+        self.hop = max(int(self.segment * (1 - overlap)), 1)
+        self.window = crossfade_window(self.segment, self.segment - self.hop)
+        self.threads = config.SEPARATION_THREADS if threads is None else threads
+
+    def _blocks(self, path):
+        return stream_file_with_ffmpeg(path, self.sample_rate, self.channels, block_frames=self.hop)
+
+    def _track_stats(self, path):
+        # Demucs normalises by the whole track's mix; one cheap decode-only pass gets it
+        count, total, total_sq = 0, 0.0, 0.0
+        for block in self._blocks(path):
+            mono = block.mean(axis=1, dtype=np.float64)
+            count += len(mono)
+            total += mono.sum()
+            total_sq += np.square(mono).sum()
+        if count == 0:
+            return 0.0, 1.0
+        mean = total / count
+        std = np.sqrt(max(total_sq / count - mean * mean, 0.0))
+        return float(mean), float(std) or 1.0
+
+    def _separate_segment(self, segment, mean, std):
+        import torch
+
+        device = next(self.model.parameters()).device
+        x = torch.from_numpy(np.ascontiguousarray(((segment - mean) / std).T))[None].to(device)
+        with torch.inference_mode():
+            sources = self.model(x)
+        vocals = sources[0, self.vocals_index].mean(dim=0).cpu().numpy()
+        return vocals * std + mean
+
+    def separate_whole(self, path):
+        """
+        The same mono vocals from a single forward pass over the whole track
+        (SEPARATION_MODE=full). Input is at the model's rate and channel count.
+        """
+        import torch
+
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        blocks = list(self._blocks(path))
+        if not blocks:
+            return np.zeros(0, dtype=np.float32)
+        track = np.concatenate(blocks)
+        mono = track.mean(axis=1, dtype=np.float64)
+        mean, std = float(mono.mean()), float(mono.std()) or 1.0
+        return self._separate_segment(track, mean, std).astype(np.float32)
+
+    def separate_file(self, path):
+        """Mono float32 vocals for the file at path, at self.sample_rate."""
+        import torch
+
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        mean, std = self._track_stats(path)
+
+        out = []
+        acc = np.zeros(self.segment, dtype=np.float32)  # weighted sum of outputs from this position
+        weight = np.zeros(self.segment, dtype=np.float32)
+        pending = np.zeros((0, self.channels), dtype=np.float32)
+        total = emitted = 0
+        blocks = self._blocks(path)
+        exhausted = False
+
+        while True:
+            while len(pending) < self.segment and not exhausted:
+                block = next(blocks, None)
+                if block is None:
+                    exhausted = True
+                else:
+                    pending = np.concatenate([pending, block])
+                    total += len(block)
+            if len(pending) == 0:
+                break
+
+            valid = min(len(pending), self.segment)
+            segment = pending[:self.segment]
+            if valid < self.segment:
+                segment = np.pad(segment, ((0, self.segment - valid), (0, 0)))
+            vocals = self._separate_segment(segment, mean, std)
+            acc += vocals * self.window
+            weight += self.window
+
+            if exhausted and len(pending) <= self.segment:
+                # Last segment: everything left is final
+                remaining = total - emitted
+                out.append(acc[:remaining] / np.maximum(weight[:remaining], 1e-8))
+                break
+
+            # No later segment reaches the first hop samples, so they are done
+            out.append(acc[:self.hop] / np.maximum(weight[:self.hop], 1e-8))
+            emitted += self.hop
+            acc = np.concatenate([acc[self.hop:], np.zeros(self.hop, dtype=np.float32)])
+            weight = np.concatenate([weight[self.hop:], np.zeros(self.hop, dtype=np.float32)])
+            pending = pending[self.hop:]
+
+        if not out:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(out).astype(np.float32)
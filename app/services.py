@@ -1,20 +1,20 @@
-import whisper
 from thefuzz import fuzz
 
-# Load Whisper model once to avoid reloading for every request
-model = whisper.load_model("base")
+from app.audio import load_audio
+from app.asr import get_asr_backend
 
-def verify_pronunciation(audio_file, expected_text):
+def verify_pronunciation(audio_file, expected_text, content_type=None):
     """
     Transcribes the user's audio and compares it with the expected text.
     Uses fuzzy matching to allow slight pronunciation variations.
+
+    `audio_file` may be raw bytes or an uploaded file object; it is decoded
+    in memory so concurrent requests never share a temp file.
     """
-    file_path = "temp_audio.wav"
-    audio_file.save(file_path)
+    audio = load_audio(audio_file, content_type=content_type)
 
-    # Transcribe audio
-    result = model.transcribe(file_path)
-    transcribed_text = result["text"].strip()
+    # Transcribe audio with the configured backend (ASR_BACKEND)
+    transcribed_text = get_asr_backend().transcribe(audio).text.strip()
 
     # Use fuzzy matching to compare similarity
     similarity_score = fuzz.ratio(transcribed_text, expected_text)
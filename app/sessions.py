@@ -0,0 +1,98 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from app import config
+
+
+class Session:
+    """Progress through one song; __slots__ keeps 100k+ live sessions small."""
+
+    __slots__ = ("session_id", "song_id", "current_position", "completed", "last_seen", "lock")
+
+    def __init__(self, session_id, song_id, current_position=0, completed=False):
+        self.session_id = session_id
+        self.song_id = song_id
+        self.current_position = current_position
+        self.completed = completed
+        self.last_seen = time.monotonic()
+        # Held while reading-then-advancing progress so concurrent attempts can't double-advance
+        self.lock = threading.Lock()
+
+
+class SessionStore:
+    """
+    Thread-safe session map with idle-TTL eviction.
+
+    Sessions are kept in last-access order, so the background sweeper (and the
+    max-count cap) only ever touches the entries it evicts.
+    """
+
+    def __init__(self, ttl=None, max_sessions=None, sweep_interval=None):
+        self.ttl = ttl if ttl is not None else config.SESSION_TTL_S
+        self.max_sessions = max_sessions or config.SESSION_MAX_COUNT
+        self.sweep_interval = sweep_interval or config.SESSION_SWEEP_INTERVAL_S
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()  # session_id -> Session, least recently used first
+        self._stop = threading.Event()
+        self._sweeper = None
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    def create(self, song_id):
+        # Random ids never collide, unlike numbering by len(sessions)
+        session = Session(f"session_{uuid.uuid4().hex}", song_id)
+        with self._lock:
+            self._sessions[session.session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id):
+        """Return the session (refreshing its idle timer) or None."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            session.last_seen = time.monotonic()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def delete(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def sweep(self, now=None):
+        """Evict sessions idle for longer than the TTL; returns how many were removed."""
+        deadline = (now if now is not None else time.monotonic()) - self.ttl
+        evicted = 0
+        with self._lock:
+            while self._sessions:
+                session_id, session = next(iter(self._sessions.items()))
+                if session.last_seen > deadline:
+                    break
+                del self._sessions[session_id]
+                evicted += 1
+        return evicted
+
+    def start_sweeper(self):
+        if self._sweeper is not None:
+            return
+        self._stop.clear()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            self.sweep()
@@ -0,0 +1,209 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from app import config
+from app.sessions import Session, SessionStore
+
+# Read-only snapshot of a session's progress
+SessionState = namedtuple("SessionState", ["session_id", "song_id", "current_position", "completed"])
+
+
+def _snapshot(session):
+    return SessionState(session.session_id, session.song_id, session.current_position, session.completed)
+
+
+class MemoryStateBackend:
+    """Sessions held in this process only (single uvicorn worker)."""
+
+    def __init__(self):
+        self.store = SessionStore()
+        self._pinned = {}  # session_id -> Session, never evicted
+        self._lock = threading.Lock()
+
+    def _find(self, session_id):
+        return self._pinned.get(session_id) or self.store.get(session_id)
+
+    def create(self, song_id):
+        return self.store.create(song_id).session_id
+
+    def ensure(self, session_id, song_id):
+        """Create a pinned (never evicted) session if it doesn't exist yet."""
+        with self._lock:
+            if session_id not in self._pinned:
+                self._pinned[session_id] = Session(session_id, song_id)
+
+    def get(self, session_id):
+        session = self._find(session_id)
+        return _snapshot(session) if session is not None else None
+
+    def advance(self, session_id, total_words, expected_position=None, steps=1):
+        """
+        Move the session `steps` words forward (one, unless a whole phrase was
+        sung). With expected_position, only advance if nobody else has moved
+        it meanwhile. Returns the new state, or None if the session is
+        missing, completed, or the position didn't match.
+        """
+        session = self._find(session_id)
+        if session is None:
+            return None
+        with session.lock:
+            if session.completed:
+                return None
+            if expected_position is not None and session.current_position != expected_position:
+                return None
+            session.current_position = min(session.current_position + steps, total_words)
+            session.completed = session.current_position >= total_words
+            return _snapshot(session)
+
+    def reset(self, session_id):
+        session = self._find(session_id)
+        if session is not None:
+            with session.lock:
+                session.current_position = 0
+                session.completed = False
+
+    def delete(self, session_id):
+        with self._lock:
+            if self._pinned.pop(session_id, None) is not None:
+                return True
+        return self.store.delete(session_id)
+
+    def start_sweeper(self):
+        self.store.start_sweeper()
+
+
+class SQLiteStateBackend:
+    """
+    Sessions in a SQLite database in WAL mode, shared by every worker process
+    on the box. Progress updates are single conditional UPDATE statements, so
+    concurrent workers can't lose each other's increments. Only sessions are
+    shared: a running /practice lives in the worker that started it.
+    """
+
+    def __init__(self, path=None, ttl=None):
+        self.path = path or config.STATE_DB_PATH
+        self.ttl = ttl if ttl is not None else config.SESSION_TTL_S
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._sweeper = None
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY,"
+            " song_id TEXT NOT NULL,"
+            " current_position INTEGER NOT NULL DEFAULT 0,"
+            " completed INTEGER NOT NULL DEFAULT 0,"
+            " last_seen REAL NOT NULL,"
+            " pinned INTEGER NOT NULL DEFAULT 0)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen)")
+
+    def _conn(self):
+        # sqlite3 connections can't be shared between threads, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def create(self, song_id):
+        session_id = f"session_{uuid.uuid4().hex}"
+        self._conn().execute(
+            "INSERT INTO sessions (session_id, song_id, last_seen) VALUES (?, ?, ?)",
+            (session_id, song_id, time.time()),
+        )
+        return session_id
+
+    def ensure(self, session_id, song_id):
+        self._conn().execute(
+            "INSERT OR IGNORE INTO sessions (session_id, song_id, last_seen, pinned) VALUES (?, ?, ?, 1)",
+            (session_id, song_id, time.time()),
+        )
+
+    def get(self, session_id):
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT session_id, song_id, current_position, completed, last_seen FROM sessions WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        # An UPDATE takes the write lock even when it matches no rows, so only
+        # refresh the idle timer once it is more than a minute old
+        now = time.time()
+        if row[4] < now - 60:
+            conn.execute(
+                "UPDATE sessions SET last_seen = ? WHERE session_id = ? AND last_seen < ?",
+                (now, session_id, now - 60),
+            )
+        return SessionState(row[0], row[1], row[2], bool(row[3]))
+
+    def advance(self, session_id, total_words, expected_position=None, steps=1):
+        query = (
+            "UPDATE sessions SET current_position = MIN(current_position + ?, ?),"
+            " completed = (current_position + ? >= ?), last_seen = ?"
+            " WHERE session_id = ? AND completed = 0"
+        )
+        params = [steps, total_words, steps, total_words, time.time(), session_id]
+        if expected_position is not None:
+            query += " AND current_position = ?"
+            params.append(expected_position)
+
+        conn = self._conn()
+        # BEGIN IMMEDIATE takes the write lock up front, so the read-back sees our own update
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            updated = conn.execute(query, params).rowcount
+            row = conn.execute(
+                "SELECT session_id, song_id, current_position, completed FROM sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if not updated or row is None:
+            return None
+        return SessionState(row[0], row[1], row[2], bool(row[3]))
+
+    def reset(self, session_id):
+        self._conn().execute(
+            "UPDATE sessions SET current_position = 0, completed = 0, last_seen = ? WHERE session_id = ?",
+            (time.time(), session_id),
+        )
+
+    def delete(self, session_id):
+        return self._conn().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount > 0
+
+    def sweep(self):
+        cutoff = time.time() - self.ttl
+        return self._conn().execute(
+            "DELETE FROM sessions WHERE pinned = 0 AND last_seen < ?", (cutoff,)
+        ).rowcount
+
+    def start_sweeper(self):
+        if self._sweeper is not None:
+            return
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def _sweep_loop(self):
+        while not self._stop.wait(config.SESSION_SWEEP_INTERVAL_S):
+            self.sweep()
+
+
+def get_state_backend(kind=None):
+    """Backend selected by STATE_BACKEND: "memory" (default) or "sqlite" for multi-worker serving."""
+    kind = kind or config.STATE_BACKEND
+    if kind == "memory":
+        return MemoryStateBackend()
+    if kind == "sqlite":
+        return SQLiteStateBackend()
+    raise ValueError(f"Unknown STATE_BACKEND: {kind}")
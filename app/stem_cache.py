@@ -0,0 +1,149 @@
+import glob
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app import config
+
+# Bump when the separation or transcription output format changes
+CACHE_VERSION = 2
+
+
+def audio_fingerprint(path, block_size=1 << 20):
+    """SHA-256 of the file's bytes, so renamed or copied tracks still hit."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def stem_key(fingerprint):
+    """Key of the separated vocals: the audio plus everything that changes Demucs' output."""
+    raw = (
+        f"{fingerprint}|v{CACHE_VERSION}|demucs={config.DEMUCS_MODEL}|{config.SEPARATION_MODE}"
+        f"|{config.SEPARATION_SEGMENT_S}|{config.SEPARATION_OVERLAP}"
+    )
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def transcript_key(fingerprint):
+    """Key of the transcript: the stem plus the Wav2Vec2 model and chunking."""
+    raw = (
+        f"{stem_key(fingerprint)}|wav2vec2={config.WAV2VEC2_MODEL}"
+        f"|{config.WAV2VEC2_CHUNK_S}|{config.WAV2VEC2_STRIDE_S}"
+    )
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class StemCache:
+    """
+    Separated vocal stems (.npy) and transcripts (.json) on disk, content-addressed.
+
+    Stems are loaded with np.load(mmap_mode="r"), so a hit costs a file open
+    rather than a read. The directory is a size-bounded LRU, like the
+    pronunciation cache; several processes may share it, and a file another
+    process evicted is simply a miss.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or config.STEM_CACHE_DIR
+        self.max_bytes = max_bytes or config.STEM_CACHE_MAX_BYTES
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._files = OrderedDict()  # file name -> size, least recently used first
+        self._bytes = 0
+        self._fingerprints = {}  # (path, size, mtime) -> fingerprint
+        self._load_index()
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.startswith("."):
+                continue
+            st = os.stat(os.path.join(self.cache_dir, name))
+            entries.append((st.st_mtime, name, st.st_size))
+        for _, name, size in sorted(entries):
+            self._files[name] = size
+            self._bytes += size
+
+    def fingerprint(self, path):
+        """audio_fingerprint(), remembered per file version so repeat calls skip the hashing."""
+        st = os.stat(path)
+        version = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+        fingerprint = self._fingerprints.get(version)
+        if fingerprint is None:
+            fingerprint = self._fingerprints[version] = audio_fingerprint(path)
+        return fingerprint
+
+    def get_stem(self, key):
+        """(memory-mapped float32 vocals, sample rate) or None."""
+        # The sample rate lives in the file name: <key>_<rate>.npy
+        matches = glob.glob(os.path.join(self.cache_dir, f"{key}_*.npy"))
+        if not matches:
+            return None
+        path = matches[0]
+        try:
+            vocals = np.load(path, mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            return None
+        self._touch(os.path.basename(path))
+        sample_rate = int(os.path.basename(path)[len(key) + 1:-4])
+        return vocals, sample_rate
+
+    def put_stem(self, key, vocals, sample_rate):
+        name = f"{key}_{int(sample_rate)}.npy"
+        tmp = os.path.join(self.cache_dir, f".{name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(vocals, dtype=np.float32))
+        self._commit(tmp, name)
+
+    def get_transcript(self, key):
+        name = f"{key}.json"
+        try:
+            with open(os.path.join(self.cache_dir, name), encoding="utf-8") as f:
+                transcript = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        self._touch(name)
+        return transcript
+
+    def put_transcript(self, key, transcript):
+        name = f"{key}.json"
+        tmp = os.path.join(self.cache_dir, f".{name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(transcript, f)
+        self._commit(tmp, name)
+
+    def _touch(self, name):
+        with self._lock:
+            if name in self._files:
+                self._files.move_to_end(name)
+        try:
+            # Bump mtime so the LRU order survives a restart
+            os.utime(os.path.join(self.cache_dir, name))
+        except FileNotFoundError:
+            pass
+
+    def _commit(self, tmp, name):
+        """Rename a finished temp file into place, then evict down to max_bytes."""
+        os.replace(tmp, os.path.join(self.cache_dir, name))
+        size = os.path.getsize(os.path.join(self.cache_dir, name))
+        evicted = []
+        with self._lock:
+            self._bytes -= self._files.pop(name, 0)
+            self._files[name] = size
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._files) > 1:
+                old_name, old_size = self._files.popitem(last=False)
+                self._bytes -= old_size
+                evicted.append(old_name)
+        for old_name in evicted:
+            try:
+                os.remove(os.path.join(self.cache_dir, old_name))
+            except FileNotFoundError:
+                pass
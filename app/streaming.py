@@ -0,0 +1,310 @@
+import asyncio
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+from app import config
+from app.audio import SAMPLE_RATE, pcm16_to_float32, resample
+from app.executor import Saturated
+from app.scoring import decide, verify_expected_word, verify_expected_word_async
+from app.timing import StageTimer
+from app.vad import trim_to_speech
+
+
+def parse_control(text, sample_rate):
+    """(control message, sample rate) from a text message; ValueError if it is malformed."""
+    try:
+        control = json.loads(text)
+    except ValueError:
+        raise ValueError("Text messages must be JSON") from None
+    if not isinstance(control, dict):
+        raise ValueError("Text messages must be JSON objects")
+    try:
+        sample_rate = int(control.get("sample_rate", sample_rate))
+    except (TypeError, ValueError):
+        raise ValueError("sample_rate must be an integer") from None
+    if sample_rate <= 0:
+        raise ValueError("sample_rate must be positive")
+    return control, sample_rate
+
+
+class StreamingEndpointer:
+    """
+    Incremental energy VAD over streamed audio.
+
+    feed() takes float32 chunks at SAMPLE_RATE and returns the events it
+    detected ("speech_start", "speech_end"). The utterance is endpointed once
+    STREAM_END_SILENCE_MS of silence follows the speech, rather than waiting
+    for recognizer.listen()'s pause threshold. noise_floor is the session's,
+    if known; otherwise the first few hundred ms calibrate it.
+    """
+
+    def __init__(self, noise_floor=None):
+        self.frame = int(SAMPLE_RATE * config.VAD_FRAME_MS / 1000)
+        self.pad_frames = max(config.VAD_PAD_MS // config.VAD_FRAME_MS, 1)
+        self.start_frames = max(config.STREAM_MIN_SPEECH_MS // config.VAD_FRAME_MS, 1)
+        self.end_frames = max(config.STREAM_END_SILENCE_MS // config.VAD_FRAME_MS, 1)
+        self.max_frames = int(config.STREAM_MAX_UTTERANCE_S * 1000 / config.VAD_FRAME_MS)
+        self.noise_floor = noise_floor
+        self._calibration = []  # frames held back until the floor is estimated
+        self.reset()
+
+    def reset(self):
+        self.state = "waiting"
+        self._leftover = np.zeros(0, dtype=np.float32)
+        # Everything since the last endpoint: the pre-roll for speech_start, and what finish() verifies
+        self._pending = deque(maxlen=self.max_frames)
+        self._frames = []
+        self._voiced_run = 0
+        self._silence_run = 0
+
+    @property
+    def speech_ms(self):
+        return len(self._frames) * config.VAD_FRAME_MS
+
+    def utterance(self):
+        if not self._frames:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(self._frames)
+
+    def _threshold(self):
+        return max(self.noise_floor * config.VAD_THRESHOLD_RATIO, config.VAD_MIN_RMS)
+
+    def feed(self, chunk):
+        audio = np.concatenate([self._leftover, chunk]) if len(self._leftover) else chunk
+        n_frames = len(audio) // self.frame
+        self._leftover = audio[n_frames * self.frame:]
+        events = []
+        for i in range(n_frames):
+            for frame in self._calibrated(audio[i * self.frame:(i + 1) * self.frame]):
+                event = self._step(frame)
+                if event:
+                    events.append(event)
+        return events
+
+    def finish(self):
+        """Client signalled the end of the stream: endpoint whatever audio we have."""
+        if self.state == "speech":
+            self.state = "ended"
+            return ["speech_end"]
+        if self.state == "waiting":
+            # No speech_start (too short, or too quiet for the floor): verify
+            # what came in, trimmed to its speech; nothing left is no_speech
+            pending = self._calibration or [f for f, _ in self._pending]
+            audio = np.concatenate(pending) if pending else np.zeros(0, dtype=np.float32)
+            self._frames = [trim_to_speech(audio, self.noise_floor)]
+            self._calibration = []
+            self.state = "ended"
+            return ["speech_end"]
+        return []
+
+    def _calibrated(self, frame):
+        """Frames ready for detection: none until the floor is known, then the held-back ones too."""
+        if self.noise_floor is not None:
+            return (frame,)
+        self._calibration.append(frame)
+        if len(self._calibration) < self.start_frames + self.pad_frames:
+            return ()
+        # The quiet frames set the floor, as in vad.estimate_noise_floor; a
+        # word already started in them is then detected from its first frame
+        frames, self._calibration = self._calibration, []
+        rms = [float(np.sqrt(np.mean(f * f))) for f in frames]
+        self.noise_floor = max(float(np.percentile(rms, 10)), 1e-5)
+        return frames
+
+    def _earlier_speech(self):
+        """Index of the first STREAM_MIN_SPEECH_MS voiced run among the pending frames, or None."""
+        threshold = self._threshold()
+        run = 0
+        for i, (_, rms) in enumerate(self._pending):
+            run = run + 1 if rms > threshold else 0
+            if run >= self.start_frames:
+                return i + 1 - self.start_frames
+        return None
+
+    def _step(self, frame):
+        rms = float(np.sqrt(np.mean(frame * frame)))
+        threshold = self._threshold()
+        # Follow the quietest frame: a floor calibrated while the learner was
+        # already singing comes down at the first pause. Digital silence
+        # (zero padding) says nothing about the room, so it doesn't count
+        if 1e-5 < rms < self.noise_floor:
+            self.noise_floor = rms
+        voiced = rms > self._threshold()
+
+        if self.state == "waiting":
+            self._pending.append((frame, rms))
+            self._voiced_run = self._voiced_run + 1 if voiced else 0
+            if self._voiced_run >= self.start_frames:
+                start = len(self._pending) - self.start_frames
+            elif self._threshold() < threshold:
+                # The floor came down, so speech may have gone by under the old one
+                start = self._earlier_speech()
+            else:
+                start = None
+            if start is None:
+                return None
+            self.state = "speech"
+            pending = list(self._pending)[max(start - self.pad_frames, 0):]
+            self._frames = [f for f, _ in pending]
+            self._silence_run = 0
+            for _, energy in reversed(pending):
+                if energy > self._threshold():
+                    break
+                self._silence_run += 1
+            return "speech_start"
+
+        if self.state == "speech":
+            self._frames.append(frame)
+            self._silence_run = 0 if voiced else self._silence_run + 1
+            if self._silence_run >= self.end_frames or len(self._frames) >= self.max_frames:
+                # Keep VAD_PAD_MS of the trailing silence, drop the rest
+                keep = len(self._frames) - max(self._silence_run - self.pad_frames, 0)
+                self._frames = self._frames[:keep]
+                self.state = "ended"
+                return "speech_end"
+        return None
+
+
+class StreamingVerifier:
+    """
+    Drives one /ws/verify connection.
+
+    Protocol: the client may send {"sample_rate": <hz>} as text first, then
+    streams 16-bit little-endian mono PCM as binary messages; {"type": "end"}
+    forces an endpoint. The server sends "ready" (the word to say),
+    "speech_start", periodic "partial" confidences while the learner is
+    speaking, and a "final" verdict as soon as the word is endpointed.
+    Malformed messages get an "error" and are otherwise ignored.
+
+    With a NoiseCalibrator, the session's noise floor seeds the endpointer
+    and the floor it settles on is kept for the session's next attempts.
+    With an InferenceExecutor, model calls share its bounded pool with
+    /verify: a final verdict waits for a slot (sending "busy"), and a
+    partial is skipped while the pool is full.
+    """
+
+    def __init__(self, transcriber, calibrator=None, executor=None):
+        self.transcriber = transcriber
+        self.calibrator = calibrator
+        self.executor = executor
+
+    async def serve(self, websocket, next_target, apply_verdict, index=None, noise_key=None):
+        """
+        next_target() returns (position, expected_word) or None once the song
+        is finished; apply_verdict(target, verdict) records an attempt and
+        returns the response to send. Both touch the state backend, which may
+        block (SQLite), so they run in a thread, off the event loop. index is the song's PhoneticIndex;
+        noise_key is the session whose noise floor to use.
+        """
+        send_lock = asyncio.Lock()
+
+        async def send(payload):
+            async with send_lock:
+                await websocket.send_json(payload)
+
+        sample_rate = SAMPLE_RATE
+        calibrator = self.calibrator if noise_key is not None else None
+        endpointer = StreamingEndpointer(calibrator.noise_floor(noise_key) if calibrator else None)
+        partial_task = None
+        last_partial_ms = 0
+
+        target = await asyncio.to_thread(next_target)
+        if target is None:
+            await send({"type": "completed"})
+            await websocket.close()
+            return
+        expected = target[1]
+        await send({"type": "ready", "expected": expected})
+
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+
+                events = []
+                if message.get("bytes") is not None:
+                    if len(message["bytes"]) % 2:
+                        await send({"type": "error", "detail": "Binary messages must hold whole 16-bit samples"})
+                        continue
+                    chunk = resample(pcm16_to_float32(message["bytes"]), sample_rate)
+                    events = endpointer.feed(chunk)
+                elif message.get("text"):
+                    try:
+                        control, sample_rate = parse_control(message["text"], sample_rate)
+                    except ValueError as e:
+                        await send({"type": "error", "detail": str(e)})
+                        continue
+                    if control.get("type") == "end":
+                        events = endpointer.finish()
+
+                for event in events:
+                    if event == "speech_start":
+                        last_partial_ms = 0
+                        await send({"type": "speech_start"})
+                        continue
+
+                    # speech_end: verify right away, no need to wait for the stream to stop
+                    ended_at = time.perf_counter()
+                    if partial_task is not None:
+                        partial_task.cancel()
+                        partial_task = None
+                    verdict = await self._verify(send, endpointer.utterance(), expected, index)
+                    response = await asyncio.to_thread(apply_verdict, target, verdict)
+                    if calibrator and endpointer.noise_floor is not None:
+                        calibrator.remember_noise_floor(noise_key, endpointer.noise_floor)
+                    response.update({"type": "final", "verdict_ms": round((time.perf_counter() - ended_at) * 1000, 1)})
+                    await send(response)
+
+                    target = await asyncio.to_thread(next_target)
+                    if target is None:
+                        await send({"type": "completed"})
+                        await websocket.close()
+                        return
+                    expected = target[1]
+                    endpointer.reset()
+                    await send({"type": "ready", "expected": expected})
+                    break
+
+                if (
+                    endpointer.state == "speech"
+                    and endpointer.speech_ms - last_partial_ms >= config.STREAM_PARTIAL_INTERVAL_MS
+                    and (partial_task is None or partial_task.done())
+                ):
+                    last_partial_ms = endpointer.speech_ms
+                    partial_task = asyncio.create_task(self._partial(send, endpointer.utterance(), expected))
+        finally:
+            if partial_task is not None:
+                partial_task.cancel()
+
+    async def _verify(self, send, audio, expected, index):
+        timer = StageTimer("stream")
+        if self.executor is None:
+            return await verify_expected_word_async(self.transcriber, audio, expected, index=index, timer=timer)
+        while True:
+            try:
+                return await self.executor.run(
+                    verify_expected_word, self.transcriber, audio, expected, index=index, timer=timer,
+                )
+            except Saturated as e:
+                # The learner already spoke, so wait for the pool rather than drop the attempt
+                await send({"type": "busy", "retry_after": e.retry_after})
+                await asyncio.sleep(e.retry_after)
+
+    async def _partial(self, send, audio, expected):
+        if self.executor is None:
+            confidence = await self.transcriber.score_async(audio, expected)
+        else:
+            try:
+                confidence = await self.executor.run(self.transcriber.score, audio, expected)
+            except Saturated:
+                return  # partials are only hints; skip one rather than queue it
+        await send({
+            "type": "partial",
+            "expected": expected,
+            "confidence": round(confidence, 4),
+            "likely_correct": decide(confidence) == "accept",
+        })
@@ -0,0 +1,45 @@
+import time
+from contextlib import contextmanager
+
+from app.metrics import metrics
+
+
+class StageTimer:
+    """
+    Wall time of the named stages of one request.
+
+    The verify and pronounce handlers report these in a Server-Timing header
+    ("decode;dur=1.9, transcribe;dur=41.2"), which the benchmarks and browser
+    devtools both read. With a pipeline name every stage is also recorded in
+    the shlok_stage_duration_seconds histogram served on /metrics.
+    """
+
+    def __init__(self, pipeline=None):
+        self.pipeline = pipeline
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            if self.pipeline:
+                metrics.observe_stage(self.pipeline, name, elapsed)
+
+    def header(self):
+        return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stages.items())
+
+
+def parse_server_timing(value):
+    """{stage: milliseconds} from a Server-Timing header."""
+    stages = {}
+    for entry in (value or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        for param in params.split(";"):
+            key, _, duration = param.strip().partition("=")
+            if name and key == "dur":
+                stages[name] = float(duration)
+    return stages
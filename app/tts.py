@@ -0,0 +1,202 @@
+import hashlib
+import os
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import pyttsx3
+
+from app import config
+
+
+class SpeechSynthesizer:
+    """
+    Owns the one pyttsx3 engine and drives it from a single worker thread.
+
+    pyttsx3 engines are not thread-safe, so every say()/save_to_file() goes
+    through this queue instead of a fresh thread per request.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="tts-worker", daemon=True)
+        self._thread.start()
+
+    def speak(self, text, voice=None, rate=None):
+        """Play text on the server's speakers (fire and forget)."""
+        return self._submit(("speak", text, voice, rate, None))
+
+    def render(self, text, path, voice=None, rate=None):
+        """Render text to an audio file; returns a Future that resolves when the file exists."""
+        return self._submit(("render", text, voice, rate, path))
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _submit(self, job):
+        future = Future()
+        self._queue.put((job, future))
+        return future
+
+    def _run(self):
+        # The engine must be created on the thread that drives it
+        engine = pyttsx3.init()
+        defaults = {"voice": engine.getProperty("voice"), "rate": engine.getProperty("rate")}
+        while True:
+            item = self._queue.get()
+            if item is None:
+                engine.stop()
+                return
+            (kind, text, voice, rate, path), future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                engine.setProperty("voice", voice or defaults["voice"])
+                engine.setProperty("rate", rate or defaults["rate"])
+                if kind == "speak":
+                    engine.say(text)
+                else:
+                    engine.save_to_file(text, path)
+                engine.runAndWait()
+                future.set_result(path)
+            except Exception as e:
+                future.set_exception(e)
+
+
+def cache_key(word, voice=None, rate=None):
+    """Content key for a rendered pronunciation."""
+    raw = f"{word.strip().lower()}|{voice or ''}|{rate or ''}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def audio_media_type(data):
+    # pyttsx3 writes WAV with sapi5/espeak and AIFF with the macOS driver
+    return "audio/aiff" if data[:4] == b"FORM" else "audio/wav"
+
+
+class PronunciationCache:
+    """
+    Rendered TTS audio keyed by word + voice + rate.
+
+    Two tiers: a small in-memory hot tier and a size-bounded on-disk LRU.
+    Misses are rendered once by the SpeechSynthesizer; concurrent misses for
+    the same key wait on the same render.
+    """
+
+    def __init__(self, synthesizer, cache_dir=None, max_disk_bytes=None, max_memory_bytes=None):
+        self.synthesizer = synthesizer
+        self.cache_dir = cache_dir or config.TTS_CACHE_DIR
+        self.max_disk_bytes = max_disk_bytes or config.TTS_CACHE_MAX_BYTES
+        self.max_memory_bytes = max_memory_bytes or config.TTS_HOT_CACHE_MAX_BYTES
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> audio bytes
+        self._memory_bytes = 0
+        self._disk = OrderedDict()  # key -> file size, least recently used first
+        self._disk_bytes = 0
+        self._pending = {}  # key -> Future of an in-progress render
+        self._load_index()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(".") or not name.endswith(".wav"):
+                continue
+            st = os.stat(os.path.join(self.cache_dir, name))
+            entries.append((st.st_mtime, name[:-4], st.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def get(self, word, voice=None, rate=None):
+        """Return (audio bytes, key) for a word, rendering it on first use."""
+        key = cache_key(word, voice, rate)
+        data = self._lookup(key)
+        if data is not None:
+            return data, key
+
+        with self._lock:
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = Future()
+        if not owner:
+            return pending.result(), key
+
+        # Render to a hidden temp name and rename, so readers never see a partial
+        # file; the name is unique, since other workers may render the same word
+        tmp_path = os.path.join(self.cache_dir, f".{key}.{os.getpid()}.{uuid.uuid4().hex}.wav")
+        try:
+            self.synthesizer.render(word, tmp_path, voice, rate).result()
+            os.replace(tmp_path, self._path(key))
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            self._store(key, data)
+            pending.set_result(data)
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+        return data, key
+
+    def _lookup(self, key):
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+            if key not in self._disk:
+                return None
+            self._disk.move_to_end(key)
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            # Bump mtime so the LRU order survives a restart
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            with self._lock:
+                self._disk_bytes -= self._disk.pop(key, 0)
+            return None
+        self._remember(key, data)
+        return data
+
+    def _store(self, key, data):
+        evicted = []
+        with self._lock:
+            self._disk_bytes -= self._disk.pop(key, 0)
+            self._disk[key] = len(data)
+            self._disk_bytes += len(data)
+            while self._disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+                old_key, size = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except FileNotFoundError:
+                pass
+        self._remember(key, data)
+
+    def _remember(self, key, data):
+        if len(data) > self.max_memory_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_memory_bytes:
+                _, old = self._memory.popitem(last=False)
+                self._memory_bytes -= len(old)
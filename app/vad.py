@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from app import config
+from app.audio import SAMPLE_RATE
+
+
+def frame_rms(audio, sample_rate=SAMPLE_RATE, frame_ms=None):
+    """RMS energy of consecutive non-overlapping frames."""
+    frame = int(sample_rate * (frame_ms or config.VAD_FRAME_MS) / 1000)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[:n_frames * frame].reshape(n_frames, frame)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+
+def estimate_noise_floor(audio, sample_rate=SAMPLE_RATE):
+    """Noise floor as a low percentile of frame energy (the quiet parts of a capture)."""
+    rms = frame_rms(audio, sample_rate)
+    if len(rms) == 0:
+        return config.VAD_MIN_RMS
+    return max(float(np.percentile(rms, 10)), 1e-5)
+
+
+def speech_span(audio, noise_floor, sample_rate=SAMPLE_RATE):
+    """(start, end) sample indices of the speech in audio, or None if there is none."""
+    rms = frame_rms(audio, sample_rate)
+    if len(rms) == 0:
+        return None
+    # Smooth over three frames so isolated clicks don't count as speech
+    smoothed = np.convolve(rms, np.ones(3) / 3, mode="same")
+    # A floor estimated from a speech-heavy clip must not hide the speech itself,
+    # but nothing quieter than VAD_MIN_RMS ever counts as speech
+    threshold = min(noise_floor * config.VAD_THRESHOLD_RATIO, 0.5 * float(smoothed.max()))
+    threshold = max(threshold, config.VAD_MIN_RMS)
+    voiced = np.flatnonzero(smoothed > threshold)
+    if len(voiced) == 0:
+        return None
+
+    frame = int(sample_rate * config.VAD_FRAME_MS / 1000)
+    pad = int(sample_rate * config.VAD_PAD_MS / 1000)
+    start = max(voiced[0] * frame - pad, 0)
+    end = min((voiced[-1] + 1) * frame + pad, len(audio))
+    return start, end
+
+
+def trim_to_speech(audio, noise_floor=None, sample_rate=SAMPLE_RATE):
+    """Slice audio down to its speech span (a view, no copy); empty if no speech was found."""
+    if noise_floor is None:
+        noise_floor = estimate_noise_floor(audio, sample_rate)
+    span = speech_span(audio, noise_floor, sample_rate)
+    if span is None:
+        return audio[:0]
+    return audio[span[0]:span[1]]
+
+
+class NoiseCalibrator:
+    """
+    Noise profiles calibrated once per session key and reused until they are
+    older than NOISE_PROFILE_TTL_S. Expired profiles are dropped as new ones
+    come in, and at most NOISE_PROFILE_MAX_ENTRIES are kept (oldest first out).
+
+    For the server microphone this replaces the adjust_for_ambient_noise()
+    call on every attempt; for uploaded audio the noise floor is estimated
+    from the first clip of the session.
+    """
+
+    def __init__(self, ttl=None, max_entries=None):
+        self.ttl = ttl if ttl is not None else config.NOISE_PROFILE_TTL_S
+        self.max_entries = max_entries or config.NOISE_PROFILE_MAX_ENTRIES
+        self._lock = threading.Lock()
+        # key -> (created_at, energy_threshold or noise floor), oldest first
+        self._profiles = OrderedDict()
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def _get(self, key):
+        with self._lock:
+            profile = self._profiles.get(key)
+        if profile is None or time.monotonic() - profile[0] > self.ttl:
+            return None
+        return profile[1]
+
+    def _set(self, key, value):
+        now = time.monotonic()
+        with self._lock:
+            self._profiles[key] = (now, value)
+            self._profiles.move_to_end(key)
+            while self._profiles:
+                oldest = next(iter(self._profiles.values()))
+                if len(self._profiles) <= self.max_entries and now - oldest[0] <= self.ttl:
+                    break
+                self._profiles.popitem(last=False)
+
+    def noise_floor(self, key):
+        """The noise floor estimated for key (a session), or None if there is none yet."""
+        return self._get(("floor", key))
+
+    def remember_noise_floor(self, key, floor):
+        self._set(("floor", key), floor)
+
+    def forget(self, key):
+        with self._lock:
+            self._profiles.pop(key, None)
+
+    def calibrate(self, recognizer, source, key="microphone"):
+        """Stand-in for adjust_for_ambient_noise() that only listens on the first call per key."""
+        threshold = self._get(("mic", key))
+        if threshold is None:
+            recognizer.adjust_for_ambient_noise(source, duration=config.CALIBRATION_SECONDS)
+            self._set(("mic", key), recognizer.energy_threshold)
+        else:
+            recognizer.energy_threshold = threshold
+
+    def trim(self, audio, key):
+        """Trim an utterance to its speech span using the session's noise floor."""
+        if not config.VAD_ENABLED:
+            return audio
+        floor = self._get(("floor", key))
+        if floor is None:
+            floor = estimate_noise_floor(audio)
+            self._set(("floor", key), floor)
+        return trim_to_speech(audio, floor)
@@ -0,0 +1,154 @@
+"""
+End-to-end load test of the verify and pronounce endpoints.
+
+    python -m benchmarks.bench_api [--concurrency 1 8 32] [--rounds 5] [--output results.json]
+    python -m benchmarks.bench_api --url http://127.0.0.1:8000 --concurrency 16
+
+Each virtual learner starts a session on --song, then for every word fetches
+/pronounce/{word}/audio and uploads that word's fixture to
+/verify/{song}/audio. Without --url the app in main.py is driven in-process
+through httpx's ASGI transport (no sockets); with --url the same scenario
+runs over HTTP against a live server.
+
+Fixtures are the song's words rendered offline with pyttsx3. Per-stage times
+come from the Server-Timing header. Results are JSON tagged with the git
+commit; pass --baseline with an earlier --output file to print the p50/p99
+change per endpoint and stage.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import time
+from collections import defaultdict
+
+import httpx
+
+from app.timing import parse_server_timing
+from benchmarks.common import summarize, to_wav_bytes
+from benchmarks.fixtures import render_words
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)  # endpoint -> seconds
+        self.stages = defaultdict(list)  # "endpoint.stage" -> seconds
+        self.errors = defaultdict(int)
+
+    async def request(self, client, endpoint, method, url, **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[endpoint] += 1
+        for stage, ms in parse_server_timing(response.headers.get("server-timing")).items():
+            self.stages[f"{endpoint}.{stage}"].append(ms / 1000)
+        return response
+
+
+async def learner(client, recorder, song, words, fixtures):
+    response = await recorder.request(client, "start_song", "POST", f"/start_song/{song}")
+    session_id = response.json()["session_id"]
+    for word in words:
+        await recorder.request(client, "pronounce_audio", "GET", f"/pronounce/{word}/audio")
+        await recorder.request(
+            client, "verify_audio", "POST", f"/verify/{song}/audio",
+            params={"session_id": session_id},
+            content=fixtures[word.lower()],
+            headers={"Content-Type": "audio/wav"},
+        )
+
+
+async def run_level(client, song, words, fixtures, concurrency, rounds):
+    recorder = Recorder()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(learner(client, recorder, song, words, fixtures) for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+
+    total = sum(len(v) for v in recorder.latencies.values())
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "requests_per_sec": round(total / wall, 2),
+        "verifies_per_sec": round(len(recorder.latencies["verify_audio"]) / wall, 2),
+        "errors": dict(recorder.errors),
+        "endpoints": {name: summarize(v) for name, v in recorder.latencies.items()},
+        "stages": {name: summarize(v) for name, v in sorted(recorder.stages.items())},
+    }
+
+
+def make_client(url):
+    if url:
+        return httpx.AsyncClient(base_url=url.rstrip("/"), timeout=120)
+    import main
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench", timeout=120)
+
+
+async def run(args):
+    async with make_client(args.url) as client:
+        words = (await client.get(f"/song/{args.song}")).json()["words"]
+        fixtures = {word: to_wav_bytes(audio) for word, audio in render_words([w.lower() for w in words]).items()}
+
+        # One untimed pass loads the models and fills the pronunciation cache
+        await learner(client, Recorder(), args.song, words, fixtures)
+        levels = [await run_level(client, args.song, words, fixtures, c, args.rounds) for c in args.concurrency]
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "mode": "http" if args.url else "in_process",
+        "song": args.song,
+        "rounds": args.rounds,
+        "levels": levels,
+    }
+
+
+def compare(report, baseline):
+    """p50/p99 change (ms) against a previous run, per concurrency level."""
+    previous = {level["concurrency"]: level for level in baseline["levels"]}
+    deltas = {}
+    for level in report["levels"]:
+        old = previous.get(level["concurrency"])
+        if old is None:
+            continue
+        rows = {}
+        for section in ("endpoints", "stages"):
+            for name, summary in level[section].items():
+                if name in old[section]:
+                    rows[name] = {
+                        q: round(summary[q] - old[section][name][q], 3) for q in ("p50_ms", "p99_ms")
+                    }
+        deltas[level["concurrency"]] = rows
+    return {"baseline_commit": baseline.get("commit"), "delta_ms": deltas}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default=None, help="base URL of a running server; in-process if omitted")
+    parser.add_argument("--song", default="song1")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--rounds", type=int, default=5, help="passes through the song per learner")
+    parser.add_argument("--output", default=None, help="also write the JSON report here")
+    parser.add_argument("--baseline", default=None, help="earlier --output file to compare against")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report, json.load(f))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Latency, real-time factor and word accuracy of each ASR backend on the
+same fixture corpus.
+
+    python -m benchmarks.bench_asr [--backends whisper wav2vec2 deepgram assemblyai] [--remote-url URL]
+
+Fixtures are the catalog words rendered offline with pyttsx3. Unless
+--remote-url is given, the Deepgram and AssemblyAI adapters are pointed at a
+local mock server (benchmarks/mock_asr_server.py), so their numbers measure
+the client path plus the mock's simulated latency, not the real services.
+"""
+import argparse
+import json
+
+from app.asr import AssemblyAIBackend, DeepgramBackend, get_asr_backend
+from app.audio import SAMPLE_RATE
+from app.scoring import normalize_text
+from benchmarks.common import summarize, timed
+from benchmarks.fixtures import render_words
+from benchmarks.mock_asr_server import corpus_from_fixtures, start_mock_server
+
+
+def run_backend(backend, fixtures):
+    latencies, correct, audio_seconds = [], 0, 0.0
+    for word, audio in fixtures.items():
+        transcript, elapsed = timed(backend.transcribe, audio)
+        latencies.append(elapsed)
+        audio_seconds += len(audio) / SAMPLE_RATE
+        correct += word.lower() in normalize_text(transcript.text).split()
+    report = summarize(latencies)
+    # Processing time per second of audio; < 1 is faster than real time
+    report["rtf"] = round(sum(latencies) / max(audio_seconds, 1e-9), 4)
+    report["word_accuracy"] = round(correct / len(fixtures), 4)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["whisper", "wav2vec2", "deepgram", "assemblyai"])
+    parser.add_argument("--remote-url", help="real or stand-in API base URL for the remote backends")
+    parser.add_argument("--mock-latency-ms", type=float, default=150.0)
+    args = parser.parse_args()
+
+    fixtures = render_words()
+    server = None
+    remote_url = args.remote_url
+    if remote_url is None and {"deepgram", "assemblyai"} & set(args.backends):
+        server = start_mock_server(corpus_from_fixtures(fixtures), latency_ms=args.mock_latency_ms)
+        remote_url = server.url
+
+    report = {}
+    for name in args.backends:
+        if name == "deepgram":
+            backend = DeepgramBackend(base_url=remote_url)
+        elif name == "assemblyai":
+            backend = AssemblyAIBackend(base_url=remote_url, poll_interval=0.05)
+        else:
+            backend = get_asr_backend(name)
+        # First call loads the model; keep it out of the numbers
+        backend.transcribe(next(iter(fixtures.values())))
+        report[name] = run_backend(backend, fixtures)
+
+    if server is not None:
+        server.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
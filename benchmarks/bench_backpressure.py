@@ -0,0 +1,114 @@
+"""
+Load test of the bounded verify pool: saturate /verify/{song}/audio and
+measure the cheap endpoints at the same time.
+
+    python -m benchmarks.bench_backpressure [--verifiers 64] [--seconds 20]
+    python -m benchmarks.bench_backpressure --url http://127.0.0.1:8000
+
+--verifiers clients upload the song's fixtures back to back (honouring
+Retry-After when they get a 429) while one prober polls /songs,
+/song/{song} and /next_word/{song}. The prober also runs alone first, so the
+report shows the cheap endpoints' latency idle versus under saturation,
+next to the verify status counts and the /inference queue depth seen.
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter, defaultdict
+
+from benchmarks.bench_api import make_client
+from benchmarks.common import summarize, to_wav_bytes
+from benchmarks.fixtures import render_words
+
+PROBES = ("/songs", "/song/{song}", "/next_word/{song}")
+
+
+async def prober(client, song, deadline, interval):
+    latencies = defaultdict(list)
+    depths = []
+    while time.perf_counter() < deadline:
+        for probe in PROBES:
+            start = time.perf_counter()
+            await client.get(probe.format(song=song))
+            latencies[probe].append(time.perf_counter() - start)
+        stats = (await client.get("/inference")).json()
+        depths.append(stats["queued"])
+        await asyncio.sleep(interval)
+    return latencies, depths
+
+
+async def verifier(client, song, fixtures, deadline, statuses, verify_latencies, retry_afters):
+    session_id = (await client.post(f"/start_song/{song}")).json()["session_id"]
+    words = list(fixtures)
+    i = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.post(
+            f"/verify/{song}/audio",
+            params={"session_id": session_id},
+            content=fixtures[words[i % len(words)]],
+            headers={"Content-Type": "audio/wav"},
+        )
+        statuses[response.status_code] += 1
+        if response.status_code == 429:
+            retry_after = float(response.headers.get("retry-after", "1"))
+            retry_afters.append(retry_after)
+            await asyncio.sleep(retry_after)
+            continue
+        verify_latencies.append(time.perf_counter() - start)
+        i += 1
+
+
+async def run(args):
+    async with make_client(args.url) as client:
+        words = (await client.get(f"/song/{args.song}")).json()["words"]
+        fixtures = {word: to_wav_bytes(audio) for word, audio in render_words([w.lower() for w in words]).items()}
+        # Load the models before anything is timed
+        session_id = (await client.post(f"/start_song/{args.song}")).json()["session_id"]
+        await client.post(
+            f"/verify/{args.song}/audio", params={"session_id": session_id},
+            content=next(iter(fixtures.values())), headers={"Content-Type": "audio/wav"},
+        )
+
+        idle, _ = await prober(client, args.song, time.perf_counter() + args.idle_seconds, args.probe_interval)
+
+        statuses, verify_latencies, retry_afters = Counter(), [], []
+        deadline = time.perf_counter() + args.seconds
+        loaded, depths = (await asyncio.gather(
+            prober(client, args.song, deadline, args.probe_interval),
+            *(verifier(client, args.song, fixtures, deadline, statuses, verify_latencies, retry_afters)
+              for _ in range(args.verifiers)),
+        ))[0]
+        inference = (await client.get("/inference")).json()
+
+    return {
+        "mode": "http" if args.url else "in_process",
+        "verifiers": args.verifiers,
+        "seconds": args.seconds,
+        "verify_status": {str(code): n for code, n in sorted(statuses.items())},
+        "verifies_per_sec": round(len(verify_latencies) / args.seconds, 2),
+        "verify_ok": summarize(verify_latencies),
+        "retry_after_s": {"min": min(retry_afters), "max": max(retry_afters)} if retry_afters else None,
+        "queue_depth": {"max": max(depths), "mean": round(sum(depths) / len(depths), 1)} if depths else None,
+        "inference": inference,
+        "probes_idle": {name: summarize(v) for name, v in idle.items()},
+        "probes_saturated": {name: summarize(v) for name, v in loaded.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default=None, help="base URL of a running server; in-process if omitted")
+    parser.add_argument("--song", default="song1")
+    parser.add_argument("--verifiers", type=int, default=64, help="concurrent verify clients")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--idle-seconds", type=float, default=5)
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Throughput and tail latency of per-request Whisper decoding versus the shared
+micro-batching worker.
+
+    python -m benchmarks.bench_batching [--model base] [--clients 1 8 32] [--per-client 4]
+
+Each client thread sends its utterances back to back. The "sequential" mode
+calls whisper.decode per request (what every /verify handler used to do), the
+"batched" mode goes through app.batching.BatchTranscriber.
+"""
+import argparse
+import json
+import threading
+import time
+
+import torch
+import whisper
+
+from app.batching import BatchTranscriber
+from benchmarks.common import summarize, synthetic_utterance
+
+
+def run_clients(n_clients, per_client, fn, audios):
+    latencies = []
+    lock = threading.Lock()
+
+    def client(idx):
+        for i in range(per_client):
+            audio = audios[(idx + i) % len(audios)]
+            start = time.perf_counter()
+            fn(audio)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(n_clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    stats = summarize(latencies)
+    stats["utterances_per_sec"] = round(len(latencies) / wall, 3)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--per-client", type=int, default=4)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=25)
+    args = parser.parse_args()
+
+    model = whisper.load_model(args.model)
+    audios = [synthetic_utterance(1.0 + 0.25 * i, seed=i) for i in range(4)]
+
+    options = whisper.DecodingOptions(language="en", without_timestamps=True, fp16=model.device.type == "cuda")
+    model_lock = threading.Lock()
+
+    def sequential(audio):
+        # One forward pass per request, as the handlers did before batching
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(audio)), n_mels=model.dims.n_mels)
+        with model_lock, torch.inference_mode():
+            return whisper.decode(model, mel.to(model.device), options)
+
+    batcher = BatchTranscriber(model, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+
+    # Warm up kernels for both code paths
+    sequential(audios[0])
+    batcher.transcribe(audios[0])
+
+    report = {"model": args.model, "max_batch_size": args.max_batch_size, "max_wait_ms": args.max_wait_ms, "results": []}
+    for n in args.clients:
+        for mode, fn in (("sequential", sequential), ("batched", batcher.transcribe)):
+            stats = run_clients(n, args.per_client, fn, audios)
+            stats.update({"clients": n, "mode": mode})
+            report["results"].append(stats)
+            print(f"{mode:>10} clients={n:<3} {stats['utterances_per_sec']:>8} utt/s  p99={stats['p99_ms']} ms")
+
+    batcher.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Decode + resample throughput: app.audio.load_audio versus the torchaudio +
+librosa combination VocalTranscriber used, and librosa.load.
+
+    python -m benchmarks.bench_decode [--seconds 180] [--repeat 5]
+
+Every method turns a 44.1 kHz stereo track (WAV, and MP3 when ffmpeg is
+available) into 16 kHz mono float32. Throughput is seconds of audio decoded
+per second of wall time.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+from app.audio import SAMPLE_RATE, load_audio
+from benchmarks.bench_separation import write_track
+from benchmarks.common import summarize
+
+
+def torchaudio_librosa(path):
+    import librosa
+    import torchaudio
+
+    wav, sr = torchaudio.load(path)
+    mono = wav.mean(dim=0).numpy()
+    return librosa.resample(mono, orig_sr=sr, target_sr=SAMPLE_RATE)
+
+
+def librosa_load(path):
+    import librosa
+
+    return librosa.load(path, sr=SAMPLE_RATE, mono=True)[0]
+
+
+def load_audio_bytes(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    return load_audio(data)
+
+
+METHODS = {
+    "torchaudio+librosa.resample": torchaudio_librosa,
+    "librosa.load": librosa_load,
+    "load_audio(path)": load_audio,
+    "load_audio(bytes)": load_audio_bytes,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=180)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_decode_")
+    report = {"track_seconds": args.seconds, "formats": {}}
+    try:
+        files = {"wav": os.path.join(workdir, "track.wav")}
+        write_track(files["wav"], args.seconds)
+        if shutil.which("ffmpeg"):
+            files["mp3"] = os.path.join(workdir, "track.mp3")
+            subprocess.run(
+                ["ffmpeg", "-nostdin", "-v", "error", "-i", files["wav"], "-b:a", "192k", files["mp3"]],
+                check=True,
+            )
+
+        for fmt, path in files.items():
+            rows = {}
+            for name, method in METHODS.items():
+                try:
+                    audio = method(path)  # warm-up, and checks the output
+                except ImportError as e:
+                    rows[name] = {"error": f"unavailable: {e}"}
+                    continue
+                latencies = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    method(path)
+                    latencies.append(time.perf_counter() - start)
+                rows[name] = summarize(latencies)
+                rows[name]["x_realtime"] = round(args.seconds / float(np.median(latencies)), 1)
+                rows[name]["output_samples"] = int(len(audio))
+            report["formats"][fmt] = rows
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
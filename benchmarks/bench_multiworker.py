@@ -0,0 +1,120 @@
+"""
+Multi-process load test for the shared session state: several worker
+processes advance the same sessions concurrently, and every successful
+advance must show up in the final positions (no lost updates).
+
+    python -m benchmarks.bench_multiworker [--workers 8] [--sessions 50] [--ops 2000]
+
+Backend mode drives app.state.SQLiteStateBackend directly from N processes.
+HTTP mode drives vocals.py running under several uvicorn workers:
+
+    STATE_BACKEND=sqlite uvicorn vocals:app --workers 4 --port 8001
+    python -m benchmarks.bench_multiworker --url http://127.0.0.1:8001 --sessions 200 --ops 20
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from app.state import SQLiteStateBackend
+
+SONG_LENGTH = 10_000_000  # long enough that no session completes during the test
+
+
+def backend_worker(args):
+    db_path, session_ids, n_ops, seed, conditional = args
+    backend = SQLiteStateBackend(db_path)
+    rng = random.Random(seed)
+    advanced = 0
+    for _ in range(n_ops):
+        session_id = rng.choice(session_ids)
+        expected = None
+        if conditional:
+            # Read-then-compare-and-advance, as the verify handlers do
+            expected = backend.get(session_id).current_position
+        if backend.advance(session_id, SONG_LENGTH, expected_position=expected) is not None:
+            advanced += 1
+    return advanced
+
+
+def run_backend(args):
+    db_path = os.path.join(tempfile.mkdtemp(prefix="state_bench_"), "state.db")
+    backend = SQLiteStateBackend(db_path)
+    session_ids = [backend.create("twinkle") for _ in range(args.sessions)]
+
+    jobs = [(db_path, session_ids, args.ops, seed, args.conditional) for seed in range(args.workers)]
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        advanced = pool.map(backend_worker, jobs)
+    wall = time.perf_counter() - start
+
+    final_total = sum(backend.get(s).current_position for s in session_ids)
+    return {
+        "mode": "backend",
+        "workers": args.workers,
+        "attempted": args.workers * args.ops,
+        "advanced": sum(advanced),
+        "final_positions_total": final_total,
+        "lost_updates": sum(advanced) - final_total,
+        "updates_per_sec": round(args.workers * args.ops / wall),
+    }
+
+
+def http_json(method, url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req) as res:
+        return json.loads(res.read())
+
+
+def run_http(args):
+    base = args.url.rstrip("/")
+    session_ids = [http_json("POST", f"{base}/start_song/abc")["session_id"] for _ in range(args.sessions)]
+    rng = random.Random(0)
+    plan = [rng.choice(session_ids) for _ in range(args.workers * args.ops)]
+
+    def attempt(session_id):
+        res = http_json("POST", f"{base}/verify/{session_id}", {"is_correct": True})
+        return res["message"].startswith("Pronunciation correct")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.workers * 4) as pool:
+        advanced = sum(pool.map(attempt, plan))
+    wall = time.perf_counter() - start
+
+    final_total = 0
+    for session_id in session_ids:
+        progress = http_json("GET", f"{base}/song_progress/{session_id}")
+        final_total += progress["current_position"]
+    return {
+        "mode": "http",
+        "requests": len(plan),
+        "advanced": advanced,
+        "final_positions_total": final_total,
+        "lost_updates": advanced - final_total,
+        "requests_per_sec": round(len(plan) / wall),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--ops", type=int, default=2000, help="operations per worker")
+    parser.add_argument("--conditional", action="store_true", help="use compare-and-advance like /verify in main.py")
+    parser.add_argument("--url", default=None, help="base URL of vocals.py served with several workers")
+    args = parser.parse_args()
+
+    report = run_http(args) if args.url else run_backend(args)
+    print(json.dumps(report, indent=2))
+    if report["lost_updates"] != 0:
+        raise SystemExit("lost progress updates detected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Phonetic index lookup versus per-call SequenceMatcher.
+
+    python -m benchmarks.bench_phonetic [--repeat 2000]
+
+Each case is a transcription, the word the learner was asked for, and
+whether it should pass. SequenceMatcher is timed both for the expected word
+alone (what /verify does today) and against every song word (what producing
+a best_match would take); the index does both in one matrix product.
+"""
+import argparse
+import json
+import time
+
+from app.phonetics import PhoneticIndex
+from app.scoring import similarity_ratio
+from benchmarks.common import summarize
+
+SONGS = {
+    "twinkle": ["Twinkle", "twinkle", "little", "star", "how", "I", "wonder", "what", "you", "are"],
+    "abc": ["A", "B", "C", "D", "E", "F", "G", "H", "I", "J", "K", "L", "M", "N", "O", "P"],
+    "row_boat": ["Row", "row", "row", "your", "boat", "gently", "down", "the", "stream"],
+}
+
+# (song, recognized text, expected word, should pass)
+CASES = [
+    ("twinkle", "twinkle", "twinkle", True),
+    ("twinkle", "Twinkle.", "twinkle", True),
+    ("twinkle", "eye", "I", True),
+    ("twinkle", "I", "I", True),
+    ("twinkle", "u", "you", True),
+    ("twinkle", "r", "are", True),
+    ("twinkle", "little", "star", False),
+    ("twinkle", "how", "what", False),
+    ("abc", "see", "C", True),
+    ("abc", "bee", "B", True),
+    ("abc", "Jay.", "J", True),
+    ("abc", "kay", "K", True),
+    ("abc", "oh", "O", True),
+    ("abc", "pee", "P", True),
+    ("abc", "be", "D", False),
+    ("abc", "ay", "E", False),
+    ("row_boat", "roe", "row", True),
+    ("row_boat", "you're", "your", True),
+    ("row_boat", "gentle", "gently", True),
+    ("row_boat", "bolt", "boat", False),
+    ("row_boat", "stream", "down", False),
+    ("row_boat", "Town.", "down", False),
+    ("abc", "T.", "D", False),
+    ("abc", "Zee.", "C", False),
+    ("twinkle", "Wet", "what", False),
+    ("twinkle", "twinkle twinkle little star", "star", False),
+    ("row_boat", "gently down the stream", "the", False),
+]
+
+
+def sequence_matcher_expected(text, expected):
+    return similarity_ratio(expected.lower(), text.lower().strip(".")) >= 0.8
+
+
+def sequence_matcher_best(text, expected, words):
+    text = text.lower().strip(".")
+    scores = {word.lower(): similarity_ratio(word.lower(), text) for word in words}
+    return max(scores, key=scores.get), scores[expected.lower()] >= 0.8
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000, help="timed passes over the cases")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    indexes = {song: PhoneticIndex(words) for song, words in SONGS.items()}
+    build_ms = (time.perf_counter() - start) * 1000
+
+    methods = {
+        "sequence_matcher_expected": lambda song, text, expected: sequence_matcher_expected(text, expected),
+        "sequence_matcher_best_match": lambda song, text, expected: sequence_matcher_best(text, expected, SONGS[song])[1],
+        "phonetic_index": lambda song, text, expected: sequence_matcher_expected(text, expected) or indexes[song].match(text, expected).sounds_like,
+    }
+
+    report = {"index_build_ms": round(build_ms, 3)}
+    for name, method in methods.items():
+        correct = sum(method(song, text, expected) == should_pass for song, text, expected, should_pass in CASES)
+        latencies = []
+        for _ in range(args.repeat):
+            for song, text, expected, _ in CASES:
+                t = time.perf_counter()
+                method(song, text, expected)
+                latencies.append(time.perf_counter() - t)
+        report[name] = summarize(latencies)
+        report[name]["accuracy"] = round(correct / len(CASES), 4)
+
+    report["examples"] = {
+        f"{text} -> {expected}": indexes[song].match(text, expected)._asdict()
+        for song, text, expected, _ in CASES[:6]
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Round trips per song in word mode versus phrase mode.
+
+    python -m benchmarks.bench_phrase [--phrase-words 4 8] [--error-rate 0 0.1 0.2] [--runs 200]
+
+A simulated learner practises each of the built-in songs. Every attempt is one
+capture + transcription + HTTP round trip. Each sung word is wrong with
+probability --error-rate (a different word is heard), and now and then a
+filler word ("um") is heard too. Word mode moves one word per correct attempt;
+phrase mode sings the next --phrase-words lyrics and moves past the correct
+prefix found by app.alignment.align_phrase. prefix_accuracy is how often that
+prefix equals the true one; align is the alignment's own time per attempt.
+"""
+import argparse
+import json
+import random
+import time
+
+from app.alignment import align_phrase
+from benchmarks.bench_phonetic import SONGS
+from benchmarks.common import summarize
+
+WRONG_WORDS = ["banana", "table", "orange", "window", "purple"]
+
+
+def sing(lyrics, rng, error_rate):
+    """What the recogniser hears, and how many lyrics from the first were right."""
+    heard, prefix, still_correct = [], 0, True
+    for word in lyrics:
+        if rng.random() < 0.05:
+            heard.append("um")
+        if rng.random() < error_rate:
+            heard.append(rng.choice(WRONG_WORDS))
+            still_correct = False
+        else:
+            heard.append(word)
+            prefix += still_correct
+    return " ".join(heard), prefix
+
+
+def word_mode(words, rng, error_rate):
+    attempts, position = 0, 0
+    while position < len(words):
+        attempts += 1
+        position += rng.random() >= error_rate
+    return attempts
+
+
+def phrase_mode(words, rng, error_rate, phrase_words, align_latencies):
+    attempts, position, exact = 0, 0, 0
+    while position < len(words):
+        attempts += 1
+        text, true_prefix = sing(words[position:position + phrase_words], rng, error_rate)
+        start = time.perf_counter()
+        alignment = align_phrase(words[position:position + phrase_words], text)
+        align_latencies.append(time.perf_counter() - start)
+        exact += alignment.correct_prefix == true_prefix
+        position += alignment.correct_prefix
+    return attempts, exact
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--phrase-words", type=int, nargs="+", default=[4, 8])
+    parser.add_argument("--error-rate", type=float, nargs="+", default=[0.0, 0.1, 0.2])
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    songs = SONGS
+    report = []
+    for error_rate in args.error_rate:
+        rng = random.Random(args.seed)
+        word_attempts = sum(word_mode(words, rng, error_rate) for _ in range(args.runs) for words in songs.values())
+        row = {
+            "error_rate": error_rate,
+            "word_mode_attempts_per_song": round(word_attempts / (args.runs * len(songs)), 2),
+        }
+        for phrase_words in args.phrase_words:
+            rng = random.Random(args.seed)
+            align_latencies, attempts, exact = [], 0, 0
+            for _ in range(args.runs):
+                for words in songs.values():
+                    song_attempts, song_exact = phrase_mode(words, rng, error_rate, phrase_words, align_latencies)
+                    attempts += song_attempts
+                    exact += song_exact
+            row[f"phrase_{phrase_words}"] = {
+                "attempts_per_song": round(attempts / (args.runs * len(songs)), 2),
+                "reduction": round(word_attempts / max(attempts, 1), 2),
+                "prefix_accuracy": round(exact / max(attempts, 1), 4),
+                "align": summarize(align_latencies),
+            }
+        report.append(row)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
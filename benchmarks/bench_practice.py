@@ -0,0 +1,178 @@
+"""
+Many concurrent practices: asyncio scheduler versus a thread per practice.
+
+    python -m benchmarks.bench_practice [--practices 100 1000 5000] [--service-ms 5] [--error-rate 0.1]
+
+Each run is a fresh process. In "scheduler" mode, N practices of the
+twinkle song run on app.practice.PracticeScheduler. A client per practice
+follows its event stream and submits the next attempt as soon as the
+practice is listening. In "threads" mode, each practice is a thread that
+blocks while it waits for attempts, like the old /start/{song_name} loop.
+Verification is a stand-in that holds an inference-pool worker for
+--service-ms, so the numbers show the scheduling overhead, not the model's.
+Attempts are wrong with probability --error-rate. Reported: wall time,
+attempts per second, submit-to-verdict latency, threads and resident memory
+per practice.
+"""
+import argparse
+import asyncio
+import json
+import os
+import queue
+import random
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.bench_phonetic import SONGS
+from benchmarks.common import summarize
+
+WORDS = SONGS["twinkle"]
+
+
+def rss_mb():
+    """Current resident memory (not the peak, which only grows)."""
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def attempt(expected, rng, error_rate):
+    return "banana" if rng.random() < error_rate else expected.lower()
+
+
+def make_verify(service_s):
+    def verify(practice, utterance, expected):
+        time.sleep(service_s)
+        return {"recognized": utterance, "correct": utterance == expected[0].lower()}
+    return verify
+
+
+async def scheduler_run(args):
+    from app.executor import InferenceExecutor
+    from app.practice import PracticeScheduler
+    from app.state import MemoryStateBackend
+
+    executor = InferenceExecutor(args.workers, args.workers)
+    scheduler = PracticeScheduler(
+        MemoryStateBackend(), executor, make_verify(args.service_ms / 1000), max_practices=args.practices,
+    )
+    rng = random.Random(0)
+    latencies = []
+
+    async def client(practice):
+        submitted = None
+        async for item in practice.events():
+            if item is None:
+                continue
+            _, event, data = item
+            if event == "state" and data["state"] == "listening":
+                submitted = time.perf_counter()
+                practice.submit(attempt(data["words"][0], rng, args.error_rate))
+            elif event == "verdict":
+                latencies.append(time.perf_counter() - submitted)
+
+    before = rss_mb()
+    start = time.perf_counter()
+    practices = await asyncio.gather(*(scheduler.start("twinkle", WORDS) for _ in range(args.practices)))
+    clients = [asyncio.create_task(client(practice)) for practice in practices]
+    await asyncio.sleep(0)
+    started_mb = rss_mb()
+    await asyncio.gather(*clients)
+    elapsed = time.perf_counter() - start
+    threads = threading.active_count()  # the loop plus the pool's workers
+    completed = sum(practice.state == "completed" for practice in practices)
+    await scheduler.shutdown()
+    executor.shutdown()
+    return elapsed, latencies, completed, threads, started_mb - before
+
+
+def threads_run(args):
+    rng = random.Random(0)
+    rng_lock = threading.Lock()
+    verify_slots = threading.BoundedSemaphore(args.workers)
+    verify = make_verify(args.service_ms / 1000)
+    latencies = []
+    completed = []
+    ready = threading.Barrier(args.practices + 1)
+
+    def practice_thread():
+        inbox = queue.Queue(maxsize=1)
+        ready.wait()
+        position = 0
+        while position < len(WORDS):
+            # The learner's attempt arrives; the thread was blocked for it
+            with rng_lock:
+                inbox.put(attempt(WORDS[position], rng, args.error_rate))
+            submitted = time.perf_counter()
+            utterance = inbox.get()
+            with verify_slots:
+                verdict = verify(None, utterance, [WORDS[position]])
+            latencies.append(time.perf_counter() - submitted)
+            position += verdict["correct"]
+        completed.append(1)
+
+    before = rss_mb()
+    start = time.perf_counter()
+    threads = [threading.Thread(target=practice_thread, daemon=True) for _ in range(args.practices)]
+    for thread in threads:
+        thread.start()
+    started_mb = rss_mb()
+    active = threading.active_count()
+    ready.wait()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies, len(completed), active, started_mb - before
+
+
+def child(mode, args):
+    if mode == "scheduler":
+        elapsed, latencies, completed, threads, memory = asyncio.run(scheduler_run(args))
+    else:
+        elapsed, latencies, completed, threads, memory = threads_run(args)
+    return {
+        "mode": mode,
+        "practices": args.practices,
+        "completed": completed,
+        "wall_s": round(elapsed, 2),
+        "attempts_per_s": round(len(latencies) / elapsed, 1),
+        "submit_to_verdict": summarize(latencies),
+        "threads": threads,
+        "kb_per_practice": round(memory * 1024 / args.practices, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--practices", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--modes", nargs="+", default=["scheduler", "threads"])
+    parser.add_argument("--service-ms", type=float, default=5)
+    parser.add_argument("--workers", type=int, default=8, help="inference pool size")
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        args.practices = args.practices[0]
+        print(json.dumps(child(args.child, args)))
+        return
+
+    report = []
+    for practices in args.practices:
+        for mode in args.modes:
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_practice", "--child", mode, "--practices", str(practices),
+                 "--service-ms", str(args.service_ms), "--workers", str(args.workers),
+                 "--error-rate", str(args.error_rate)],
+                capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                report.append({"mode": mode, "practices": practices, "error": proc.stderr.strip().splitlines()[-1:]})
+                continue
+            report.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Memory per worker: every worker loading its own models versus preload-and-fork.
+
+    python -m benchmarks.bench_prefork [--workers 1 4 8] [--models whisper] [--modes per-process fork fork-shm]
+
+Each configuration runs in a fresh leader process:
+- per-process: N separate interpreters each load the models, as
+  `uvicorn --workers N` does
+- fork: the leader loads them once with app.prefork.preload and forks N workers
+- fork-shm: the same, with the weights moved into torch shared memory first
+Every worker then builds its own transcriber and runs a warm-up transcription
+(and a Wav2Vec2 one, if loaded), so per-worker inference state is counted
+too. Once all workers are ready, the RSS and PSS of each worker (and of the
+leader, in the fork modes) are read from /proc/<pid>/smaps_rollup. RSS counts
+shared weights once per worker; total_pss_mb is what the box actually spends.
+"""
+import argparse
+import json
+import os
+import select
+import signal
+import subprocess
+import sys
+import time
+
+from app.prefork import fork_worker, freeze, init_worker, preload, process_memory
+from app.registry import registry
+from benchmarks.common import synthetic_utterance
+
+
+def warm_up(models):
+    audio = synthetic_utterance()
+    if "whisper" in models:
+        registry.get("transcriber").transcribe(audio)
+    if "wav2vec2" in models:
+        from app.asr import Wav2Vec2Backend
+        Wav2Vec2Backend().transcribe(audio)
+
+
+def worker(workers, models, ready_fd):
+    init_worker(workers)
+    for name in models:
+        registry.get(name)  # already loaded in the fork modes
+    warm_up(models)
+    os.write(ready_fd, b"r")
+    signal.pause()  # hold the memory until the leader has measured it
+
+
+def wait_ready(read_fd, workers, timeout):
+    ready, deadline = 0, time.monotonic() + timeout
+    while ready < workers:
+        readable, _, _ = select.select([read_fd], [], [], max(deadline - time.monotonic(), 0))
+        if not readable:
+            raise RuntimeError(f"only {ready} of {workers} workers were ready after {timeout}s")
+        ready += len(os.read(read_fd, workers))
+
+
+def leader(mode, workers, models, timeout):
+    read_fd, write_fd = os.pipe()
+    procs = []
+    start = time.perf_counter()
+    if mode == "per-process":
+        for _ in range(workers):
+            procs.append(subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.bench_prefork", "--worker", str(workers), ",".join(models), str(write_fd)],
+                pass_fds=(write_fd,),
+            ))
+        pids = [proc.pid for proc in procs]
+    else:
+        preload(models, shared_memory=mode == "fork-shm")
+        freeze()
+        pids = [fork_worker(worker, workers, models, write_fd) for _ in range(workers)]
+    os.close(write_fd)
+    try:
+        wait_ready(read_fd, workers, timeout)
+        ready_s = time.perf_counter() - start
+        per_worker = [process_memory(pid) for pid in pids]
+        parent = process_memory() if mode != "per-process" else None
+    finally:
+        for pid in pids:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+
+    total_pss = sum(memory["pss_mb"] for memory in per_worker) + (parent["pss_mb"] if parent else 0)
+    return {
+        "mode": mode,
+        "workers": workers,
+        "models": models,
+        "ready_s": round(ready_s, 2),
+        "worker_rss_mb": round(sum(memory["rss_mb"] for memory in per_worker) / workers, 1),
+        "worker_pss_mb": round(sum(memory["pss_mb"] for memory in per_worker) / workers, 1),
+        "worker_shared_mb": round(sum(memory["shared_mb"] for memory in per_worker) / workers, 1),
+        "parent": parent,
+        "total_pss_mb": round(total_pss, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--models", nargs="+", default=["whisper"], help="any of whisper, demucs, wav2vec2")
+    parser.add_argument("--modes", nargs="+", default=["per-process", "fork", "fork-shm"])
+    parser.add_argument("--timeout", type=float, default=900, help="seconds to wait for the workers to load")
+    parser.add_argument("--leader", nargs=2, help=argparse.SUPPRESS)
+    parser.add_argument("--worker", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        workers, models, ready_fd = args.worker
+        worker(int(workers), models.split(","), int(ready_fd))
+        return
+    if args.leader:
+        mode, workers = args.leader
+        print(json.dumps(leader(mode, int(workers), args.models, args.timeout)))
+        return
+
+    report = []
+    for workers in args.workers:
+        baseline = None
+        for mode in args.modes:
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_prefork", "--leader", mode, str(workers),
+                 "--models", *args.models, "--timeout", str(args.timeout)],
+                capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                report.append({"mode": mode, "workers": workers, "error": proc.stderr.strip().splitlines()[-1:]})
+                continue
+            row = json.loads(proc.stdout.strip().splitlines()[-1])
+            if mode == "per-process":
+                baseline = row
+            elif baseline is not None:
+                row["pss_saved_mb"] = round(baseline["total_pss_mb"] - row["total_pss_mb"], 1)
+                row["pss_ratio"] = round(row["total_pss_mb"] / max(baseline["total_pss_mb"], 1e-9), 3)
+            report.append(row)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Accuracy versus speed and memory of the CPU inference profiles.
+
+    python -m benchmarks.bench_quantization [--whisper-models tiny base small] [--quantization none int8]
+                                            [--threads 0 4] [--wav2vec2]
+
+Every combination is loaded through the model registry in its own process
+(WHISPER_MODEL / MODEL_QUANTIZATION / TORCH_THREADS set in the environment),
+so load time, weight size and resident memory are measured cleanly. Fixtures
+are the catalog words rendered offline with pyttsx3:
+- verify_accuracy: each word verified against itself and a neighbour
+  (VERIFY_MODE as configured)
+- word_accuracy: the word appears in the free transcription
+Latencies are per utterance, one at a time. Each row is compared with the
+fp32 run of the same model and thread count.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from app.scoring import normalize_text
+from benchmarks.bench_separation import peak_rss_mb
+from benchmarks.common import summarize, timed
+
+
+def whisper_child(fixtures):
+    from app.batching import BatchTranscriber
+    from app.cpu_profile import model_bytes
+    from app.registry import registry
+    from app.scoring import verify_expected_word
+    from benchmarks.fixtures import verification_cases
+
+    start = time.perf_counter()
+    model = registry.get("whisper")
+    load_s = time.perf_counter() - start
+    # One utterance at a time, no batching window, so latency is the model's
+    transcriber = BatchTranscriber(model, max_batch_size=1, max_wait_ms=0)
+    transcriber.transcribe(next(iter(fixtures.values())))  # warm-up
+
+    verify_latencies, hits = [], 0
+    cases = verification_cases(fixtures)
+    for audio, expected, should_pass in cases:
+        verdict, elapsed = timed(verify_expected_word, transcriber, audio, expected)
+        verify_latencies.append(elapsed)
+        hits += verdict["correct"] == should_pass
+
+    transcribe_latencies, correct = [], 0
+    for word, audio in fixtures.items():
+        result, elapsed = timed(transcriber.transcribe, audio)
+        transcribe_latencies.append(elapsed)
+        correct += word.lower() in normalize_text(result["text"]).split()
+    transcriber.close()
+    return {
+        "load_s": round(load_s, 2),
+        "weights_mb": round(model_bytes(model) / 2 ** 20, 1),
+        "peak_rss_mb": peak_rss_mb(),
+        "verify": summarize(verify_latencies),
+        "verify_accuracy": round(hits / len(cases), 4),
+        "transcribe": summarize(transcribe_latencies),
+        "word_accuracy": round(correct / len(fixtures), 4),
+    }
+
+
+def wav2vec2_child(fixtures):
+    from app.asr import Wav2Vec2Backend
+    from app.cpu_profile import model_bytes
+    from app.registry import registry
+
+    start = time.perf_counter()
+    _, model = registry.get("wav2vec2")
+    load_s = time.perf_counter() - start
+    backend = Wav2Vec2Backend()
+    backend.transcribe(next(iter(fixtures.values())))  # warm-up
+
+    latencies, correct = [], 0
+    for word, audio in fixtures.items():
+        transcript, elapsed = timed(backend.transcribe, audio)
+        latencies.append(elapsed)
+        correct += word.lower() in normalize_text(transcript.text).split()
+    return {
+        "load_s": round(load_s, 2),
+        "weights_mb": round(model_bytes(model) / 2 ** 20, 1),
+        "peak_rss_mb": peak_rss_mb(),
+        "transcribe": summarize(latencies),
+        "word_accuracy": round(correct / len(fixtures), 4),
+    }
+
+
+def run_child(engine, fixtures_path, env):
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_quantization", "--child", engine, fixtures_path],
+        env=dict(os.environ, **env), capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        return {"error": (proc.stderr.strip().splitlines() or [f"exit code {proc.returncode}"])[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(row, baseline):
+    """Speed-up, size ratio and accuracy change against the fp32 row."""
+    if "error" in row or baseline is None or "error" in baseline:
+        return None
+    delta = {
+        "transcribe_speedup": round(baseline["transcribe"]["mean_ms"] / max(row["transcribe"]["mean_ms"], 1e-9), 2),
+        "weights_ratio": round(row["weights_mb"] / max(baseline["weights_mb"], 1e-9), 3),
+        "rss_saved_mb": round(baseline["peak_rss_mb"] - row["peak_rss_mb"], 1),
+        "word_accuracy_change": round(row["word_accuracy"] - baseline["word_accuracy"], 4),
+    }
+    if "verify" in row:
+        delta["verify_speedup"] = round(baseline["verify"]["mean_ms"] / max(row["verify"]["mean_ms"], 1e-9), 2)
+        delta["verify_accuracy_change"] = round(row["verify_accuracy"] - baseline["verify_accuracy"], 4)
+    return delta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--whisper-models", nargs="+", default=["tiny", "base", "small"])
+    parser.add_argument("--quantization", nargs="+", default=["none", "int8"])
+    parser.add_argument("--threads", type=int, nargs="+", default=[0], help="TORCH_THREADS values (0 = torch default)")
+    parser.add_argument("--wav2vec2", action="store_true", help="also run WAV2VEC2_MODEL")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        engine, fixtures_path = args.child
+        with np.load(fixtures_path) as data:
+            fixtures = {word: data[word] for word in data.files}
+        print(json.dumps(whisper_child(fixtures) if engine == "whisper" else wav2vec2_child(fixtures)))
+        return
+
+    from benchmarks.fixtures import render_words
+
+    fixtures_path = os.path.join(tempfile.mkdtemp(prefix="bench_quantization_"), "fixtures.npz")
+    np.savez(fixtures_path, **render_words())
+
+    runs = [("whisper", model) for model in args.whisper_models]
+    if args.wav2vec2:
+        runs.append(("wav2vec2", None))
+    report = []
+    try:
+        for engine, model in runs:
+            for threads in args.threads:
+                baseline = None
+                for quantization in args.quantization:
+                    env = {"MODEL_QUANTIZATION": quantization, "TORCH_THREADS": str(threads)}
+                    if model:
+                        env["WHISPER_MODEL"] = model
+                    row = {"engine": engine, "model": model, "quantization": quantization, "threads": threads}
+                    row.update(run_child(engine, fixtures_path, env))
+                    if quantization == "none":
+                        baseline = row
+                    else:
+                        row["vs_fp32"] = compare(row, baseline)
+                    report.append(row)
+    finally:
+        os.remove(fixtures_path)
+        os.rmdir(os.path.dirname(fixtures_path))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Batch transcription throughput of app.remote_asr against the local stand-in
+server, versus the one-request-at-a-time DeepgramBackend.
+
+    python -m benchmarks.bench_remote_asr [--files 200] [--concurrency 1 4 8 16] [--provider deepgram]
+
+A directory of --files WAVs (the fixture words, repeated) is transcribed by
+RemoteASRClient.transcribe_directory at each concurrency level. The mock
+answers after --latency-ms, refuses requests beyond --server-limit with 429
++ Retry-After and fails --error-rate of them with 503, so the numbers include
+the client's retries. Every transcript is checked against the file's word;
+"connections" is how many TCP connections the server accepted.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from app.asr import DeepgramBackend
+from app.audio import SAMPLE_RATE, encode_wav
+from app.remote_asr import RemoteASRClient
+from benchmarks.fixtures import render_words
+from benchmarks.mock_asr_server import corpus_from_fixtures, start_mock_server
+
+
+def write_backlog(directory, fixtures, count):
+    """{path: expected word} for count WAV files cycling through the fixtures."""
+    words = list(fixtures)
+    expected = {}
+    for i in range(count):
+        word = words[i % len(words)]
+        path = os.path.join(directory, f"{i:05d}_{word}.wav")
+        with open(path, "wb") as f:
+            f.write(encode_wav(fixtures[word], SAMPLE_RATE))
+        expected[path] = word
+    return expected
+
+
+def sequential_baseline(server, fixtures, expected):
+    """The existing path: one blocking request (and connection) per file, no retries."""
+    backend = DeepgramBackend(api_key="bench", base_url=server.url)
+    correct, failed = 0, 0
+    start = time.perf_counter()
+    for word in expected.values():
+        try:
+            correct += backend.transcribe(fixtures[word]).text == word
+        except Exception:
+            failed += 1
+    return correct, failed, time.perf_counter() - start
+
+
+async def pooled(server, args, directory, concurrency):
+    async with RemoteASRClient(
+        args.provider, api_key="bench", base_url=server.url, max_concurrency=concurrency, poll_interval=0.05,
+    ) as client:
+        start = time.perf_counter()
+        results = await client.transcribe_directory(directory)
+        wall = time.perf_counter() - start
+        return results, dict(client.stats), wall
+
+
+def start_server(corpus, args):
+    return start_mock_server(
+        corpus, latency_ms=args.latency_ms, max_concurrent=args.server_limit, error_rate=args.error_rate,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--provider", choices=["deepgram", "assemblyai"], default="deepgram")
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    parser.add_argument("--server-limit", type=int, default=8, help="mock's concurrent request limit")
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    args = parser.parse_args()
+
+    fixtures = {word.lower(): audio for word, audio in render_words().items()}
+    corpus = corpus_from_fixtures(fixtures)
+    workdir = tempfile.mkdtemp(prefix="bench_remote_asr_")
+    report = {"files": args.files, "provider": args.provider, "server_limit": args.server_limit, "levels": []}
+    try:
+        expected = write_backlog(workdir, fixtures, args.files)
+
+        if args.provider == "deepgram":
+            server = start_server(corpus, args)
+            correct, failed, wall = sequential_baseline(server, fixtures, expected)
+            report["sequential_baseline"] = {
+                "files_per_sec": round(len(expected) / wall, 2),
+                "accuracy": round(correct / len(expected), 4),
+                "failed": failed,
+                "server": dict(server.counts),
+            }
+            server.shutdown()
+
+        for concurrency in args.concurrency:
+            server = start_server(corpus, args)
+            results, stats, wall = asyncio.run(pooled(server, args, workdir, concurrency))
+            failed = sum(isinstance(result, Exception) for result in results.values())
+            correct = sum(
+                not isinstance(result, Exception) and result.text == expected[path]
+                for path, result in results.items()
+            )
+            report["levels"].append({
+                "concurrency": concurrency,
+                "files_per_sec": round(len(results) / wall, 2),
+                "accuracy": round(correct / len(results), 4),
+                "failed": failed,
+                "client": stats,
+                "server": dict(server.counts),
+            })
+            server.shutdown()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
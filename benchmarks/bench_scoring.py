@@ -0,0 +1,60 @@
+"""
+Accuracy and latency of teacher-forced expected-word scoring versus the
+original transcribe + similarity_ratio >= 0.8 check.
+
+    python -m benchmarks.bench_scoring [--model base]
+
+Fixtures are the catalog words rendered offline with pyttsx3; each word is
+verified against itself (should pass) and against a different word (should fail).
+"""
+import argparse
+import json
+from difflib import SequenceMatcher
+
+import whisper
+
+from app.batching import BatchTranscriber
+from app.scoring import verify_expected_word
+from benchmarks.common import summarize, timed
+from benchmarks.fixtures import render_words, verification_cases
+
+
+def current_path(model, audio, expected_word):
+    # Exactly what the /verify handlers did before
+    recognized_text = model.transcribe(audio, fp16=False)["text"].strip().lower()
+    return SequenceMatcher(None, expected_word.lower(), recognized_text).ratio() >= 0.8
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default="base")
+    args = parser.parse_args()
+
+    model = whisper.load_model(args.model)
+    transcriber = BatchTranscriber(model, max_batch_size=1, max_wait_ms=0)
+    cases = verification_cases(render_words())
+
+    report = {}
+    fallbacks = 0
+    for name in ("transcribe_similarity", "forced"):
+        latencies, hits = [], 0
+        for audio, expected, should_pass in cases:
+            if name == "forced":
+                verdict, elapsed = timed(verify_expected_word, transcriber, audio, expected, "forced")
+                passed = verdict["correct"]
+                fallbacks += verdict["mode"] == "transcribed"
+            else:
+                passed, elapsed = timed(current_path, model, audio, expected)
+            latencies.append(elapsed)
+            hits += passed == should_pass
+        report[name] = summarize(latencies)
+        report[name]["accuracy"] = round(hits / len(cases), 4)
+
+    report["forced"]["fallback_rate"] = round(fallbacks / len(cases), 4)
+    report["speedup"] = round(report["transcribe_similarity"]["mean_ms"] / max(report["forced"]["mean_ms"], 1e-9), 2)
+    transcriber.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
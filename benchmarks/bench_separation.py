@@ -0,0 +1,100 @@
+"""
+Peak memory and wall time of vocal separation versus track length.
+
+    python -m benchmarks.bench_separation [--durations 30 60 120 240] [--modes chunked full] [--threads 4]
+
+Each (mode, duration) pair runs in a fresh process on a synthetic stereo
+track, so ru_maxrss is that run's own peak. "full" is the original
+single-forward-pass path and may run out of memory on long tracks; that is
+reported rather than aborting the run.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+
+def write_track(path, seconds, sample_rate=44100):
+    """A stereo 'song': a few detuned tones, a beat and some noise, 16-bit WAV."""
+    rng = np.random.default_rng(0)
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(2)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        # Written a second at a time so the fixture itself stays small in memory
+        for second in range(int(seconds)):
+            t = second + np.arange(sample_rate) / sample_rate
+            voice = 0.2 * np.sin(2 * np.pi * (220 + 20 * np.sin(2 * np.pi * 0.5 * t)) * t)
+            beat = 0.3 * np.exp(-((t * 2) % 1) * 20) * np.sin(2 * np.pi * 60 * t)
+            left = voice + beat + 0.01 * rng.standard_normal(sample_rate)
+            right = 0.8 * voice + beat + 0.01 * rng.standard_normal(sample_rate)
+            frames = np.stack([left, right], axis=1)
+            wf.writeframes((np.clip(frames, -1, 1) * 32767).astype("<i2").tobytes())
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20, 1)
+
+
+def child(path):
+    from vocal_transcriber import VocalTranscriber
+
+    transcriber = VocalTranscriber()
+    transcriber.separator  # load the model before timing
+    loaded_mb = peak_rss_mb()
+    start = time.perf_counter()
+    vocals, sr = transcriber.separate_vocals(path)
+    wall = time.perf_counter() - start
+    print(json.dumps({
+        "wall_s": round(wall, 2),
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_after_model_load_mb": loaded_mb,
+        "output_seconds": round(vocals.shape[-1] / sr, 2),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--durations", type=float, nargs="+", default=[30, 60, 120, 240])
+    parser.add_argument("--modes", nargs="+", default=["chunked", "full"])
+    parser.add_argument("--threads", type=int, default=0, help="SEPARATION_THREADS for the chunked mode")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="bench_separation_")
+    report = []
+    for seconds in args.durations:
+        path = os.path.join(workdir, f"track_{int(seconds)}s.wav")
+        write_track(path, seconds)
+        for mode in args.modes:
+            env = dict(os.environ, SEPARATION_MODE=mode, SEPARATION_THREADS=str(args.threads))
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_separation", "--child", path],
+                env=env, capture_output=True, text=True,
+            )
+            row = {"mode": mode, "track_seconds": seconds}
+            if proc.returncode == 0:
+                row.update(json.loads(proc.stdout.strip().splitlines()[-1]))
+                row["realtime_factor"] = round(row["wall_s"] / seconds, 3)
+            else:
+                row["error"] = (proc.stderr.strip().splitlines() or [f"exit code {proc.returncode}"])[-1]
+            report.append(row)
+        os.remove(path)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
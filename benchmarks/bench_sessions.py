@@ -0,0 +1,98 @@
+"""
+Memory and throughput of the session store at 100k+ live sessions, compared
+with the old dict of pydantic SessionData models.
+
+    python -m benchmarks.bench_sessions [--sessions 100000] [--threads 8] [--ops 200000]
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import tracemalloc
+
+from pydantic import BaseModel
+
+from app.sessions import SessionStore
+
+
+class SessionData(BaseModel):
+    # The record vocals.py used before app.sessions
+    song_id: str
+    current_position: int = 0
+    completed: bool = False
+
+
+def measure_memory(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    holder = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return holder, after - before
+
+
+def mixed_ops(store, ids, n_ops, n_threads):
+    """get + advance-under-lock on random sessions, with 1% creates, from several threads."""
+    per_thread = n_ops // n_threads
+
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(per_thread):
+            if rng.random() < 0.01:
+                store.create("twinkle")
+                continue
+            session = store.get(ids[rng.randrange(len(ids))])
+            if session is not None:
+                with session.lock:
+                    session.current_position += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return per_thread * n_threads / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=200_000)
+    args = parser.parse_args()
+
+    def build_store():
+        store = SessionStore(ttl=60, max_sessions=args.sessions * 2)
+        ids = [store.create("twinkle").session_id for _ in range(args.sessions)]
+        return store, ids
+
+    def build_dict():
+        return {f"session_{i + 1}": SessionData(song_id="twinkle") for i in range(args.sessions)}
+
+    (store, ids), store_bytes = measure_memory(build_store)
+    _, dict_bytes = measure_memory(build_dict)
+
+    ops_per_sec = mixed_ops(store, ids, args.ops, args.threads)
+
+    # Age every session past the TTL and time a full sweep
+    start = time.perf_counter()
+    evicted = store.sweep(now=time.monotonic() + 61)
+    sweep_s = time.perf_counter() - start
+
+    print(json.dumps({
+        "sessions": args.sessions,
+        "session_store_bytes_per_session": round(store_bytes / args.sessions, 1),
+        "pydantic_dict_bytes_per_session": round(dict_bytes / args.sessions, 1),
+        "session_store_total_mb": round(store_bytes / 2**20, 2),
+        "mixed_ops_per_sec": round(ops_per_sec),
+        "threads": args.threads,
+        "sweep_evicted": evicted,
+        "sweep_ms": round(sweep_s * 1000, 2),
+        "remaining_after_sweep": len(store),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
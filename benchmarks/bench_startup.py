@@ -0,0 +1,74 @@
+"""
+Server startup time: process start -> first /songs response, and -> first
+verify, for lazy loading with and without the background warmup.
+
+    python -m benchmarks.bench_startup [--app main:app] [--runs 3]
+
+Each run starts a fresh uvicorn process. The verify request uploads a
+synthetic utterance to /verify/song1/audio.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.common import synthetic_utterance, to_wav_bytes
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, start, timeout, data=None, headers=None):
+    while time.perf_counter() - start < timeout:
+        try:
+            req = urllib.request.Request(url, data=data, headers=headers or {}, method="POST" if data else "GET")
+            with urllib.request.urlopen(req, timeout=timeout) as res:
+                res.read()
+                return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.02)
+    raise TimeoutError(url)
+
+
+def one_run(app, warmup_models, timeout):
+    port = free_port()
+    env = dict(os.environ, WARMUP_MODELS=warmup_models)
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        songs_s = wait_for(f"{base}/songs", start, timeout)
+        wav = to_wav_bytes(synthetic_utterance(1.0))
+        verify_s = wait_for(f"{base}/verify/song1/audio", start, timeout, data=wav, headers={"Content-Type": "audio/wav"})
+        return {"first_songs_s": round(songs_s, 3), "first_verify_s": round(verify_s, 3)}
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", default="main:app")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    report = {}
+    for label, warmup in (("lazy", ""), ("background_warmup", "whisper,transcriber,tts")):
+        report[label] = [one_run(args.app, warmup, args.timeout) for _ in range(args.runs)]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
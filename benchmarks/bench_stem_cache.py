@@ -0,0 +1,74 @@
+"""
+Cold versus cached processing of the same track through VocalTranscriber.
+
+    python -m benchmarks.bench_stem_cache [--seconds 60]
+
+Reports the first (separate + transcribe) run, a repeat that hits the
+cached transcript, a separation that hits the cached stem, and a
+memory-mapped stem load against a full np.load read.
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from app.stem_cache import StemCache, stem_key
+from benchmarks.bench_separation import write_track
+from vocal_transcriber import VocalTranscriber
+
+
+def timed_ms(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, round((time.perf_counter() - start) * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=60)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_stem_cache_")
+    try:
+        track = os.path.join(workdir, "track.wav")
+        write_track(track, args.seconds)
+        cache = StemCache(os.path.join(workdir, "cache"))
+        transcriber = VocalTranscriber(cache=cache)
+        transcriber.separator, transcriber.model  # load models outside the timings
+
+        (_, stages), cold_ms = timed_ms(transcriber.transcribe_file, track)
+        (_, _), warm_ms = timed_ms(transcriber.transcribe_file, track)
+        # A fresh instance has to re-hash the file, as a new process would
+        (_, _), new_process_ms = timed_ms(VocalTranscriber(cache=StemCache(cache.cache_dir)).transcribe_file, track)
+        (vocals, _), stem_hit_ms = timed_ms(transcriber.separate_vocals, track)
+
+        stem_path = next(
+            os.path.join(cache.cache_dir, name) for name in os.listdir(cache.cache_dir)
+            if name.startswith(stem_key(cache.fingerprint(track)))
+        )
+        _, full_read_ms = timed_ms(np.load, stem_path)
+        _, mmap_load_ms = timed_ms(lambda p: np.load(p, mmap_mode="r"), stem_path)
+
+        report = {
+            "track_seconds": args.seconds,
+            "cold_ms": cold_ms,
+            "cold_stages_s": {k: round(v, 3) for k, v in stages.items()},
+            "cached_transcript_ms": warm_ms,
+            "cached_transcript_new_process_ms": new_process_ms,
+            "cached_stem_separate_ms": stem_hit_ms,
+            "stem_mb": round(vocals.nbytes / 2 ** 20, 1),
+            "stem_full_read_ms": full_read_ms,
+            "stem_mmap_load_ms": mmap_load_ms,
+            "speedup": round(cold_ms / max(warm_ms, 1e-6), 1),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
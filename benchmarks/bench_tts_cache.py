@@ -0,0 +1,42 @@
+"""
+Cost of a /pronounce audio request on a cold render, a disk-tier hit and a
+hot (in-memory) hit.
+
+    python -m benchmarks.bench_tts_cache [--words twinkle little star] [--repeats 200]
+"""
+import argparse
+import json
+import shutil
+import tempfile
+
+from app.tts import PronunciationCache, SpeechSynthesizer
+from benchmarks.common import summarize, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--words", nargs="+", default=["twinkle", "little", "star", "wonder"])
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="tts_bench_")
+    synthesizer = SpeechSynthesizer()
+    try:
+        cache = PronunciationCache(synthesizer, cache_dir=cache_dir)
+        cold = [timed(cache.get, word)[1] for word in args.words]
+        hot = [timed(cache.get, args.words[i % len(args.words)])[1] for i in range(args.repeats)]
+
+        # A fresh cache over the same directory only has the disk tier populated
+        disk = []
+        for word in args.words:
+            fresh = PronunciationCache(synthesizer, cache_dir=cache_dir)
+            disk.append(timed(fresh.get, word)[1])
+
+        print(json.dumps({"cold_render": summarize(cold), "disk_hit": summarize(disk), "memory_hit": summarize(hot)}, indent=2))
+    finally:
+        synthesizer.close()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
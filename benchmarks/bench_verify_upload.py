@@ -0,0 +1,63 @@
+"""
+Per-request cost of the old temp.wav verify path versus in-memory decoding.
+
+    python -m benchmarks.bench_verify_upload [--requests 50] [--model base]
+
+Without --model only the audio hand-off is timed (write temp.wav, let Whisper
+re-decode it through ffmpeg, delete it vs. decode the uploaded bytes in memory).
+With --model the full model.transcribe call is included on both paths.
+"""
+import argparse
+import json
+import os
+
+import whisper
+
+from app.audio import decode_audio
+from benchmarks.common import summarize, synthetic_utterance, timed, to_wav_bytes
+
+
+def temp_file_path(wav_bytes, model=None):
+    with open("temp.wav", "wb") as f:
+        f.write(wav_bytes)
+    if model is not None:
+        result = model.transcribe("temp.wav", fp16=False)
+    else:
+        result = whisper.load_audio("temp.wav")
+    os.remove("temp.wav")
+    return result
+
+
+def in_memory_path(wav_bytes, model=None):
+    audio = decode_audio(wav_bytes, "audio/wav")
+    if model is not None:
+        return model.transcribe(audio, fp16=False)
+    return audio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=1.5, help="length of each utterance")
+    parser.add_argument("--model", default=None, help="Whisper model to include transcription, e.g. base")
+    args = parser.parse_args()
+
+    model = whisper.load_model(args.model) if args.model else None
+    wav_bytes = to_wav_bytes(synthetic_utterance(args.seconds))
+
+    # Warm up both paths (ffmpeg binary, page cache, model kernels)
+    temp_file_path(wav_bytes, model)
+    in_memory_path(wav_bytes, model)
+
+    results = {}
+    for name, fn in (("temp_file", temp_file_path), ("in_memory", in_memory_path)):
+        latencies = [timed(fn, wav_bytes, model)[1] for _ in range(args.requests)]
+        results[name] = summarize(latencies)
+
+    saved = results["temp_file"]["mean_ms"] - results["in_memory"]["mean_ms"]
+    results["saved_per_request_ms"] = round(saved, 3)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
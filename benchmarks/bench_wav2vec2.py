@@ -0,0 +1,88 @@
+"""
+Wav2Vec2 transcription time versus audio length: one forward pass over the
+whole buffer against strided, batched chunks.
+
+    python -m benchmarks.bench_wav2vec2 [--durations 15 30 60 120] [--batch-size 4]
+
+The "song" is the catalog words rendered with pyttsx3 and laid end to end
+with short gaps, so the true start of every word is known. Reported per run:
+wall time, real-time factor, word accuracy and the mean error of the CTC
+word start times.
+"""
+import argparse
+import json
+import time
+from difflib import SequenceMatcher
+
+import numpy as np
+
+from app.asr import Wav2Vec2Backend
+from app.audio import SAMPLE_RATE
+from benchmarks.fixtures import render_words
+
+
+def build_song(fixtures, seconds, gap_s=0.3):
+    """Cycle through the fixture words until `seconds` of audio; returns (audio, [(word, start_s)])."""
+    gap = np.zeros(int(gap_s * SAMPLE_RATE), dtype=np.float32)
+    parts, timeline, cursor = [], [], 0
+    words = list(fixtures)
+    i = 0
+    while cursor < seconds * SAMPLE_RATE:
+        word = words[i % len(words)]
+        timeline.append((word.lower(), cursor / SAMPLE_RATE))
+        parts.extend([fixtures[word], gap])
+        cursor += len(fixtures[word]) + len(gap)
+        i += 1
+    return np.concatenate(parts), timeline
+
+
+def score(transcript, timeline):
+    expected = [word for word, _ in timeline]
+    recognized = [w.word for w in transcript.words]
+    matcher = SequenceMatcher(None, expected, recognized, autojunk=False)
+    errors = []
+    matched = 0
+    for block in matcher.get_matching_blocks():
+        for k in range(block.size):
+            matched += 1
+            errors.append(abs(transcript.words[block.b + k].start - timeline[block.a + k][1]))
+    return {
+        "word_accuracy": round(matched / len(expected), 4),
+        "start_error_ms": round(float(np.mean(errors)) * 1000, 1) if errors else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--durations", type=float, nargs="+", default=[15, 30, 60, 120])
+    parser.add_argument("--chunk-s", type=float, default=10)
+    parser.add_argument("--stride-s", type=float, default=2)
+    parser.add_argument("--batch-size", type=int, default=4)
+    args = parser.parse_args()
+
+    fixtures = render_words()
+    chunked = Wav2Vec2Backend(args.chunk_s, args.stride_s, args.batch_size)
+    chunked.transcribe(next(iter(fixtures.values())))  # load the model
+
+    report = []
+    for seconds in args.durations:
+        audio, timeline = build_song(fixtures, seconds)
+        # A chunk longer than the buffer means a single forward pass, as before
+        backends = {"single_pass": Wav2Vec2Backend(chunk_s=len(audio) / SAMPLE_RATE + 1), "chunked": chunked}
+        for name, backend in backends.items():
+            row = {"mode": name, "audio_seconds": round(len(audio) / SAMPLE_RATE, 1)}
+            try:
+                start = time.perf_counter()
+                transcript = backend.transcribe(audio)
+                wall = time.perf_counter() - start
+            except RuntimeError as e:  # typically out of memory on long single passes
+                row["error"] = str(e).splitlines()[0]
+            else:
+                row.update({"wall_s": round(wall, 2), "rtf": round(wall / row["audio_seconds"], 4)})
+                row.update(score(transcript, timeline))
+            report.append(row)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
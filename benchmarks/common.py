@@ -0,0 +1,45 @@
+import time
+
+import numpy as np
+
+from app.audio import encode_wav
+
+
+def percentile(values, q):
+    """Percentile of a list of latencies (q in 0-100)."""
+    if not values:
+        return 0.0
+    return float(np.percentile(np.asarray(values, dtype=np.float64), q))
+
+
+def summarize(latencies):
+    """Latency summary in milliseconds."""
+    ms = [v * 1000 for v in latencies]
+    return {
+        "count": len(ms),
+        "mean_ms": round(float(np.mean(ms)), 3) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+    }
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def synthetic_utterance(seconds=1.5, sample_rate=16000, seed=0):
+    """A voiced-sounding test signal: a few harmonics with a speech-like envelope plus noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    f0 = 140 + 30 * np.sin(2 * np.pi * 3 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = np.clip(np.sin(np.pi * t / seconds), 0, None) ** 0.5
+    audio = 0.3 * voice * envelope + 0.005 * rng.standard_normal(len(t))
+    return audio.astype(np.float32)
+
+
+def to_wav_bytes(audio, sample_rate=16000):
+    return encode_wav(audio, sample_rate)
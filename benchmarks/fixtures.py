@@ -0,0 +1,36 @@
+import shutil
+import tempfile
+
+from app.audio import decode_audio
+from app.tts import PronunciationCache, SpeechSynthesizer
+
+# Words from the song catalogs in main.py / test2.py / vocals.py
+CATALOG_WORDS = [
+    "hello", "how", "are", "you", "fast", "apple", "orange",
+    "twinkle", "little", "star", "I", "wonder", "what",
+    "row", "your", "boat", "gently", "down", "the", "stream",
+    "a", "b", "c", "d",
+]
+
+
+def render_words(words=CATALOG_WORDS, rate=None):
+    """Render each word offline with pyttsx3 and return {word: float32 16 kHz buffer}."""
+    cache_dir = tempfile.mkdtemp(prefix="bench_fixtures_")
+    synthesizer = SpeechSynthesizer()
+    try:
+        cache = PronunciationCache(synthesizer, cache_dir=cache_dir)
+        return {word: decode_audio(cache.get(word, rate=rate)[0]) for word in words}
+    finally:
+        synthesizer.close()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def verification_cases(fixtures):
+    """(audio, expected_word, should_pass) pairs: every word against itself and against its neighbour."""
+    words = list(fixtures)
+    cases = []
+    for i, word in enumerate(words):
+        cases.append((fixtures[word], word, True))
+        other = words[(i + 1) % len(words)]
+        cases.append((fixtures[word], other, False))
+    return cases
@@ -0,0 +1,220 @@
+"""
+Local stand-in for the Deepgram and AssemblyAI HTTP APIs.
+
+    python -m benchmarks.mock_asr_server [--port 8765] [--latency-ms 150] [--max-concurrent 4]
+
+It "recognises" audio by looking up a hash of the uploaded WAV in a corpus
+of known fixtures, and answers after a simulated latency, so the remote
+backends in app/asr.py and app/remote_asr.py can be exercised and
+benchmarked offline. Like the real services it can rate-limit: requests
+beyond --max-concurrent get 429 with Retry-After, and --error-rate of them
+fail with 503. For tests, `script` lists statuses to answer the next
+requests with, in order, before serving normally.
+
+    DEEPGRAM_URL=http://127.0.0.1:8765 ASSEMBLYAI_URL=http://127.0.0.1:8765 ...
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.audio import SAMPLE_RATE, encode_wav
+
+
+def fingerprint(wav_bytes):
+    return hashlib.sha1(wav_bytes).hexdigest()
+
+
+def corpus_from_fixtures(fixtures):
+    """{fingerprint: word} for the WAV bytes the remote backends will upload."""
+    return {fingerprint(encode_wav(audio, SAMPLE_RATE)): word for word, audio in fixtures.items()}
+
+
+class MockASRServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, corpus=None, latency_ms=150.0, ms_per_audio_second=50.0,
+                 max_concurrent=None, error_rate=0.0, retry_after_s=0.2, script=None):
+        super().__init__(address, MockASRHandler)
+        self.corpus = corpus or {}
+        self.latency_ms = latency_ms
+        self.ms_per_audio_second = ms_per_audio_second
+        self.max_concurrent = max_concurrent
+        self.error_rate = error_rate
+        self.retry_after_s = retry_after_s
+        self.script = list(script or [])
+        self.uploads = {}
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.counts = {"requests": 0, "rate_limited": 0, "errors": 0, "connections": 0}
+
+    def get_request(self):
+        request = super().get_request()
+        with self.lock:
+            self.counts["connections"] += 1
+        return request
+
+    def admit(self):
+        """None if the request may run, else the (status, headers) to refuse it with."""
+        with self.lock:
+            self.counts["requests"] += 1
+            if self.script:
+                status = self.script.pop(0)
+                if status == 429:
+                    self.counts["rate_limited"] += 1
+                    return 429, {"Retry-After": str(self.retry_after_s)}
+                self.counts["errors"] += 1
+                return status, {}
+            if self.max_concurrent and self.in_flight >= self.max_concurrent:
+                self.counts["rate_limited"] += 1
+                return 429, {"Retry-After": str(self.retry_after_s)}
+            if self.error_rate and random.random() < self.error_rate:
+                self.counts["errors"] += 1
+                return 503, {}
+            self.in_flight += 1
+            return None
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def recognise(self, wav_bytes):
+        """Text and processing delay for an uploaded WAV."""
+        seconds = max(len(wav_bytes) - 44, 0) / 2 / SAMPLE_RATE
+        delay = (self.latency_ms + self.ms_per_audio_second * seconds) / 1000
+        return self.corpus.get(fingerprint(wav_bytes), ""), seconds, delay
+
+
+class MockASRHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so pooled clients reuse connections as with the real APIs;
+    # without TCP_NODELAY a reused connection stalls on delayed ACKs
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _send(self, payload, status=200, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, handler):
+        # Read the body first so a refused upload doesn't break the connection
+        body = self._body()
+        refusal = self.server.admit()
+        if refusal is not None:
+            status, headers = refusal
+            self._send({"error": "rate limited" if status == 429 else "refused"}, status, headers)
+            return
+        try:
+            handler(body)
+        finally:
+            self.server.release()
+
+    def do_POST(self):
+        self._handle(self._post)
+
+    def do_GET(self):
+        self._handle(self._get)
+
+    def _post(self, body):
+        server = self.server
+        if self.path.startswith("/v1/listen"):
+            text, seconds, delay = server.recognise(body)
+            time.sleep(delay)
+            words = [
+                {"word": w, "confidence": 0.99, "start": 0.0, "end": round(seconds, 3)}
+                for w in text.split()
+            ]
+            self._send({"results": {"channels": [{"alternatives": [{"transcript": text, "words": words}]}]}})
+        elif self.path == "/v2/upload":
+            upload_id = uuid.uuid4().hex
+            with server.lock:
+                server.uploads[upload_id] = body
+            self._send({"upload_url": f"{server.url}/uploads/{upload_id}"})
+        elif self.path == "/v2/transcript":
+            request = json.loads(body)
+            upload_id = request["audio_url"].rsplit("/", 1)[-1]
+            with server.lock:
+                wav_bytes = server.uploads.pop(upload_id, None)
+            if wav_bytes is None:
+                self._send({"error": "unknown audio_url"}, status=400)
+                return
+            text, seconds, delay = server.recognise(wav_bytes)
+            job_id = uuid.uuid4().hex
+            with server.lock:
+                server.jobs[job_id] = (time.monotonic() + delay, text, seconds)
+            self._send({"id": job_id, "status": "queued"})
+        else:
+            self._send({"error": "not found"}, status=404)
+
+    def _get(self, body):
+        server = self.server
+        if not self.path.startswith("/v2/transcript/"):
+            self._send({"error": "not found"}, status=404)
+            return
+        job_id = self.path.rsplit("/", 1)[-1]
+        with server.lock:
+            job = server.jobs.get(job_id)
+        if job is None:
+            self._send({"error": "unknown transcript"}, status=404)
+            return
+        ready_at, text, seconds = job
+        if time.monotonic() < ready_at:
+            self._send({"id": job_id, "status": "processing"})
+            return
+        with server.lock:
+            server.jobs.pop(job_id, None)
+        words = [
+            {"text": w, "confidence": 0.99, "start": 0, "end": int(seconds * 1000)}
+            for w in text.split()
+        ]
+        self._send({"id": job_id, "status": "completed", "text": text, "words": words})
+
+
+def start_mock_server(corpus=None, port=0, **kwargs):
+    """Serve in a daemon thread; returns the server (use server.url, server.shutdown())."""
+    server = MockASRServer(("127.0.0.1", port), corpus, **kwargs)
+    threading.Thread(target=server.serve_forever, name="mock-asr", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Deepgram/AssemblyAI stand-in")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    parser.add_argument("--max-concurrent", type=int, default=None, help="429 beyond this many requests in flight")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    from benchmarks.fixtures import render_words
+    corpus = corpus_from_fixtures(render_words())
+    server = MockASRServer(
+        ("127.0.0.1", args.port), corpus, latency_ms=args.latency_ms,
+        max_concurrent=args.max_concurrent, error_rate=args.error_rate,
+    )
+    print(f"Mock ASR server on {server.url} ({len(corpus)} fixture words)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
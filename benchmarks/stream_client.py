@@ -0,0 +1,99 @@
+"""
+Replay WAV files into /ws/verify at real-time speed and measure the latency
+from the true end of speech to the final verdict.
+
+    python -m benchmarks.stream_client --url ws://127.0.0.1:8000/ws/verify/song1 word1.wav word2.wav ...
+
+Each file is streamed in 20 ms chunks, followed by silence (as a live
+microphone would keep sending) until the server answers with "final". The end
+of speech is located offline with the same VAD the server uses.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+import websockets
+
+from app.audio import SAMPLE_RATE, decode_audio
+from app.vad import estimate_noise_floor, speech_span
+from benchmarks.common import summarize
+
+CHUNK_MS = 20
+
+
+async def replay(url, paths, timeout):
+    chunk = SAMPLE_RATE * CHUNK_MS // 1000
+    silence = np.zeros(chunk, dtype="<i2").tobytes()
+    latencies, results = [], []
+
+    async with websockets.connect(url, max_size=None) as ws:
+        await ws.send(json.dumps({"sample_rate": SAMPLE_RATE}))
+        ready = json.loads(await ws.recv())
+        print("ready:", ready)
+
+        for path in paths:
+            with open(path, "rb") as f:
+                audio = decode_audio(f.read())
+            span = speech_span(audio, estimate_noise_floor(audio))
+            speech_end = span[1] if span else len(audio)
+            pcm = (np.clip(audio, -1, 1) * 32767).astype("<i2")
+
+            final = None
+            end_sent_at = None
+
+            async def receiver():
+                nonlocal final
+                while True:
+                    msg = json.loads(await ws.recv())
+                    if msg["type"] in ("partial", "speech_start"):
+                        print(f"  {path}: {msg}")
+                    if msg["type"] in ("final", "completed"):
+                        final = (msg, time.perf_counter())
+                        return
+
+            recv_task = asyncio.create_task(receiver())
+            start = time.perf_counter()
+            sent = 0
+            while not recv_task.done():
+                data = pcm[sent:sent + chunk].tobytes() if sent < len(pcm) else silence
+                # Pace chunks against the wall clock so the stream is real-time
+                await asyncio.sleep(max(start + sent / SAMPLE_RATE - time.perf_counter(), 0))
+                await ws.send(data)
+                sent += chunk
+                if end_sent_at is None and sent >= speech_end:
+                    end_sent_at = time.perf_counter()
+                if time.perf_counter() - start > timeout:
+                    await ws.send(json.dumps({"type": "end"}))
+                    break
+            await recv_task
+
+            msg, received_at = final
+            latency = received_at - (end_sent_at or received_at)
+            latencies.append(latency)
+            results.append({"file": path, "latency_ms": round(latency * 1000, 1), "verdict": msg})
+            print(f"{path}: end of speech -> verdict {latency * 1000:.1f} ms ({msg.get('correct')})")
+            if msg["type"] == "completed":
+                break
+            # Consume the "ready" for the next word
+            if msg["type"] == "final":
+                nxt = json.loads(await ws.recv())
+                if nxt["type"] == "completed":
+                    break
+
+    return {"summary": summarize(latencies), "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="ws://127.0.0.1:8000/ws/verify/song1")
+    parser.add_argument("--timeout", type=float, default=15.0, help="give up on a file after this many seconds")
+    parser.add_argument("files", nargs="+")
+    args = parser.parse_args()
+    report = asyncio.run(replay(args.url, args.files, args.timeout))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
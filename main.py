@@ -1,27 +1,120 @@
-from fastapi import FastAPI, HTTPException
-import whisper
-import pyttsx3
-import os
+from fastapi import FastAPI, HTTPException, Query, Request, Response, WebSocket
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 import speech_recognition as sr
-from difflib import SequenceMatcher
 import json
-import threading
+import time
+from typing import Optional
+
+from app import config
+from app.audio import AudioDecodeError, load_audio
+from app.bundles import SongBundler
+from app.catalog import load_songs, song_timings
+from app.executor import InferenceExecutor, Saturated
+from app.metrics import metrics
+from app.phonetics import build_song_indexes
+from app.prefork import process_memory
+from app.practice import SSE_HEADERS, PracticeLimit, PracticeScheduler, event_stream
+from app.profiling import profile_if_slow
+from app.registry import registry
+from app.state import get_state_backend
+from app.alignment import verify_phrase
+from app.scoring import verify_expected_word
+from app.streaming import StreamingVerifier
+from app.timing import StageTimer
+from app.tts import PronunciationCache, audio_media_type
+from app.vad import NoiseCalibrator
 
 app = FastAPI()
-engine = pyttsx3.init()
-model = whisper.load_model("base")
+# Models come from the shared registry and load on first use (or during the
+# startup warmup), so importing this module is cheap
+# One worker thread drives the TTS engine; rendered words are cached on disk and in memory
+synthesizer = registry.proxy("tts")
+pronunciations = PronunciationCache(synthesizer)
+bundles = SongBundler(pronunciations)
+# All verify requests share one batching worker instead of separate forward passes
+transcriber = registry.proxy("transcriber")
 recognizer = sr.Recognizer()
+# Ambient noise is calibrated once and reused; captures are trimmed to speech before the model
+calibrator = NoiseCalibrator()
+# Verify work gets its own bounded pool, so a burst of verifies is refused with
+# 429 instead of starving the cheap endpoints on FastAPI's threadpool
+inference = InferenceExecutor()
+# WebSocket verdicts and partials go through the same pool
+streaming = StreamingVerifier(transcriber, calibrator, inference)
+metrics.gauge(
+    "shlok_inference_jobs", "Verify jobs on the inference pool", ("state",),
+    lambda: {(state,): inference.stats()[state] for state in ("running", "queued")},
+)
 
-songs = {
+# Built-in songs plus every song ingested into the catalog with `python -m app.ingest`
+songs = load_songs({
     "song1": ["hello", "how", "are", "you"],
     "song2": ["fast", "API"]
-}
+})
+# Phonetic codes of every song word, computed once; recognised text is matched against the whole song
+song_indexes = build_song_indexes(songs)
+
+# Each learner gets a session from /start_song; requests without a session_id
+# share one default session per song, as before sessions existed. With
+# STATE_BACKEND=sqlite all uvicorn workers see the same sessions.
+state = get_state_backend()
+for song in songs:
+    state.ensure(f"default_{song}", song)
+
+@app.on_event("startup")
+def precompute_bundles():
+    registry.warmup()
+    # Render every song once in the background; unchanged songs load from disk
+    bundles.start_background(songs)
+    state.start_sweeper()
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # The route template ("/verify/{song_name}"), so songs and words don't each get a series
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    metrics.requests.observe(time.perf_counter() - start, request.method, route, str(response.status_code))
+    return response
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Stage and request latency histograms in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
-current_word_index = {song: 0 for song in songs}
-current_song = None
+@app.get("/health")
+def health():
+    """Readiness of the models warmed up at startup."""
+    ready = all(registry.is_ready(name) for name in config.WARMUP_MODELS)
+    return {
+        "status": "ready" if ready else "warming_up", "models": registry.status(),
+        "inference": inference.stats(), "practices": practices.stats(), "memory": process_memory(),
+    }
+
+@app.exception_handler(Saturated)
+def inference_saturated(request: Request, exc: Saturated):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many verify requests in flight, try again shortly", "inference": inference.stats()},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+def resolve_session(song_name, session_id=None):
+    if song_name not in songs:
+        raise HTTPException(status_code=404, detail="Song not found")
+    session = state.get(session_id or f"default_{song_name}")
+    if session is None or session.song_id != song_name:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
 
-def similarity_ratio(str1, str2):
-    return SequenceMatcher(None, str1, str2).ratio()
+@app.post("/start_song/{song_name}")
+def start_song(song_name: str):
+    if song_name not in songs:
+        raise HTTPException(status_code=404, detail="Song not found")
+    
+    session_id = state.create(song_name)
+    return {"session_id": session_id, "song": song_name, "current_word": songs[song_name][0]}
 
 @app.get("/songs")
 def get_songs():
@@ -33,69 +126,276 @@ def get_song_words(song_name: str):
         raise HTTPException(status_code=404, detail="Song not found")
     return {"words": songs[song_name]}
 
+@app.get("/song/{song_name}/timings")
+def get_song_timings(song_name: str):
+    """Per-word start/end times (seconds) of an ingested song's vocals."""
+    timings = song_timings(song_name)
+    if timings is None:
+        raise HTTPException(status_code=404, detail="No timings for this song")
+    return {"song": song_name, "words": timings}
+
+@app.get("/song/{song_name}/bundle")
+def get_song_bundle(request: Request, song_name: str):
+    """Whole song as one audio track plus per-word start/end offsets."""
+    if song_name not in songs:
+        raise HTTPException(status_code=404, detail="Song not found")
+    
+    try:
+        bundle = bundles.get(song_name, songs[song_name])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    headers = {"ETag": f'"{bundle["hash"]}"', "Cache-Control": "public, max-age=86400"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=bundle["body"], media_type="application/json", headers=headers)
+
 @app.get("/pronounce/{word}")
 def pronounce_word(word: str):
     try:
-        def speak():
-            engine.say(word)
-            engine.runAndWait()
-        
-        threading.Thread(target=speak, daemon=True).start()
+        with profile_if_slow(f"pronounce_{word}"), StageTimer("pronounce").stage("speak"):
+            synthesizer.speak(word)
         
         return {"message": f"System said '{word}'"}
     except Exception as e:
         return {"error": str(e)}
 
-@app.post("/verify/{song_name}")
-def verify_pronunciation(song_name: str):
-    global current_song, current_word_index
+@app.get("/pronounce/{word}/audio")
+def pronounce_word_audio(request: Request, word: str, voice: Optional[str] = None, rate: Optional[int] = Query(None, ge=50, le=400)):
+    """Return the rendered pronunciation of a word as audio bytes."""
+    timer = StageTimer("pronounce_audio")
+    try:
+        with profile_if_slow(f"pronounce_audio_{word}"), timer.stage("tts"):
+            data, key = pronunciations.get(word, voice, rate)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
     
-    if song_name not in songs:
-        raise HTTPException(status_code=404, detail="Song not found")
+    headers = {"ETag": f'"{key}"', "Cache-Control": "public, max-age=86400", "Server-Timing": timer.header()}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type=audio_media_type(data), headers=headers)
+
+def current_expected_word(session):
+    """(position, word) the learner should say next, or None once the song is finished."""
+    if session is None:
+        return None
+    position = session.current_position
+    words = songs[session.song_id]
+    if position >= len(words):
+        return None
+    return position, words[position].lower()
+
+def expected_phrase(session, position):
+    """The lyrics a sung phrase is aligned against: the rest of the song, up to PHRASE_MAX_WORDS."""
+    return songs[session.song_id][position:position + config.PHRASE_MAX_WORDS]
+
+def apply_verdict(session, position, expected_word, verdict):
+    """Advance the session on a correct attempt and build the response."""
+    correct_words = songs[session.song_id]
+    response = {"recognized": verdict["recognized"], "correct": verdict["correct"]}
+    for key in ("similarity", "confidence", "best_match", "phonetic_score", "mode", "correct_prefix", "words", "extra"):
+        if key in verdict:
+            response[key] = verdict[key]
     
-    try:
+    if verdict["correct"]:
+        # Only advances if no other attempt moved the session while this one was being scored;
+        # a sung phrase moves past every word of its correct prefix at once
+        steps = verdict.get("correct_prefix", 1)
+        updated = state.advance(session.session_id, len(correct_words), expected_position=position, steps=steps)
+        next_index = (updated or state.get(session.session_id) or session).current_position
+        response["next_word"] = correct_words[next_index] if next_index < len(correct_words) else "Finished"
+        return response
+    response.update({"expected": expected_word, "message": "Repeating the word"})
+    return response
+
+def listen_and_verify(song_name, expected_word, timer, phrase=None):
+    """
+    Capture one attempt from the server microphone and verify it (runs on the
+    inference pool). With phrase (a list of lyrics) the capture is a sung line.
+    """
+    with profile_if_slow(f"verify_{song_name}"):
         with sr.Microphone() as source:
-            recognizer.adjust_for_ambient_noise(source)
+            with timer.stage("calibrate"):
+                calibrator.calibrate(recognizer, source)
             print("Speak now...")
-            audio_data = recognizer.listen(source)
-        
-        with open("temp.wav", "wb") as f:
-            f.write(audio_data.get_wav_data())
-        
-        result = model.transcribe("temp.wav")
-        recognized_text = result["text"].strip().lower()
-        os.remove("temp.wav")
+            with timer.stage("capture"):
+                audio_data = recognizer.listen(source)
         
-        correct_words = songs[song_name]
-        current_index = current_word_index[song_name]
-        
-        if current_index >= len(correct_words):
-            return {"message": "Song completed"}
-        
-        expected_word = correct_words[current_index].lower()
-        similarity = similarity_ratio(expected_word, recognized_text)
+        # Hand the capture to Whisper as an array instead of a temp.wav round trip
+        with timer.stage("decode"):
+            audio = load_audio(audio_data)
+        with timer.stage("vad"):
+            audio = calibrator.trim(audio, "microphone")
+        if phrase:
+            return verify_phrase(transcriber, audio, phrase, timer=timer)
+        return verify_expected_word(transcriber, audio, expected_word, index=song_indexes[song_name], timer=timer)
+
+def decode_and_verify(body, content_type, session_id, expected_word, index, timer, phrase=None):
+    """Decode, trim and verify an uploaded attempt, a word or a phrase (runs on the inference pool)."""
+    with profile_if_slow(f"verify_audio_{session_id}"):
+        with timer.stage("decode"):
+            audio = load_audio(body, content_type=content_type)
+        with timer.stage("vad"):
+            audio = calibrator.trim(audio, session_id)
+        if phrase:
+            return verify_phrase(transcriber, audio, phrase, timer=timer)
+        return verify_expected_word(transcriber, audio, expected_word, index=index, timer=timer)
+
+@app.get("/inference")
+def inference_stats():
+    """Queue depth of the verify pool."""
+    return inference.stats()
+
+@app.post("/verify/{song_name}")
+async def verify_pronunciation(song_name: str, session_id: Optional[str] = None, phrase: bool = False):
+    # State calls may block on SQLite's write lock, so they stay off the event loop
+    session = await run_in_threadpool(resolve_session, song_name, session_id)
+    
+    target = current_expected_word(session)
+    if target is None:
+        return {"message": "Song completed"}
+    position, expected_word = target
+    
+    timer = StageTimer("verify")
+    try:
+        phrase_words = expected_phrase(session, position) if phrase else None
+        verdict = await inference.run(listen_and_verify, song_name, expected_word, timer, phrase_words)
+        response = await run_in_threadpool(apply_verdict, session, position, expected_word, verdict)
         
-        if similarity >= 0.8:
-            current_word_index[song_name] += 1
-            return {"recognized": recognized_text, "correct": True, "similarity": similarity, "next_word": correct_words[current_word_index[song_name]] if current_word_index[song_name] < len(correct_words) else "Finished"}
-        else:
-            def speak():
-                engine.say(expected_word)
-                engine.runAndWait()
-            
-            threading.Thread(target=speak, daemon=True).start()
-            return {"recognized": recognized_text, "correct": False, "similarity": similarity, "expected": expected_word, "message": "Repeating the word"}
+        if not response["correct"]:
+            with timer.stage("tts"):
+                await run_in_threadpool(synthesizer.speak, expected_word)
+        return response
+    except Saturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/next_word/{song_name}")
-def get_next_word(song_name: str):
-    global current_song, current_word_index
+@app.post("/verify/{song_name}/audio")
+async def verify_uploaded_pronunciation(song_name: str, request: Request, response: Response, session_id: Optional[str] = None, phrase: bool = False):
+    """
+    Verify audio recorded by the client (WAV, WebM/Opus or raw audio/L16 PCM
+    body). With ?phrase=true the audio is a sung line rather than one word.
+    """
+    session = await run_in_threadpool(resolve_session, song_name, session_id)
     
-    if song_name not in songs:
+    target = current_expected_word(session)
+    if target is None:
+        return {"message": "Song completed"}
+    position, expected_word = target
+    
+    # Per-stage times go back in a Server-Timing header for the benchmarks
+    timer = StageTimer("verify_audio")
+    body = await request.body()
+    try:
+        verdict = await inference.run(
+            decode_and_verify, body, request.headers.get("content-type"), session.session_id,
+            expected_word, song_indexes[song_name], timer, expected_phrase(session, position) if phrase else None,
+        )
+    except AudioDecodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Saturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    response.headers["Server-Timing"] = timer.header()
+    return await run_in_threadpool(apply_verdict, session, position, expected_word, verdict)
+
+@app.websocket("/ws/verify/{song_name}")
+async def stream_verify(websocket: WebSocket, song_name: str, session_id: Optional[str] = None):
+    """Streamed PCM in, partial and final verdicts out; see app/streaming.py for the protocol."""
+    try:
+        session = await run_in_threadpool(resolve_session, song_name, session_id)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    
+    await websocket.accept()
+    await streaming.serve(
+        websocket,
+        next_target=lambda: current_expected_word(state.get(session.session_id)),
+        apply_verdict=lambda target, verdict: apply_verdict(session, target[0], target[1], verdict),
+        index=song_indexes[song_name],
+        noise_key=session.session_id,
+    )
+
+def verify_practice_attempt(practice, utterance, expected):
+    """Verify an attempt uploaded to a practice, a word or a line (runs on the inference pool)."""
+    body, content_type = utterance
+    return decode_and_verify(
+        body, content_type, practice.session_id, expected[0].lower(), song_indexes[practice.song_name],
+        StageTimer("practice"), expected if practice.phrase else None,
+    )
+
+# Practices are asyncio state machines on the event loop rather than a thread
+# each; progress goes out as Server-Sent Events instead of being polled
+practices = PracticeScheduler(state, inference, verify_practice_attempt)
+metrics.gauge(
+    "shlok_practices", "Practices hosted by this worker", ("state",),
+    lambda: {(state,): count for state, count in practices.stats()["states"].items()},
+)
+
+@app.on_event("shutdown")
+async def stop_practices():
+    await practices.shutdown()
+
+def get_practice(practice_id):
+    practice = practices.get(practice_id)
+    if practice is None:
+        raise HTTPException(status_code=404, detail="Practice not found")
+    return practice
+
+@app.post("/practice/{song_name}")
+async def start_practice(song_name: str, session_id: Optional[str] = None, phrase: bool = False):
+    """
+    Start a practice of the song (continuing session_id if given). Follow it
+    on /practice/{id}/events and upload each attempt to /practice/{id}/audio.
+    """
+    if session_id:
+        await run_in_threadpool(resolve_session, song_name, session_id)
+    elif song_name not in songs:
         raise HTTPException(status_code=404, detail="Song not found")
+    try:
+        practice = await practices.start(song_name, songs[song_name], phrase=phrase, session_id=session_id)
+    except PracticeLimit as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(config.INFERENCE_RETRY_AFTER_S)})
+    
+    links = {"events": f"/practice/{practice.practice_id}/events", "audio": f"/practice/{practice.practice_id}/audio"}
+    return dict(practice.snapshot(), **links)
+
+@app.get("/practice/{practice_id}")
+def get_practice_state(practice_id: str):
+    return get_practice(practice_id).snapshot()
+
+@app.get("/practice/{practice_id}/events")
+async def practice_events(practice_id: str, request: Request):
+    """Server-Sent Events: state changes, verdicts and completion; resumes after Last-Event-ID."""
+    practice = get_practice(practice_id)
+    try:
+        last_event_id = int(request.headers.get("last-event-id", "0"))
+    except ValueError:
+        last_event_id = 0
+    return StreamingResponse(event_stream(practice, last_event_id), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.post("/practice/{practice_id}/audio", status_code=202)
+async def submit_practice_audio(practice_id: str, request: Request):
+    """Hand the practice its next attempt (same formats as /verify/{song_name}/audio); the verdict arrives as an event."""
+    practice = get_practice(practice_id)
+    body = await request.body()
+    if not practice.submit((body, request.headers.get("content-type"))):
+        raise HTTPException(status_code=409, detail=f"Practice is not waiting for an attempt (state: {practice.state})")
+    return {"accepted": True, "practice_id": practice_id}
+
+@app.delete("/practice/{practice_id}")
+async def cancel_practice(practice_id: str):
+    return {"cancelled": practices.cancel(get_practice(practice_id).practice_id)}
+
+@app.get("/next_word/{song_name}")
+def get_next_word(song_name: str, session_id: Optional[str] = None):
+    session = resolve_session(song_name, session_id)
     
-    current_index = current_word_index[song_name]
+    current_index = session.current_position
     if current_index >= len(songs[song_name]):
         return {"message": "Song completed"}
     
@@ -1,27 +1,52 @@
-from fastapi import FastAPI, HTTPException
-import whisper
-import pyttsx3
-import os
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 import speech_recognition as sr
-from difflib import SequenceMatcher
 from typing import List, Dict, Optional
 
+from app import config
+from app.alignment import verify_phrase
+from app.audio import AudioDecodeError, load_audio
+from app.catalog import load_songs
+from app.executor import InferenceExecutor, Saturated
+from app.phonetics import build_song_indexes
+from app.registry import registry
+from app.state import get_state_backend
+from app.scoring import verify_expected_word
+from app.vad import NoiseCalibrator
+
 app = FastAPI()
-engine = pyttsx3.init()
-model = whisper.load_model("base")  # Load Whisper model
+# Models are shared through the registry and loaded on first use
+synthesizer = registry.proxy("tts")
+# All verify requests share one batching worker instead of separate forward passes
+transcriber = registry.proxy("transcriber")
 recognizer = sr.Recognizer()
+# Ambient noise is calibrated once and reused; captures are trimmed to speech before the model
+calibrator = NoiseCalibrator()
+# Verify work runs on its own bounded pool; when it's full, verify gets 429
+inference = InferenceExecutor()
 
 # Pre-stored song list (for simplicity, using dictionary)
-songs = {
+songs = load_songs({
     "song1": ["hello", "world"],
     "song2": ["fast", "API"]
-}
+})
+# Phonetic codes of every song word, computed once at load
+song_indexes = build_song_indexes(songs)
+
+# Track user progress for each song (shared across workers with STATE_BACKEND=sqlite)
+user_progress = get_state_backend()
 
-# Track user progress for each song
-user_progress = {}
+def progress_id(song_name):
+    return f"progress_{song_name}"
 
-def similarity_ratio(str1, str2):
-    return SequenceMatcher(None, str1, str2).ratio()
+@app.exception_handler(Saturated)
+def inference_saturated(request: Request, exc: Saturated):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many verify requests in flight, try again shortly", "inference": inference.stats()},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 @app.get("/songs")
 def get_songs():
@@ -35,8 +60,8 @@ def get_song_words(song_name: str):
 
 @app.get("/pronounce/{word}")
 def pronounce_word(word: str):
-    engine.say(word)
-    engine.runAndWait()
+    # Wait for playback to finish, as before, but through the shared TTS worker
+    synthesizer.speak(word).result()
     return {"message": f"Pronounced {word}"}
 
 @app.post("/start-song/{song_name}")
@@ -45,10 +70,8 @@ def start_song(song_name: str):
         raise HTTPException(status_code=404, detail="Song not found")
     
     # Initialize or reset progress for this song
-    user_progress[song_name] = {
-        "current_index": 0,
-        "completed": False
-    }
+    user_progress.ensure(progress_id(song_name), song_name)
+    user_progress.reset(progress_id(song_name))
     
     current_word = songs[song_name][0]
     
@@ -63,90 +86,140 @@ def get_current_progress(song_name: str):
     if song_name not in songs:
         raise HTTPException(status_code=404, detail="Song not found")
     
-    if song_name not in user_progress:
+    progress = user_progress.get(progress_id(song_name))
+    if progress is None:
         return {"status": "Not started", "song": song_name}
     
-    progress = user_progress[song_name]
     words = songs[song_name]
     
-    if progress["completed"]:
+    if progress.completed:
         return {"status": "Completed", "song": song_name}
     
     return {
         "status": "In progress",
         "song": song_name,
-        "current_word": words[progress["current_index"]],
-        "progress": f"Word {progress['current_index'] + 1} of {len(words)}"
+        "current_word": words[progress.current_position],
+        "progress": f"Word {progress.current_position + 1} of {len(words)}"
     }
 
-@app.post("/verify/{song_name}")
-def verify_pronunciation(song_name: str):
+def get_active_progress(song_name):
     if song_name not in songs:
         raise HTTPException(status_code=404, detail="Song not found")
     
-    if song_name not in user_progress:
+    progress = user_progress.get(progress_id(song_name))
+    if progress is None:
         raise HTTPException(status_code=400, detail="Please start the song first using /start-song endpoint")
     
-    progress = user_progress[song_name]
-    
-    if progress["completed"]:
-        return {"status": "Song already completed", "song": song_name}
-    
+    return progress
+
+def score_attempt(song_name, progress, verdict):
+    """Apply a verification verdict to the song's progress and build the response."""
     words = songs[song_name]
-    current_index = progress["current_index"]
+    current_index = progress.current_position
     current_word = words[current_index]
+    is_correct = verdict["correct"]
     
-    try:
-        with sr.Microphone() as source:
-            recognizer.adjust_for_ambient_noise(source)
-            print("Speak now...")
-            audio_data = recognizer.listen(source)
-            
-        with open("temp.wav", "wb") as f:
-            f.write(audio_data.get_wav_data())
-        
-        result = model.transcribe("temp.wav")
-        recognized_text = result["text"].strip().lower()
-        os.remove("temp.wav")
-        
-        similarity = similarity_ratio(current_word.lower(), recognized_text)
-        is_correct = similarity >= 0.8
+    response = {
+        "recognized": verdict["recognized"],
+        "expected": current_word,
+        "correct": is_correct,
+    }
+    for key in ("similarity", "confidence", "best_match", "phonetic_score", "mode", "correct_prefix", "words", "extra"):
+        if key in verdict:
+            response[key] = verdict[key]
+    
+    # If pronunciation is correct, advance to next word (past the correct prefix of a sung phrase)
+    if is_correct:
+        # Move on, unless another attempt already did
+        updated = user_progress.advance(
+            progress_id(song_name), len(words), expected_position=current_index, steps=verdict.get("correct_prefix", 1),
+        )
+        progress = updated or user_progress.get(progress_id(song_name)) or progress
+        # Check if this was the last word
+        if progress.completed:
+            response["status"] = "Song completed!"
+            response["next_action"] = "Song completed. Try another song."
+        else:
+            next_word = words[progress.current_position]
+            response["next_word"] = next_word
+            response["progress"] = f"Word {progress.current_position + 1} of {len(words)}"
+            response["next_action"] = f"Proceed to pronounce: {next_word}"
+    else:
+        response["next_action"] = f"Try again with: {current_word}"
         
-        response = {
-            "recognized": recognized_text,
-            "expected": current_word,
-            "correct": is_correct,
-            "similarity": similarity
-        }
+    return response
+
+def phrase_words(song_name, progress):
+    """Lyrics a sung phrase is aligned against: the rest of the song, up to PHRASE_MAX_WORDS."""
+    return songs[song_name][progress.current_position:progress.current_position + config.PHRASE_MAX_WORDS]
+
+def verify_audio(audio, song_name, expected_word, phrase=None):
+    if phrase:
+        return verify_phrase(transcriber, audio, phrase)
+    return verify_expected_word(transcriber, audio, expected_word, index=song_indexes[song_name])
+
+def listen_and_verify(song_name, expected_word, phrase=None):
+    with sr.Microphone() as source:
+        calibrator.calibrate(recognizer, source)
+        print("Speak now...")
+        audio_data = recognizer.listen(source)
+    
+    # Verify the capture in memory, no temp.wav on disk
+    return verify_audio(calibrator.trim(load_audio(audio_data), "microphone"), song_name, expected_word, phrase)
+
+def decode_and_verify(body, content_type, song_name, expected_word, phrase=None):
+    audio = calibrator.trim(load_audio(body, content_type=content_type), song_name)
+    return verify_audio(audio, song_name, expected_word, phrase)
+
+@app.post("/verify/{song_name}")
+async def verify_pronunciation(song_name: str, phrase: bool = False):
+    # Progress lives in the state backend, which may block (SQLite), so not on the event loop
+    progress = await run_in_threadpool(get_active_progress, song_name)
+    
+    if progress.completed:
+        return {"status": "Song already completed", "song": song_name}
+    
+    try:
+        verdict = await inference.run(
+            listen_and_verify, song_name, songs[song_name][progress.current_position],
+            phrase_words(song_name, progress) if phrase else None,
+        )
         
-        # If pronunciation is correct, advance to next word
-        if is_correct:
-            # Check if this was the last word
-            if current_index + 1 >= len(words):
-                progress["completed"] = True
-                response["status"] = "Song completed!"
-                response["next_action"] = "Song completed. Try another song."
-            else:
-                # Move to next word
-                progress["current_index"] += 1
-                next_word = words[progress["current_index"]]
-                response["next_word"] = next_word
-                response["progress"] = f"Word {progress['current_index'] + 1} of {len(words)}"
-                response["next_action"] = f"Proceed to pronounce: {next_word}"
-        else:
-            response["next_action"] = f"Try again with: {current_word}"
-            
-        return response
+        return await run_in_threadpool(score_attempt, song_name, progress, verdict)
     
+    except Saturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/verify/{song_name}/audio")
+async def verify_uploaded_pronunciation(song_name: str, request: Request, phrase: bool = False):
+    """Verify audio recorded by the client (WAV, WebM/Opus or raw audio/L16 PCM body); ?phrase=true for a sung line."""
+    progress = await run_in_threadpool(get_active_progress, song_name)
+    
+    if progress.completed:
+        return {"status": "Song already completed", "song": song_name}
+    
+    body = await request.body()
+    try:
+        verdict = await inference.run(
+            decode_and_verify, body, request.headers.get("content-type"), song_name, songs[song_name][progress.current_position],
+            phrase_words(song_name, progress) if phrase else None,
+        )
+    except AudioDecodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Saturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return await run_in_threadpool(score_attempt, song_name, progress, verdict)
+
 @app.get("/reset/{song_name}")
 def reset_progress(song_name: str):
     if song_name not in songs:
         raise HTTPException(status_code=404, detail="Song not found")
     
-    if song_name in user_progress:
-        del user_progress[song_name]
+    user_progress.delete(progress_id(song_name))
     
     return {"message": f"Progress for {song_name} has been reset"}
\ No newline at end of file
@@ -1,68 +1,93 @@
-from fastapi import FastAPI, HTTPException
-import whisper
-import pyttsx3
-import os
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
 import speech_recognition as sr
-from difflib import SequenceMatcher
 import json
 import threading
 
-def similarity_ratio(str1, str2):
-    return SequenceMatcher(None, str1, str2).ratio()
+from app.alignment import verify_phrase
+from app.audio import load_audio
+from app.catalog import load_songs
+from app.executor import InferenceExecutor
+from app.phonetics import build_song_indexes
+from app.practice import SSE_HEADERS, PracticeLimit, PracticeScheduler, event_stream
+from app.registry import registry
+from app.scoring import verify_expected_word
+from app.state import get_state_backend
+from app.vad import NoiseCalibrator
 
 app = FastAPI()
-engine = pyttsx3.init()
-model = whisper.load_model("base")
+# Models are shared through the registry and loaded on first use
+synthesizer = registry.proxy("tts")
+# All verify requests share one batching worker instead of separate forward passes
+transcriber = registry.proxy("transcriber")
 recognizer = sr.Recognizer()
+# Ambient noise is calibrated once and reused; captures are trimmed to speech before the model
+calibrator = NoiseCalibrator()
 
-songs = {
+songs = load_songs({
     "song1": ["hello","apple","orange"],
     "song2": ["hello", "apple"],
     "twinkle": ["Twinkle", "twinkle", "little", "star", "how", "I", "wonder", "what", "you", "are"],
     "abc": ["a", "b", "c", "d", "e", "f", "g"]
-}
+})
+# Phonetic codes of every song word, so "eye" counts for "I" and "see" for "c"
+song_indexes = build_song_indexes(songs)
 
-current_word_index = {song: 0 for song in songs}
-current_song = None
+# Progress lives in the state backend, one session per song as the old
+# current_word_index had; practices run as asyncio tasks instead of a thread each
+state = get_state_backend()
+for song in songs:
+    state.ensure(f"default_{song}", song)
+inference = InferenceExecutor()
+# One microphone: practices capture from it one at a time
+microphone_lock = threading.Lock()
 
-def pronounce_and_verify(song_name: str):
-    global current_word_index
-    
-    if song_name not in songs:
-        return {"error": "Song not found"}
-    
-    while current_word_index[song_name] < len(songs[song_name]):
-        word = songs[song_name][current_word_index[song_name]]
-        
-        def speak():
-            engine.say(word)
-            engine.runAndWait()
-        
-        while True:
-            threading.Thread(target=speak, daemon=True).start()
-            
-            with sr.Microphone() as source:
-                recognizer.adjust_for_ambient_noise(source)
-                print(f"Speak now: {word}")
-                audio_data = recognizer.listen(source)
-            
-            with open("temp.wav", "wb") as f:
-                f.write(audio_data.get_wav_data())
-            
-            result = model.transcribe("temp.wav")
-            recognized_text = result["text"].strip().lower()
-            os.remove("temp.wav")
-            
-            similarity = similarity_ratio(word.lower(), recognized_text)
-            
-            if similarity >= 0.8:
-                current_word_index[song_name] += 1
-                break
-            else:
-                print(f"Incorrect pronunciation. Repeating '{word}'")
-    print(f"{song_name} completed")
+def listen():
+    with microphone_lock:
+        with sr.Microphone() as source:
+            calibrator.calibrate(recognizer, source)
+            print("Speak now...")
+            audio_data = recognizer.listen(source)
+    return calibrator.trim(load_audio(audio_data), "microphone")
+
+def verify_attempt(practice, audio, expected):
+    if practice.phrase:
+        # One capture covers the line; the practice moves past every word sung correctly from the start
+        return verify_phrase(transcriber, audio, expected)
+    return verify_expected_word(transcriber, audio, expected[0], index=song_indexes[practice.song_name])
+
+practices = PracticeScheduler(state, inference, verify_attempt, speak=lambda text: synthesizer.speak(text), listen=listen)
+
+@app.on_event("shutdown")
+async def stop_practices():
+    await practices.shutdown()
 
 @app.get("/start/{song_name}")
-def start_practice(song_name: str):
-    threading.Thread(target=pronounce_and_verify, args=(song_name,), daemon=True).start()
-    return {"message": "Practice started", "song": song_name}
\ No newline at end of file
+async def start_practice(song_name: str, phrase: bool = False):
+    """Practice a song word by word, or a line at a time with phrase=True; progress streams from /events/{practice_id}."""
+    if song_name not in songs:
+        raise HTTPException(status_code=404, detail="Song not found")
+    try:
+        practice = await practices.start(song_name, songs[song_name], phrase=phrase, session_id=f"default_{song_name}")
+    except PracticeLimit as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return {"message": "Practice started", "song": song_name, "practice_id": practice.practice_id,
+            "events": f"/events/{practice.practice_id}"}
+
+@app.get("/events/{practice_id}")
+async def practice_events(practice_id: str, request: Request):
+    practice = practices.get(practice_id)
+    if practice is None:
+        raise HTTPException(status_code=404, detail="Practice not found")
+    last_event_id = request.headers.get("last-event-id", "0")
+    return StreamingResponse(
+        event_stream(practice, int(last_event_id) if last_event_id.isdigit() else 0),
+        media_type="text/event-stream", headers=SSE_HEADERS,
+    )
+
+@app.get("/reset/{song_name}")
+def reset_progress(song_name: str):
+    if song_name not in songs:
+        raise HTTPException(status_code=404, detail="Song not found")
+    state.reset(f"default_{song_name}")
+    return {"message": "Progress reset", "song": song_name}
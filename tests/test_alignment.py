@@ -0,0 +1,14 @@
+from app.alignment import align_phrase, words_match
+
+
+def test_words_match_sound_alikes_only():
+    assert words_match("i", "eye")
+    assert words_match("row", "roe")
+    assert not words_match("down", "town")
+    assert not words_match("d", "t")
+    assert not words_match("c", "zee")
+
+
+def test_near_miss_ends_the_correct_prefix():
+    alignment = align_phrase(["gently", "down", "the", "stream"], "gently town the stream")
+    assert alignment.correct_prefix == 1
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from app.audio import AudioDecodeError, decode_audio
+
+PCM = np.zeros(160, dtype="<i2").tobytes()
+
+
+def test_decode_l16():
+    assert len(decode_audio(PCM, "audio/L16; rate=16000; channels=1")) == 160
+
+
+@pytest.mark.parametrize("content_type", [
+    "audio/L16; rate=abc",
+    "audio/L16; rate=0",
+    "audio/L16; rate=-8000",
+    "audio/L16; rate=16000; channels=0",
+    "audio/L16; channels=two",
+])
+def test_bad_l16_parameters_are_decode_errors(content_type):
+    with pytest.raises(AudioDecodeError):
+        decode_audio(PCM, content_type)
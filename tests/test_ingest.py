@@ -0,0 +1,28 @@
+import json
+
+from app.ingest import build_catalog, checkpoint_path, song_name
+
+
+def write_checkpoint(directory, key, path, words):
+    entry = {"song": song_name(path), "source": path, "duration_s": 1.0, "words": words, "timings": []}
+    with open(checkpoint_path(directory, key), "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+
+
+def test_song_name_keeps_unicode_letters():
+    assert song_name("/songs/Imagine Dragons - Thunder.mp3") == "imagine_dragons_thunder"
+    assert song_name("/songs/हनुमान चालीसा.mp3") != song_name("/songs/गायत्री मंत्र.mp3")
+    assert song_name("/songs/गायत्री मंत्र.mp3") != "song"
+
+
+def test_colliding_names_are_both_kept(tmp_path):
+    write_checkpoint(tmp_path, "aaaa1111bbbb", "/songs/Thunder.mp3", ["thunder"])
+    write_checkpoint(tmp_path, "cccc2222dddd", "/songs/thunder.wav", ["lightning"])
+    catalog = tmp_path / "catalog.json"
+
+    songs = build_catalog(tmp_path, ["aaaa1111bbbb", "cccc2222dddd"], catalog)
+    assert songs["thunder"]["source"] == "/songs/Thunder.mp3"
+    assert songs["thunder_cccc2222"]["source"] == "/songs/thunder.wav"
+
+    # A rerun lands on the same names instead of piling up new ones
+    assert build_catalog(tmp_path, ["aaaa1111bbbb", "cccc2222dddd"], catalog).keys() == songs.keys()
@@ -0,0 +1,40 @@
+from app.phonetics import PhoneticIndex, sounds_like
+from app.scoring import _transcribed_verdict
+
+TWINKLE = ["Twinkle", "twinkle", "little", "star", "how", "I", "wonder", "what", "you", "are"]
+ABC = ["A", "B", "C", "D", "E", "F", "G"]
+ROW_BOAT = ["Row", "row", "row", "your", "boat", "gently", "down", "the", "stream"]
+
+
+def verdict(words, recognized, expected):
+    return _transcribed_verdict(expected, recognized, index=PhoneticIndex(words))
+
+
+def test_sound_alike_spellings_pass():
+    assert verdict(TWINKLE, "eye", "I")["correct"]
+    assert verdict(ABC, "see", "C")["correct"]
+    assert verdict(ROW_BOAT, "roe", "row")["correct"]
+
+
+def test_near_misses_fail():
+    assert not verdict(ABC, "T.", "D")["correct"]
+    assert not verdict(ABC, "Zee.", "C")["correct"]
+    assert not verdict(ROW_BOAT, "Town.", "down")["correct"]
+    assert not verdict(TWINKLE, "Wet", "what")["correct"]
+    assert not verdict(ABC, "be", "D")["correct"]
+
+
+def test_phrases_containing_the_word_fail():
+    assert not verdict(TWINKLE, "twinkle twinkle little star", "star")["correct"]
+    assert not verdict(ROW_BOAT, "gently down the stream", "the")["correct"]
+    assert not verdict(TWINKLE, "I wonder", "I")["correct"]
+    assert not sounds_like("hello", "hello there")
+
+
+def test_sounds_like():
+    assert sounds_like("sunshine", "Sun shine.")
+    assert sounds_like("you", "u")
+    assert sounds_like("are", "r")
+    assert not sounds_like("d", "tee")
+    assert not sounds_like("", "")
+
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+
+from app.executor import InferenceExecutor
+from app.practice import PracticeScheduler
+from app.state import MemoryStateBackend
+
+
+class RecordingState(MemoryStateBackend):
+    """Notes the thread of every call, to check none block the event loop."""
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def create(self, song_id):
+        self.threads.add(threading.get_ident())
+        return super().create(song_id)
+
+    def get(self, session_id):
+        self.threads.add(threading.get_ident())
+        return super().get(session_id)
+
+    def advance(self, *args, **kwargs):
+        self.threads.add(threading.get_ident())
+        return super().advance(*args, **kwargs)
+
+
+def test_practice_runs_state_calls_off_the_event_loop():
+    state = RecordingState()
+    executor = InferenceExecutor(2, 2)
+
+    def verify(practice, utterance, expected):
+        return {"recognized": utterance, "correct": utterance == expected[0]}
+
+    async def run():
+        scheduler = PracticeScheduler(state, executor, verify)
+        practice = await scheduler.start("song", ["hello", "world"])
+        async for item in practice.events(keepalive=1):
+            if item is not None and item[1] == "state" and item[2]["state"] == "listening":
+                practice.submit(item[2]["words"][0])
+        await scheduler.shutdown()
+        return practice, threading.get_ident()
+
+    practice, loop_thread = asyncio.run(run())
+    executor.shutdown()
+    assert practice.state == "completed" and practice.position == 2
+    assert state.threads and loop_thread not in state.threads
@@ -0,0 +1,77 @@
+import asyncio
+import random
+import time
+
+import numpy as np
+import pytest
+
+from app import config
+from app.remote_asr import RemoteASRClient, RemoteASRError, backoff_delay
+from benchmarks.mock_asr_server import corpus_from_fixtures, start_mock_server
+
+AUDIO = (0.1 * np.sin(np.arange(8000) / 10)).astype(np.float32)
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(config, "REMOTE_ASR_BACKOFF_S", 0.01)
+    monkeypatch.setattr(config, "REMOTE_ASR_BACKOFF_MAX_S", 0.05)
+
+
+def serve(**kwargs):
+    return start_mock_server(corpus_from_fixtures({"hello": AUDIO}), latency_ms=0, ms_per_audio_second=0, **kwargs)
+
+
+def transcribe(server, provider="deepgram", max_retries=3):
+    async def run():
+        async with RemoteASRClient(provider, api_key="test", base_url=server.url, max_retries=max_retries) as client:
+            start = time.perf_counter()
+            try:
+                return await client.transcribe_audio(AUDIO), client.stats, time.perf_counter() - start
+            except RemoteASRError as e:
+                return e, client.stats, time.perf_counter() - start
+    try:
+        return asyncio.run(run())
+    finally:
+        server.shutdown()
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    random.seed(0)
+    for attempt in range(8):
+        delays = [backoff_delay(attempt, base=0.5, cap=4) for _ in range(200)]
+        assert 0 <= min(delays) and max(delays) <= min(4, 0.5 * 2 ** attempt)
+        assert len(set(delays)) > 1
+
+
+@pytest.mark.parametrize("provider", ["deepgram", "assemblyai"])
+def test_5xx_is_retried(provider):
+    server = serve(script=[503, 502])
+    result, stats, _ = transcribe(server, provider)
+    assert result.text == "hello"
+    assert stats["retries"] == 2
+    assert server.counts["errors"] == 2
+
+
+def test_retry_after_is_honoured():
+    server = serve(script=[429], retry_after_s=0.3)
+    result, stats, elapsed = transcribe(server)
+    assert result.text == "hello"
+    assert stats["rate_limited"] == 1 and stats["retries"] == 1
+    assert elapsed >= 0.3
+
+
+def test_fails_after_max_retries():
+    server = serve(script=[503] * 10)
+    result, stats, _ = transcribe(server, max_retries=2)
+    assert isinstance(result, RemoteASRError)
+    assert stats["requests"] == 3
+    assert server.counts["requests"] == 3
+
+
+def test_4xx_fails_immediately():
+    server = serve(script=[400])
+    result, stats, _ = transcribe(server)
+    assert isinstance(result, RemoteASRError)
+    assert stats["requests"] == 1 and stats["retries"] == 0
+    assert server.counts["requests"] == 1
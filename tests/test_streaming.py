@@ -0,0 +1,128 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.audio import SAMPLE_RATE
+from app.executor import InferenceExecutor
+from app.streaming import StreamingEndpointer, StreamingVerifier, parse_control
+
+rng = np.random.default_rng(0)
+
+
+def noise(seconds, level):
+    return (rng.standard_normal(int(SAMPLE_RATE * seconds)) * level).astype(np.float32)
+
+
+def tone(seconds, level=0.3):
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (level * np.sin(2 * np.pi * 220 * t)).astype(np.float32) + noise(seconds, 0.002)
+
+
+def feed(endpointer, audio, chunk=480):
+    events = []
+    for i in range(0, len(audio), chunk):
+        events += endpointer.feed(audio[i:i + chunk])
+    return events
+
+
+@pytest.mark.parametrize("lead_in", [0.0, 0.1, 0.5])
+def test_speech_is_detected_however_soon_it_starts(lead_in):
+    endpointer = StreamingEndpointer()
+    events = feed(endpointer, np.concatenate([noise(lead_in, 0.002), tone(0.6), noise(1.0, 0.002)]))
+    assert events == ["speech_start", "speech_end"]
+    assert 600 <= endpointer.speech_ms <= 960  # the tone plus VAD_PAD_MS either side
+
+
+def test_noise_alone_is_not_speech():
+    endpointer = StreamingEndpointer()
+    assert feed(endpointer, noise(2.0, 0.01)) == []
+
+
+def test_finish_verifies_audio_without_speech_start():
+    endpointer = StreamingEndpointer()
+    feed(endpointer, tone(0.06))
+    assert endpointer.finish() == ["speech_end"]
+    assert len(endpointer.utterance()) > 0
+
+
+def test_parse_control():
+    assert parse_control('{"sample_rate": 48000}', 16000) == ({"sample_rate": 48000}, 48000)
+    for text in ("not json", "[1]", '{"sample_rate": "abc"}', '{"sample_rate": 0}'):
+        with pytest.raises(ValueError):
+            parse_control(text, 16000)
+
+
+class FakeWebSocket:
+    def __init__(self, messages):
+        self.messages = list(messages) + [{"type": "websocket.disconnect"}]
+        self.sent = []
+
+    async def receive(self):
+        return self.messages.pop(0)
+
+    async def send_json(self, payload):
+        self.sent.append(payload)
+
+    async def close(self):
+        pass
+
+
+def test_malformed_messages_get_an_error_frame():
+    websocket = FakeWebSocket([
+        {"type": "websocket.receive", "text": "{oops"},
+        {"type": "websocket.receive", "bytes": b"\x00\x01\x02"},
+        {"type": "websocket.receive", "bytes": b"\x00\x00"},
+    ])
+    asyncio.run(StreamingVerifier(None).serve(websocket, lambda: (0, "hello"), None))
+    assert [message["type"] for message in websocket.sent] == ["ready", "error", "error"]
+
+
+class FakeTranscriber:
+    def score(self, audio, expected_word):
+        return 0.9
+
+    def transcribe(self, audio):
+        return {"text": "hello"}
+
+
+def test_verdicts_run_on_the_inference_pool():
+    executor = InferenceExecutor(1, 0)
+    pcm = (np.concatenate([noise(0.3, 0.002), tone(0.6), noise(0.6, 0.002)]) * 32767).astype("<i2").tobytes()
+    websocket = FakeWebSocket([{"type": "websocket.receive", "bytes": pcm}])
+    targets = iter([(0, "hello"), None])
+    asyncio.run(StreamingVerifier(FakeTranscriber(), executor=executor).serve(
+        websocket, lambda: next(targets), lambda target, verdict: dict(verdict),
+    ))
+    executor.shutdown()
+    final = [message for message in websocket.sent if message["type"] == "final"]
+    assert len(final) == 1 and final[0]["correct"]
+    assert executor.stats()["completed"] >= 1
+    assert websocket.sent[-1]["type"] == "completed"
+
+
+
+def test_state_callbacks_run_off_the_event_loop():
+    import threading
+
+    threads = []
+    targets = iter([(0, "hello"), None])
+
+    def next_target():
+        threads.append(threading.get_ident())
+        return next(targets)
+
+    def apply_verdict(target, verdict):
+        threads.append(threading.get_ident())
+        return dict(verdict)
+
+    async def run():
+        pcm = (np.concatenate([noise(0.3, 0.002), tone(0.6), noise(0.6, 0.002)]) * 32767).astype("<i2").tobytes()
+        websocket = FakeWebSocket([{"type": "websocket.receive", "bytes": pcm}])
+        await StreamingVerifier(FakeTranscriber(), executor=executor).serve(websocket, next_target, apply_verdict)
+        return threading.get_ident()
+
+    executor = InferenceExecutor(1, 0)
+    loop_thread = asyncio.run(run())
+    executor.shutdown()
+    assert len(threads) == 3 and loop_thread not in threads
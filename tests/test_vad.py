@@ -0,0 +1,21 @@
+import time
+
+from app.vad import NoiseCalibrator
+
+
+def test_noise_profiles_are_bounded():
+    calibrator = NoiseCalibrator(ttl=600, max_entries=3)
+    for i in range(10):
+        calibrator.remember_noise_floor(f"session_{i}", 0.01)
+    assert len(calibrator) == 3
+    assert calibrator.noise_floor("session_9") == 0.01
+    assert calibrator.noise_floor("session_0") is None
+
+
+def test_expired_noise_profiles_are_dropped():
+    calibrator = NoiseCalibrator(ttl=0.01, max_entries=100)
+    calibrator.remember_noise_floor("old", 0.01)
+    time.sleep(0.02)
+    calibrator.remember_noise_floor("new", 0.02)
+    assert len(calibrator) == 1
+    assert calibrator.noise_floor("new") == 0.02
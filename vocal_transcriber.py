@@ -1,72 +1,106 @@
-import torch
-import torchaudio
-import librosa
-import numpy as np
-from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
-from torch import hub
+from app import config
+from app.asr import Wav2Vec2Backend
+from app.audio import SAMPLE_RATE, load_audio
+from app.registry import registry
+from app.separation import ChunkedSeparator
+from app.stem_cache import StemCache, stem_key, transcript_key
+from app.timing import StageTimer
 
 class VocalTranscriber:
-    def __init__(self):
-        # Initialize Demucs for source separation using torch hub
-        self.separator = hub.load('facebookresearch/demucs', 'htdemucs')
-        if torch.cuda.is_available():
-            self.separator.cuda()
-        
-        # Initialize Wav2Vec2 for speech recognition
-        self.processor = Wav2Vec2Processor.from_pretrained("facebook/wav2vec2-large-960h")
-        self.model = Wav2Vec2ForCTC.from_pretrained("facebook/wav2vec2-large-960h")
+    # Demucs and Wav2Vec2 come from the shared model registry: nothing is
+    # loaded until a file is processed, and every transcriber shares one copy
+    def __init__(self, cache=None):
+        # Separated stems and transcripts are cached by audio content, so a
+        # track is only ever separated and transcribed once
+        if cache is None and config.STEM_CACHE_ENABLED:
+            cache = StemCache()
+        self.cache = cache
+    
+    @property
+    def separator(self):
+        return registry.get("demucs")
+    
+    @property
+    def processor(self):
+        return registry.get("wav2vec2")[0]
+    
+    @property
+    def model(self):
+        return registry.get("wav2vec2")[1]
         
     def separate_vocals(self, audio_path):
-        """Extract vocals from the music file using Demucs."""
-        # Load audio
-        wav, sr = torchaudio.load(audio_path)
-        
-        # Convert to mono if stereo
-        if wav.shape[0] > 1:
-            wav = torch.mean(wav, dim=0, keepdim=True)
-        
-        # Adjust audio length to be compatible with the model
-        wav = wav.reshape(1, -1)  # Add batch dimension
+        """Extract vocals from the music file using Demucs (or the stem cache)."""
+        if self.cache is None:
+            return self._separate(audio_path)
+        key = stem_key(self.cache.fingerprint(audio_path))
+        cached = self.cache.get_stem(key)
+        if cached is not None:
+            return cached
+        vocals, sr = self._separate(audio_path)
+        self.cache.put_stem(key, vocals, sr)
+        return vocals, sr
+    
+    def _separate(self, audio_path):
+        separator = ChunkedSeparator(self.separator)
+        if config.SEPARATION_MODE == "chunked":
+            # Overlapping segments streamed from disk: memory stays flat for full-length songs
+            return separator.separate_file(audio_path), separator.sample_rate
+        # One forward pass over the whole track; memory grows with its length
+        return separator.separate_whole(audio_path), separator.sample_rate
+    
+    def transcribe_vocals(self, vocals, sample_rate, with_timestamps=False, timer=None):
+        """
+        Transcribe the separated vocals using Wav2Vec2.
         
-        # Apply source separation
-        with torch.no_grad():
-            sources = self.separator.forward(wav)
-            # sources is (batch, source, channels, time)
-            vocals = sources[0, 0]  # Extract vocals
+        Long vocals are transcribed in strided, batched chunks. With
+        with_timestamps the per-word start/end times (seconds) from the CTC
+        alignment are returned alongside the text.
+        """
+        timer = timer or StageTimer()
+        # Mono float32 at 16 kHz (what Wav2Vec2 expects); no copy if it already is
+        with timer.stage("resample"):
+            vocals = load_audio(vocals, source_sr=sample_rate, target_sr=SAMPLE_RATE)
         
-        return vocals.cpu().numpy(), sr
+        # Chunking, CTC decoding and normalisation are shared with the Wav2Vec2 ASR backend
+        with timer.stage("transcribe"):
+            transcript = Wav2Vec2Backend().transcribe(vocals)
+        if not with_timestamps:
+            return transcript.text
+        return {"text": transcript.text, "words": [word._asdict() for word in transcript.words]}
     
-    def transcribe_vocals(self, vocals, sample_rate):
-        """Transcribe the separated vocals using Wav2Vec2."""
-        # Resample if necessary (Wav2Vec2 expects 16kHz)
-        if sample_rate != 16000:
-            vocals = librosa.resample(vocals, orig_sr=sample_rate, target_sr=16000)
+    def transcribe_file(self, audio_path):
+        """
+        Timestamped transcript of a file plus the time spent per stage.
         
-        # Normalize audio
-        vocals = (vocals - np.mean(vocals)) / np.std(vocals)
+        A cached transcript is returned without touching the models; a cached
+        stem skips separation.
+        """
+        # Stage times also feed the /metrics histograms (pipeline "vocals")
+        timer = StageTimer("vocals")
+        key = None
+        if self.cache is not None:
+            with timer.stage("cache_lookup"):
+                key = transcript_key(self.cache.fingerprint(audio_path))
+                result = self.cache.get_transcript(key)
+            if result is not None:
+                return result, timer.stages
         
-        # Prepare input features
-        inputs = self.processor(vocals, sampling_rate=16000, return_tensors="pt", padding=True)
+        with timer.stage("separate"):
+            vocals, sr = self.separate_vocals(audio_path)
         
-        # Get logits
-        with torch.no_grad():
-            logits = self.model(inputs.input_values).logits
+        result = self.transcribe_vocals(vocals, sr, with_timestamps=True, timer=timer)
+        result["duration_s"] = round(vocals.shape[-1] / sr, 2)
         
-        # Decode predicted ids to text
-        predicted_ids = torch.argmax(logits, dim=-1)
-        transcription = self.processor.batch_decode(predicted_ids)
-        
-        return transcription[0]
+        if key is not None:
+            self.cache.put_transcript(key, result)
+        return result, timer.stages
     
-    def process_file(self, audio_path):
+    def process_file(self, audio_path, with_timestamps=False):
         """Process an audio file to transcribe vocals."""
-        print("Separating vocals from music...")
-        vocals, sr = self.separate_vocals(audio_path)
-        
         print("Transcribing vocals...")
-        transcription = self.transcribe_vocals(vocals, sr)
+        result, _ = self.transcribe_file(audio_path)
         
-        return transcription
+        return result if with_timestamps else result["text"]
 
 def main():
     # Example usage
@@ -1,34 +1,47 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 import json
-import threading
-import pyttsx3
 import requests
 from typing import List, Dict, Optional
 
+from app import config
+from app.alignment import align_phrase
+from app.catalog import load_songs
+from app.state import get_state_backend
+from app.registry import registry
+
 app = FastAPI()
 
-# Initialize text-to-speech engine
-engine = pyttsx3.init()
+# Text-to-speech runs on a single worker thread that owns the engine
+synthesizer = registry.proxy("tts")
 
 # Sample song lyrics storage
-songs = {
+songs = load_songs({
     "twinkle": ["Twinkle", "twinkle", "little", "star", "how", "I", "wonder", "what", "you", "are"],
     "abc": ["A", "B", "C", "D", "E", "F", "G", "H", "I", "J", "K", "L", "M", "N", "O", "P"],
     "row_boat": ["Row", "row", "row", "your", "boat", "gently", "down", "the", "stream"]
-}
-
-# Track current song and word position for each session
-sessions = {}
+})
 
-class SessionData(BaseModel):
-    song_id: str
-    current_position: int = 0
-    completed: bool = False
+# Track current song and word position for each session; idle sessions are evicted.
+# STATE_BACKEND=sqlite shares sessions between uvicorn workers.
+sessions = get_state_backend()
 
 class VerificationResult(BaseModel):
     is_correct: bool
     message: Optional[str] = None
+    # What the client heard for a whole sung line; when set, the server aligns
+    # it against the lyrics and advances past every word sung correctly
+    recognized: Optional[str] = None
+
+@app.on_event("startup")
+def start_session_sweeper():
+    sessions.start_sweeper()
+
+def get_session(session_id):
+    session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
 
 @app.post("/start_song/{song_id}")
 def start_song(song_id: str):
@@ -36,8 +49,7 @@ def start_song(song_id: str):
         raise HTTPException(status_code=404, detail="Song not found")
     
     # Create a new session
-    session_id = f"session_{len(sessions) + 1}"
-    sessions[session_id] = SessionData(song_id=song_id)
+    session_id = sessions.create(song_id)
     
     # Get the first word
     first_word = songs[song_id][0]
@@ -54,10 +66,7 @@ def start_song(song_id: str):
 @app.get("/pronounce/{session_id}")
 def pronounce_word(session_id: str):
     # Check if session exists
-    if session_id not in sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    session = sessions[session_id]
+    session = get_session(session_id)
     
     # Check if song is completed
     if session.completed:
@@ -72,12 +81,8 @@ def pronounce_word(session_id: str):
     json_data = json.dumps(word_data)
     print(json_data)
     
-    # Pronounce word in a separate thread
-    def speak():
-        engine.say(current_word)
-        engine.runAndWait()
-    
-    threading.Thread(target=speak, daemon=True).start()
+    # Queue the word on the TTS worker
+    synthesizer.speak(current_word)
     
     return {
         "message": f"Pronouncing word: {current_word}",
@@ -90,10 +95,7 @@ def pronounce_word(session_id: str):
 @app.post("/verify/{session_id}")
 def verify_pronunciation(session_id: str, result: VerificationResult):
     # Check if session exists
-    if session_id not in sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    session = sessions[session_id]
+    session = get_session(session_id)
     
     # Check if song is already completed
     if session.completed:
@@ -103,13 +105,23 @@ def verify_pronunciation(session_id: str, result: VerificationResult):
     song_lyrics = songs[session.song_id]
     current_word = song_lyrics[session.current_position]
     
+    steps, expected_position = 1, None
+    if result.recognized is not None:
+        # Align against the lyrics this session was on, so a concurrent verify can't double-advance
+        position = expected_position = session.current_position
+        alignment = align_phrase(song_lyrics[position:position + config.PHRASE_MAX_WORDS], result.recognized)
+        steps = alignment.correct_prefix
+        result.is_correct = steps > 0
+    
     if result.is_correct:
-        # Move to the next word
-        session.current_position += 1
+        # Move to the next word (one atomic update, safe across workers)
+        updated = sessions.advance(session_id, len(song_lyrics), expected_position=expected_position, steps=steps)
+        if updated is None:
+            # Another attempt moved the session first; report where it really is
+            updated = sessions.get(session_id) or session
         
         # Check if we've reached the end of the song
-        if session.current_position >= len(song_lyrics):
-            session.completed = True
+        if updated.completed:
             return {
                 "message": "Pronunciation correct. Song completed!",
                 "completed": True,
@@ -117,13 +129,13 @@ def verify_pronunciation(session_id: str, result: VerificationResult):
             }
         
         # Get the next word
-        next_word = song_lyrics[session.current_position]
+        next_word = song_lyrics[updated.current_position]
         
         return {
             "message": f"Pronunciation correct. Moving to next word: {next_word}",
             "completed": False,
             "next_word": next_word,
-            "position": session.current_position,
+            "position": updated.current_position,
             "total_words": len(song_lyrics)
         }
     else:
@@ -139,10 +151,7 @@ def verify_pronunciation(session_id: str, result: VerificationResult):
 @app.get("/song_progress/{session_id}")
 def get_progress(session_id: str):
     # Check if session exists
-    if session_id not in sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    session = sessions[session_id]
+    session = get_session(session_id)
     song_lyrics = songs[session.song_id]
     
     return {